@@ -0,0 +1,269 @@
+"""Globally cost-minimal allocation of pending orders, with split shipments.
+
+``suggest_cheapest_origin`` looks at one order at a time and needs a single
+warehouse that can cover it. This module treats all pending orders, warehouse
+stock and route costs as one transportation problem per SKU:
+
+    warehouses (supply) --route cost per unit--> customer hubs (demand)
+
+It is solved as a min-cost max-flow with successive shortest paths
+(Dijkstra with node potentials). Orders for the same SKU and hub share
+identical costs, so they are merged into one demand node first. That keeps
+each graph at warehouses x hubs nodes no matter how many orders there are.
+The optimal flows are then handed back to orders oldest first, and an order
+may be split across several warehouses. Where units are left on a hub that
+complete none of its remaining orders, all of those orders are dropped in one
+go and the SKU re-solved, so the units go to orders that can be filled.
+
+``allocate_pending_orders(apply=False)`` is a dry run that returns the plan.
+With ``apply=True`` the plan is written in the same transaction that read and
+locked the stock.
+"""
+
+import heapq
+
+from db.fulfillment import write_shipments
+from db.session import run_in_transaction
+
+
+def solve_transportation(supply, demand, costs):
+    """Return ``{(source, sink): units}`` moving as much demand as possible at least cost.
+
+    ``supply`` and ``demand`` map node names to units, and ``costs`` maps
+    ``(source, sink)`` pairs that have a route to a per-unit cost.
+    """
+    sources = [w for w, units in supply.items() if units > 0]
+    sinks = [h for h, units in demand.items() if units > 0]
+    if not sources or not sinks:
+        return {}
+
+    # Node 0 = super source, 1 = super sink, then sources, then sinks.
+    index = {("s", w): i + 2 for i, w in enumerate(sources)}
+    index.update({("h", h): i + 2 + len(sources) for i, h in enumerate(sinks)})
+    size = 2 + len(sources) + len(sinks)
+    graph = [[] for _ in range(size)]  # edge = [to, capacity, cost, reverse index]
+
+    def add_edge(u, v, capacity, cost):
+        graph[u].append([v, capacity, cost, len(graph[v])])
+        graph[v].append([u, 0, -cost, len(graph[u]) - 1])
+
+    total_supply = sum(supply[w] for w in sources)
+    middle = []
+    for w in sources:
+        add_edge(0, index[("s", w)], supply[w], 0.0)
+    for h in sinks:
+        add_edge(index[("h", h)], 1, demand[h], 0.0)
+    for (w, h), cost in costs.items():
+        if ("s", w) in index and ("h", h) in index:
+            u = index[("s", w)]
+            middle.append((w, h, u, len(graph[u])))
+            add_edge(u, index[("h", h)], total_supply, float(cost))
+
+    potential = [0.0] * size
+    while True:
+        dist = [float("inf")] * size
+        parent = [None] * size
+        dist[0] = 0.0
+        heap = [(0.0, 0)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u == 1:
+                break
+            if d > dist[u]:
+                continue
+            for i, (v, capacity, cost, _) in enumerate(graph[u]):
+                if capacity <= 0:
+                    continue
+                nd = d + cost + potential[u] - potential[v]
+                if nd < dist[v] - 1e-12:
+                    dist[v] = nd
+                    parent[v] = (u, i)
+                    heapq.heappush(heap, (nd, v))
+        if dist[1] == float("inf"):
+            break
+        # Capping at the sink's distance keeps reduced costs non-negative
+        # while letting Dijkstra stop as soon as the sink is settled.
+        for v in range(size):
+            potential[v] += min(dist[v], dist[1])
+
+        push = float("inf")
+        v = 1
+        while v != 0:
+            u, i = parent[v]
+            push = min(push, graph[u][i][1])
+            v = u
+        v = 1
+        while v != 0:
+            u, i = parent[v]
+            edge = graph[u][i]
+            edge[1] -= push
+            graph[edge[0]][edge[3]][1] += push
+            v = u
+
+    flows = {}
+    for w, h, u, i in middle:
+        edge = graph[u][i]
+        units = graph[edge[0]][edge[3]][1]
+        if units > 0:
+            flows[(w, h)] = flows.get((w, h), 0) + units
+    return flows
+
+
+def _load(cursor, lock):
+    # Only the constant locking clause is appended; no values reach the SQL text.
+    suffix = " FOR UPDATE" if lock else ""
+    cursor.execute(
+        "SELECT order_id, sku, quantity, customer_location FROM Orders "
+        "WHERE status = 'Pending' ORDER BY order_id" + suffix  # nosec B608
+    )
+    orders = cursor.fetchall()
+    cursor.execute(
+        "SELECT sku, location, quantity FROM Inventory "
+        "WHERE quantity > 0 AND location NOT LIKE 'Retail Hub%' "
+        "AND sku IN (SELECT DISTINCT sku FROM Orders WHERE status = 'Pending')"
+        + suffix  # nosec B608
+    )
+    stock = cursor.fetchall()
+    cursor.execute("SELECT origin, destination, cost FROM Routes")
+    routes = {(o, d): cost for o, d, cost in cursor.fetchall()}
+    return orders, stock, routes
+
+
+def _entry(sku, order):
+    order_id, quantity, destination = order
+    return {
+        "order_id": order_id,
+        "sku": sku,
+        "quantity": quantity,
+        "destination": destination,
+        "shipments": [],
+        "cost": 0,
+        "status": "Unfilled",
+    }
+
+
+def _hand_out(sku, sku_orders, flows, routes):
+    """Split ``flows`` across orders oldest first.
+
+    Returns the allocated entries, the short ones and the hubs left holding
+    units that none of their short orders can use.
+    """
+    pools = {}
+    for (w, h), units in flows.items():
+        pools.setdefault(h, []).append([routes[(w, h)], w, units])
+    for pool in pools.values():
+        pool.sort()
+
+    entries = []
+    short = []
+    for order in sku_orders:
+        _, quantity, destination = order
+        entry = _entry(sku, order)
+        pool = pools.get(destination, [])
+        if sum(p[2] for p in pool) >= quantity:
+            needed = quantity
+            for slot in pool:
+                if not needed:
+                    break
+                take = min(slot[2], needed)
+                if take:
+                    slot[2] -= take
+                    needed -= take
+                    entry["shipments"].append({
+                        "origin": slot[1],
+                        "quantity": take,
+                        "unit_cost": slot[0],
+                        "cost": slot[0] * take,
+                    })
+            entry["cost"] = sum(s["cost"] for s in entry["shipments"])
+            entry["status"] = "Allocated"
+            entries.append(entry)
+        else:
+            short.append(entry)
+    stranded = {h for h, pool in pools.items() if any(slot[2] for slot in pool)}
+    return entries, short, stranded
+
+
+def build_plan(orders, stock, routes):
+    """Solve every SKU's transportation problem and split the flows across orders.
+
+    The flow maximises units per hub, not completed orders, so units can
+    land on a hub where they finish no order. All short orders of such a
+    hub are then dropped (left Unfilled) in one pass and the SKU re-solved,
+    returning those units to orders elsewhere. Dropping whole hubs keeps the
+    number of re-solves to a few per SKU however many orders are short.
+    """
+    by_sku = {}
+    for order_id, sku, quantity, destination in orders:
+        by_sku.setdefault(sku, []).append((order_id, quantity, destination))
+    supply_by_sku = {}
+    for sku, location, quantity in stock:
+        supply_by_sku.setdefault(sku, {})[location] = quantity
+
+    plan = []
+    for sku, sku_orders in by_sku.items():
+        supply = supply_by_sku.get(sku, {})
+        active = list(sku_orders)
+        while True:
+            demand = {}
+            for _, quantity, destination in active:
+                demand[destination] = demand.get(destination, 0) + quantity
+            costs = {
+                (w, h): routes[(w, h)]
+                for w in supply for h in demand if (w, h) in routes
+            }
+            flows = solve_transportation(supply, demand, costs)
+            entries, short, stranded = _hand_out(sku, active, flows, routes)
+            dropped = {e["order_id"] for e in short if e["destination"] in stranded}
+            if not dropped:
+                plan.extend(short)
+                break
+            plan.extend(e for e in short if e["order_id"] in dropped)
+            active = [order for order in active if order[0] not in dropped]
+        plan.extend(entries)
+    plan.sort(key=lambda e: e["order_id"])
+    return plan
+
+
+def summarize_plan(plan):
+    """Return order counts, split-shipment count and total cost for a plan."""
+    allocated = [e for e in plan if e["status"] == "Allocated"]
+    return {
+        "orders": len(plan),
+        "allocated": len(allocated),
+        "unfilled": len(plan) - len(allocated),
+        "split": sum(1 for e in allocated if len(e["shipments"]) > 1),
+        "total_cost": sum(e["cost"] for e in allocated),
+    }
+
+
+def allocate_pending_orders(apply=False, user_id=1):
+    """Plan (and optionally apply) a min-cost allocation of all pending orders.
+
+    Returns the plan: one entry per pending order with its ``shipments``
+    (origin, quantity, unit_cost, cost), total ``cost`` and ``status``
+    ("Allocated" or "Unfilled"). With ``apply`` the stock rows are locked
+    while planning and the allocated orders are shipped and marked Processed
+    in the same transaction, which is re-planned from scratch on a deadlock
+    or lock wait timeout.
+    """
+    def allocate(session):
+        orders, stock, routes = _load(session.cursor, lock=apply)
+        plan = build_plan(orders, stock, routes)
+        allocated = [e for e in plan if e["status"] == "Allocated"]
+        if apply and allocated:
+            write_shipments(
+                session,
+                [(e["sku"], s["origin"], e["destination"], s["quantity"], s["cost"])
+                 for e in allocated for s in e["shipments"]],
+                [e["order_id"] for e in allocated],
+                [f"Allocated order #{e['order_id']}: {e['quantity']} units of {e['sku']} "
+                 f"to {e['destination']} from "
+                 + ", ".join(f"{s['origin']} ({s['quantity']})" for s in e["shipments"])
+                 + f" (₹{e['cost']:.2f})"
+                 for e in allocated],
+                user_id,
+            )
+        return plan
+
+    return run_in_transaction(allocate)
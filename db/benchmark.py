@@ -0,0 +1,273 @@
+"""Benchmark harness for the read paths in ``db.queries``.
+
+Each benchmark calls one query function with representative arguments
+taken from the loaded data (see ``db.datagen``). A run records
+min/median/p95/mean latency and the rows returned per benchmark, and can
+be saved as a JSON baseline. Comparing two runs flags every benchmark
+whose median moved by more than the threshold::
+
+    python -m db.datagen --scale small
+    python -m db.benchmark --output baseline.json
+    # ... change code ...
+    python -m db.benchmark --baseline baseline.json --output current.json
+
+The exit status is 1 when any benchmark regressed. Benchmarks only read,
+so they can be run repeatedly against the same dataset. They bypass the
+``cached_query`` cache, so those calls reach the database. ``get_locations``
+and ``get_shortest_route`` still read the Routes table through the
+reference cache and the in-memory route graph, so after warmup they time
+those in-process paths rather than a round trip.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from itertools import islice
+
+from db import queries
+from db.cache import bypass_query_cache
+from db.connection import backend_name, get_connection
+
+DEFAULT_REPEAT = 5
+DEFAULT_WARMUP = 1
+DEFAULT_THRESHOLD = 0.20
+# Changes smaller than this are treated as noise whatever the ratio.
+MIN_DELTA_MS = 1.0
+STREAM_SAMPLE = 10_000
+
+
+def _fixtures():
+    """Pick existing keys to benchmark against (hot SKU, a warehouse, a hub, a customer)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        def first(sql):
+            cursor.execute(sql)
+            row = cursor.fetchone()
+            cursor.fetchall()
+            return row[0] if row else None
+
+        return {
+            "sku": first("SELECT sku FROM Products ORDER BY sku LIMIT 1"),
+            "warehouse": first(
+                "SELECT location FROM Inventory "
+                "WHERE location NOT LIKE 'Retail Hub%' ORDER BY inventory_id LIMIT 1"
+            ),
+            "hub": first(
+                "SELECT destination FROM Routes "
+                "WHERE destination LIKE 'Retail Hub%' ORDER BY route_id LIMIT 1"
+            ),
+            "customer": first("SELECT customer_name FROM Orders ORDER BY order_id LIMIT 1"),
+            "log_user": first("SELECT user_id FROM Logs ORDER BY log_id LIMIT 1"),
+        }
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _dataset_size():
+    """Return the row count per table (InnoDB's estimate on MySQL, no full scans)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        if backend_name() == "sqlite":
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            sizes = {}
+            for (table,) in cursor.fetchall():
+                # Table names come from the catalog, not from user input.
+                cursor.execute(f"SELECT COUNT(*) FROM {table}")  # nosec B608
+                sizes[table] = cursor.fetchone()[0]
+            return sizes
+        cursor.execute(
+            "SELECT table_name, table_rows FROM information_schema.tables "
+            "WHERE table_schema = DATABASE()"
+        )
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _stream(rows_fn):
+    rows = rows_fn()
+    try:
+        return list(islice(rows, STREAM_SAMPLE))
+    finally:
+        rows.close()
+
+
+# name -> callable(fixtures) returning the query result
+BENCHMARKS = {
+    "generate_summary_report": lambda fx: queries.generate_summary_report(),
+    "get_low_stock": lambda fx: queries.get_low_stock(),
+    "get_products_by_warehouse": lambda fx: queries.get_products_by_warehouse(fx["warehouse"]),
+    "get_inventory_for_sku": lambda fx: queries.get_inventory_for_sku(fx["sku"]),
+    "get_inventory_for_forecast": lambda fx: queries.get_inventory_for_forecast(fx["sku"]),
+    "get_valid_origins_for_destination": lambda fx: queries.get_valid_origins_for_destination(
+        fx["hub"], fx["sku"]
+    ),
+    "suggest_cheapest_origin": lambda fx: queries.suggest_cheapest_origin(fx["sku"], fx["hub"]),
+    "get_locations": lambda fx: queries.get_locations(),
+    "get_shortest_route": lambda fx: queries.get_shortest_route(fx["warehouse"], fx["hub"]),
+    "get_orders_user": lambda fx: queries.get_orders(fx["customer"], role="User"),
+    "get_orders_page": lambda fx: queries.get_orders_page(),
+    "get_orders_page_pending": lambda fx: queries.get_orders_page(status="Pending"),
+    "get_orders_page_customer": lambda fx: queries.get_orders_page(customer=fx["customer"]),
+    "get_logistics_page": lambda fx: queries.get_logistics_page(),
+    "get_logistics_page_location": lambda fx: queries.get_logistics_page(
+        location=fx["warehouse"]
+    ),
+    "get_logs_page": lambda fx: queries.get_logs_page(),
+    "get_logs_page_user": lambda fx: queries.get_logs_page(user_id=fx["log_user"]),
+    "get_logs_page_search": lambda fx: queries.get_logs_page(search=fx["sku"]),
+    "get_forecast_gap_report_sku": lambda fx: queries.get_forecast_gap_report(sku=fx["sku"]),
+    "iter_logs_sample": lambda fx: _stream(queries.iter_logs),
+    "iter_orders_sample": lambda fx: _stream(queries.iter_orders),
+}
+
+
+def _row_count(result):
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict) and isinstance(result.get("rows"), list):
+        return len(result["rows"])
+    return 0 if result is None else 1
+
+
+def time_call(fn, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP):
+    """Call ``fn`` ``warmup + repeat`` times; returns latency stats of the timed calls in ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    samples.sort()
+    return {
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "rows": _row_count(result),
+    }
+
+
+def run_benchmarks(names=None, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP, progress=None):
+    """Run the selected benchmarks (all by default) and return a results document."""
+    names = list(names or BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    fixtures = _fixtures()
+    results = {}
+    with bypass_query_cache():
+        for name in names:
+            results[name] = time_call(lambda: BENCHMARKS[name](fixtures), repeat, warmup)
+            if progress:
+                progress(name, results[name])
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+            "warmup": warmup,
+            "python": platform.python_version(),
+            "fixtures": fixtures,
+            "dataset": _dataset_size(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, min_delta_ms=MIN_DELTA_MS):
+    """Compare two results documents by median latency.
+
+    Returns one dict per benchmark with ``baseline_ms``, ``current_ms``,
+    ``change`` (relative) and ``status``: "regression", "improvement", "ok",
+    "new" or "missing".
+    """
+    base = baseline["results"]
+    cur = current["results"]
+    report = []
+    for name in sorted(set(base) | set(cur)):
+        entry = {"name": name, "baseline_ms": None, "current_ms": None, "change": None}
+        if name not in base:
+            entry.update(current_ms=cur[name]["median_ms"], status="new")
+        elif name not in cur:
+            entry.update(baseline_ms=base[name]["median_ms"], status="missing")
+        else:
+            before = base[name]["median_ms"]
+            after = cur[name]["median_ms"]
+            change = (after - before) / before if before else 0.0
+            status = "ok"
+            if abs(after - before) >= min_delta_ms:
+                if change > threshold:
+                    status = "regression"
+                elif change < -threshold / (1 + threshold):
+                    status = "improvement"
+            entry.update(baseline_ms=before, current_ms=after, change=round(change, 4),
+                         status=status)
+        report.append(entry)
+    return report
+
+
+def save_results(results, path):
+    """Write a results document as JSON."""
+    with open(path, "w", encoding="utf-8") as fileobj:
+        json.dump(results, fileobj, indent=2, default=str)
+
+
+def load_results(path):
+    """Read a results document written by ``save_results``."""
+    with open(path, encoding="utf-8") as fileobj:
+        return json.load(fileobj)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark SCMS query functions.")
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--output", "-o", help="write results JSON here")
+    parser.add_argument("--baseline", "-b", help="compare against this results JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative median change counted as a regression")
+    parser.add_argument("--list", action="store_true", help="list benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    def progress(name, stats):
+        print(f"{name:<36} median {stats['median_ms']:>10.3f} ms  "
+              f"p95 {stats['p95_ms']:>10.3f} ms  rows {stats['rows']}")
+
+    names = args.only.split(",") if args.only else None
+    results = run_benchmarks(names, args.repeat, args.warmup, progress)
+    if args.output:
+        save_results(results, args.output)
+
+    if not args.baseline:
+        return 0
+    report = compare(load_results(args.baseline), results, args.threshold)
+    print()
+    for entry in report:
+        if entry["status"] == "ok":
+            continue
+        change = f"{entry['change']:+.1%}" if entry["change"] is not None else ""
+        print(f"{entry['status'].upper():<12} {entry['name']:<36} "
+              f"{entry['baseline_ms']} -> {entry['current_ms']} ms {change}")
+    regressions = sum(1 for e in report if e["status"] == "regression")
+    print(f"{regressions} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""Chunked bulk import of Products, Inventory and Routes from CSV.
+
+Rows are read and validated as a stream. Valid rows are written with one
+multi-row upsert per chunk, each chunk in its own transaction (retried on
+deadlock), so memory stays flat and a bad row only rejects itself. Existing
+keys are updated: products by SKU, inventory by (sku, location) with the
+quantity replaced, routes by (origin, destination). A single summary log
+entry is written at the end.
+
+``LOAD DATA LOCAL INFILE`` would need ``allow_local_infile`` on every pooled
+connection and ``local_infile`` on the server, and it cannot report
+row-level rejects, so multi-row upserts are used instead.
+
+Command line::
+
+    python -m db.bulk_import products catalog.csv
+    python -m db.bulk_import inventory stock.csv --chunk-size 5000 --rejects bad.csv
+
+CSV headers must include the required columns of the table (see ``IMPORTS``);
+column order and extra columns do not matter.
+"""
+
+import argparse
+import csv
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from db.cache import invalidate_tables
+from db.metrics import refresh_low_stock
+from db.queries import write_log
+from db.routing import invalidate_route_graph
+from db.session import run_in_transaction
+
+DEFAULT_CHUNK_SIZE = 1000
+# Rejects beyond this are counted but not kept.
+MAX_REJECTS = 1000
+
+
+def _text(row, column, max_length, required=True):
+    value = (row.get(column) or "").strip()
+    if required and not value:
+        raise ValueError(f"{column} is required")
+    if len(value) > max_length:
+        raise ValueError(f"{column} longer than {max_length} characters")
+    return value
+
+
+def _integer(row, column, default=None):
+    value = (row.get(column) or "").strip()
+    if not value:
+        if default is None:
+            raise ValueError(f"{column} is required")
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{column} must be a whole number") from None
+    if number < 0:
+        raise ValueError(f"{column} must not be negative")
+    return number
+
+
+def _decimal(row, column, limit, required=True):
+    value = (row.get(column) or "").strip()
+    if not value:
+        if required:
+            raise ValueError(f"{column} is required")
+        return None
+    try:
+        number = Decimal(value).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise ValueError(f"{column} must be a number") from None
+    if not 0 <= number < limit:
+        raise ValueError(f"{column} must be between 0 and {limit}")
+    return number
+
+
+def _product(row):
+    return (
+        _text(row, "sku", 20).upper(),
+        _text(row, "name", 100),
+        _text(row, "description", 65535, required=False),
+        _integer(row, "threshold", default=10),
+    )
+
+
+def _inventory(row):
+    return (
+        _text(row, "sku", 20).upper(),
+        _text(row, "location", 100),
+        _integer(row, "quantity"),
+    )
+
+
+def _route(row):
+    origin = _text(row, "origin", 100)
+    destination = _text(row, "destination", 100)
+    if origin == destination:
+        raise ValueError("origin and destination must differ")
+    return (
+        origin,
+        destination,
+        _decimal(row, "cost", Decimal("100000000")),
+        _decimal(row, "distance_km", Decimal("10000"), required=False),
+    )
+
+
+# name -> (table, required columns, row parser, upsert SQL)
+IMPORTS = {
+    "products": (
+        "Products",
+        ("sku", "name"),
+        _product,
+        "INSERT INTO Products (sku, name, description, threshold) VALUES (%s, %s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE name = VALUES(name), description = VALUES(description), "
+        "threshold = VALUES(threshold)",
+    ),
+    "inventory": (
+        "Inventory",
+        ("sku", "location", "quantity"),
+        _inventory,
+        "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE quantity = VALUES(quantity)",
+    ),
+    "routes": (
+        "Routes",
+        ("origin", "destination", "cost"),
+        _route,
+        "INSERT INTO Routes (origin, destination, cost, distance_km) VALUES (%s, %s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE cost = VALUES(cost), distance_km = VALUES(distance_km)",
+    ),
+}
+
+
+def _import(name):
+    if name not in IMPORTS:
+        raise ValueError(f"Unknown import '{name}'; choose from {', '.join(IMPORTS)}")
+    return IMPORTS[name]
+
+
+def _known_skus(cursor, skus):
+    # Only generated %s placeholders are interpolated into the SQL text.
+    cursor.execute(
+        f"SELECT sku FROM Products WHERE sku IN ({', '.join(['%s'] * len(skus))})",  # nosec B608
+        skus,
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _write_chunk(session, name, sql, chunk, reject):
+    """Upsert one chunk of ``(line, values)``; returns the number of rows written."""
+    cursor = session.cursor
+    if name == "inventory":
+        known = _known_skus(cursor, sorted({values[0] for _, values in chunk}))
+        for line, values in chunk:
+            if values[0] not in known:
+                reject(line, f"unknown sku {values[0]}")
+        chunk = [(line, values) for line, values in chunk if values[0] in known]
+    if not chunk:
+        return 0
+
+    cursor.executemany(sql, [values for _, values in chunk])
+    if name in ("products", "inventory"):
+        refresh_low_stock(cursor, sorted({values[0] for _, values in chunk}))
+    return len(chunk)
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def import_csv(name, fileobj, chunk_size=DEFAULT_CHUNK_SIZE, user_id=1, source=None,
+               progress=None):
+    """Import CSV rows from a text file object into the ``name`` table.
+
+    ``progress(rows_read, rows_imported)`` is called after every chunk.
+    Returns a report dict with ``rows``, ``imported``, ``rejected`` (count),
+    ``rejects`` (up to ``MAX_REJECTS`` ``(line, reason)`` pairs), ``seconds``
+    and ``rows_per_sec``. Raises ValueError when required columns are missing.
+    """
+    table, required, parse, sql = _import(name)
+    reader = csv.DictReader(fileobj)
+    header = [column.strip() for column in reader.fieldnames or []]
+    missing = [column for column in required if column not in header]
+    if missing:
+        raise ValueError(f"Missing column(s) for {name}: {', '.join(missing)}")
+    reader.fieldnames = header
+
+    report = {"table": table, "rows": 0, "imported": 0, "rejected": 0, "rejects": []}
+
+    def reject(line, reason):
+        report["rejected"] += 1
+        if len(report["rejects"]) < MAX_REJECTS:
+            report["rejects"].append((line, reason))
+
+    def parsed():
+        for row in reader:
+            report["rows"] += 1
+            try:
+                yield reader.line_num, parse(row)
+            except ValueError as e:
+                reject(reader.line_num, str(e))
+
+    def write(session, chunk):
+        # Rejects found while writing are only kept once the chunk commits.
+        found = []
+        written = _write_chunk(session, name, sql, chunk, lambda *r: found.append(r))
+        session.after_commit(lambda: [reject(*r) for r in found])
+        return written
+
+    start = time.perf_counter()
+    for chunk in _chunks(parsed(), chunk_size):
+        report["imported"] += run_in_transaction(lambda s, c=chunk: write(s, c))
+        invalidate_tables(table)
+        if progress:
+            progress(report["rows"], report["imported"])
+    if name == "routes":
+        invalidate_route_graph()
+
+    report["seconds"] = time.perf_counter() - start
+    report["rows_per_sec"] = (
+        report["imported"] / report["seconds"] if report["seconds"] else 0.0
+    )
+    write_log(
+        user_id,
+        f"Bulk imported {report['imported']} {table} rows from {source or 'CSV'} "
+        f"({report['rejected']} rejected)",
+    )
+    return report
+
+
+def import_file(name, path, chunk_size=DEFAULT_CHUNK_SIZE, user_id=1, progress=None):
+    """Import a CSV file by path; see ``import_csv``."""
+    with open(path, newline="", encoding="utf-8-sig") as fileobj:
+        return import_csv(name, fileobj, chunk_size, user_id, source=path, progress=progress)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Bulk import SCMS tables from CSV.")
+    parser.add_argument("table", choices=sorted(IMPORTS))
+    parser.add_argument("path", help="CSV file with a header row")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--rejects", help="write rejected lines and reasons to this CSV")
+    args = parser.parse_args(argv)
+
+    def progress(rows, imported):
+        print(f"\r{rows:,} read, {imported:,} imported", end="", file=sys.stderr)
+
+    report = import_file(args.table, args.path, args.chunk_size, progress=progress)
+    print(file=sys.stderr)
+    print(f"Imported {report['imported']:,} of {report['rows']:,} rows into "
+          f"{report['table']} in {report['seconds']:.1f}s "
+          f"({report['rows_per_sec']:,.0f} rows/s), {report['rejected']:,} rejected",
+          file=sys.stderr)
+    if args.rejects:
+        with open(args.rejects, "w", newline="", encoding="utf-8") as fileobj:
+            writer = csv.writer(fileobj)
+            writer.writerow(("line", "reason"))
+            writer.writerows(report["rejects"])
+    return 1 if report["rejected"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Process-wide, version-stamped cache for reference data and page reads.
+
+Every table has a version counter. A cached value remembers the versions of
+the tables it was read from. Mutating query functions call
+``invalidate_tables()`` once their write commits, which bumps those counters,
+so the next read reloads. A TTL fallback covers changes made by other
+processes or directly in MySQL.
+
+``cached_query(*tables)`` applies the same scheme to read functions, keyed
+on their arguments. Streamlit reruns the page script on every widget
+interaction. Because the cache is shared by all sessions in the server
+process, reruns are served from memory until one of the tables changes.
+Calls given a ``session`` bypass the cache, since they may need to see
+their transaction's uncommitted writes. Cached results are shared, so
+treat them as read-only. ``SCMS_QUERY_CACHE=false`` turns query caching off
+and ``bypass_query_cache()`` skips it for one block (e.g. benchmarks).
+"""
+
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ReferenceCache:
+    """Thread-safe cache whose entries expire on table-version bumps or TTL."""
+
+    def __init__(self, ttl=300.0, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}  # key -> (versions, expires_at, value), oldest first
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, table):
+        """Return the current version counter of ``table``."""
+        with self._lock:
+            return self._versions.get(table, 0)
+
+    def get(self, key, tables, loader, ttl=None):
+        """Return the cached value for ``key``, calling ``loader()`` on a miss."""
+        with self._lock:
+            versions = tuple(self._versions.get(t, 0) for t in tables)
+            entry = self._entries.get(key)
+            if entry and entry[0] == versions and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            # Only store if no write landed while we were loading.
+            if versions == tuple(self._versions.get(t, 0) for t in tables):
+                self._entries.pop(key, None)
+                self._entries[key] = (
+                    versions, time.monotonic() + (self.ttl if ttl is None else ttl), value
+                )
+                while len(self._entries) > self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+        return value
+
+    def invalidate(self, *tables):
+        """Bump the version of each table, expiring every entry read from it."""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def clear(self):
+        """Drop every entry and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and the number of cached entries."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "versions": dict(self._versions),
+            }
+
+
+reference_cache = ReferenceCache(
+    ttl=float(os.getenv("SCMS_CACHE_TTL", "300")),
+    max_entries=int(os.getenv("SCMS_CACHE_MAX_ENTRIES", "1024")),
+)
+# Page data changes more often than reference data, so other processes'
+# writes (which cannot bump our versions) should show up sooner.
+QUERY_CACHE_TTL = float(os.getenv("SCMS_QUERY_CACHE_TTL", "30"))
+_bypass = contextvars.ContextVar("scms_query_cache_bypass", default=False)
+
+
+def _query_cache_enabled():
+    return os.getenv("SCMS_QUERY_CACHE", "true").lower() != "false" and not _bypass.get()
+
+
+@contextmanager
+def bypass_query_cache():
+    """Make ``cached_query`` functions hit the database inside this block."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def invalidate_tables(*tables):
+    """Expire cached reference data read from any of ``tables``."""
+    reference_cache.invalidate(*tables)
+
+
+def cached_query(*tables, ttl=None):
+    """Cache a read function's result per argument set until ``tables`` change.
+
+    List results are copied on the way out so callers can sort or append
+    without touching the cached value.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        name = f"query:{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            if bound.arguments.get("session") is not None or not _query_cache_enabled():
+                return func(*args, **kwargs)
+            bound.apply_defaults()
+            key = (name, tuple(v for k, v in bound.arguments.items() if k != "session"))
+            value = reference_cache.get(
+                key, tables, lambda: func(*args, **kwargs),
+                ttl=QUERY_CACHE_TTL if ttl is None else ttl,
+            )
+            return list(value) if isinstance(value, list) else value
+
+        wrapper.tables = tables
+        return wrapper
+    return decorator
+
+
+def clear_cache():
+    """Drop every cached value (reference data and query results)."""
+    reference_cache.clear()
+
+
+def cache_stats():
+    """Return statistics for the process-wide reference cache."""
+    return reference_cache.stats()
@@ -1,10 +1,59 @@
-"""Database connection handler for SCMS, supporting both local and CI environments."""
+"""Database connection handler for SCMS, supporting both local and CI environments.
 
+Connections are served from a process-wide, thread-safe pool so that query
+functions borrow an existing MySQL session instead of paying a TCP connect and
+handshake on every call. Calling ``close()`` on a borrowed connection returns
+it to the pool.
+
+``SCMS_DB_BACKEND`` selects the database: ``mysql`` (default) or ``sqlite``
+for the embedded engine in ``db.sqlite_backend``, which needs no server.
+"""
+
+import logging
 import os
+import threading
+import time
+from collections import deque
+
 import mysql.connector
 
-def get_connection():
-    """Returns a MySQL connection based on environment (CI or local)."""
+from db import sqlite_backend
+from db.instrumentation import note_connection
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("mysql", "sqlite")
+
+
+def _env_int(name, default):
+    """Read an integer setting from the environment."""
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    """Read a float setting from the environment."""
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def backend_name():
+    """Return the configured database backend, ``mysql`` or ``sqlite``."""
+    backend = os.getenv("SCMS_DB_BACKEND", "mysql").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown SCMS_DB_BACKEND '{backend}'; choose from {', '.join(BACKENDS)}")
+    return backend
+
+
+def connect():
+    """Open a new, unpooled connection to the configured backend."""
+    if backend_name() == "sqlite":
+        return sqlite_backend.connect()
+    return connect_mysql()
+
+
+def connect_mysql():
+    """Open a new, unpooled MySQL connection based on environment (CI or local)."""
     is_ci = os.getenv("CI") == "true"
 
     if is_ci:
@@ -23,3 +72,251 @@ def get_connection():
         password="REPLACE_WITH_YOUR_LOCAL_SQL_PASSWORD",
         database="scms"
     )
+
+
+class PoolTimeoutError(ConnectionError):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class PooledConnection:
+    """A borrowed connection; ``close()`` hands it back to its pool."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise AttributeError(f"connection already returned to pool: {name}")
+        return getattr(raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Return the connection to the pool (idempotent)."""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw)
+
+    def discard(self):
+        """Close the underlying connection instead of returning it."""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw, broken=True)
+
+
+class ConnectionPool:
+    """Thread-safe pool of MySQL connections with overflow and health checks.
+
+    ``size`` connections are kept open; up to ``max_overflow`` extra ones may
+    be opened under load and are closed again when returned. Idle connections
+    older than ``idle_timeout`` seconds are recycled, and connections are
+    pinged on checkout when ``health_check`` is enabled.
+    """
+
+    def __init__(self, connect_fn=connect, size=5, max_overflow=10,
+                 idle_timeout=300.0, checkout_timeout=30.0, health_check=True):
+        self._connect = connect_fn
+        self.size = size
+        self.max_overflow = max_overflow
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check = health_check
+
+        self._idle = deque()  # (raw connection, returned_at)
+        self._open = 0
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._connects = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+
+    # ------------------------- checkout / return ------------------------- #
+    def acquire(self, timeout=None):
+        """Borrow a connection, waiting up to ``timeout`` seconds if exhausted."""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        while True:
+            raw = None
+            create = False
+            with self._cond:
+                while not self._idle and self._open >= self.size + self.max_overflow:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available after {timeout:.1f}s"
+                        )
+                    self._cond.wait(remaining)
+                if self._idle:
+                    raw, returned_at = self._idle.pop()
+                    if time.monotonic() - returned_at > self.idle_timeout:
+                        self._open -= 1
+                        self._close_quietly(raw)
+                        raw = None
+                        continue
+                else:
+                    self._open += 1
+                    create = True
+
+            if create:
+                try:
+                    raw = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._connects += 1
+            elif self.health_check and not self._is_alive(raw):
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                self._close_quietly(raw)
+                continue
+
+            waited = time.monotonic() - started
+            with self._cond:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            return PooledConnection(self, raw)
+
+    def release(self, raw, broken=False):
+        """Return a raw connection to the pool, resetting any open transaction."""
+        if not broken:
+            try:
+                if raw.in_transaction:
+                    raw.rollback()
+            except Exception:  # noqa: BLE001 - a failed reset means a dead session
+                broken = True
+
+        with self._cond:
+            if broken or len(self._idle) >= self.size:
+                self._open -= 1
+                self._cond.notify()
+            else:
+                self._idle.append((raw, time.monotonic()))
+                self._cond.notify()
+                return
+        self._close_quietly(raw)
+
+    # ------------------------- lifecycle ------------------------- #
+    def warm(self, count=None):
+        """Open connections up front so the first requests skip the handshake.
+
+        New connections are opened until ``count`` (default ``size``) are
+        open in total and parked idle. Returns the number opened.
+        """
+        count = self.size if count is None else min(count, self.size)
+        with self._cond:
+            # Reserve the slots first so concurrent checkouts cannot overshoot.
+            missing = max(count - self._open, 0)
+            self._open += missing
+        opened = 0
+        try:
+            for _ in range(missing):
+                raw = self._connect()
+                opened += 1
+                with self._cond:
+                    self._connects += 1
+                    self._idle.append((raw, time.monotonic()))
+                    self._cond.notify()
+        finally:
+            if opened < missing:
+                with self._cond:
+                    self._open -= missing - opened
+                    self._cond.notify_all()
+        return opened
+
+    def close_all(self):
+        """Close every idle connection; borrowed ones close when returned."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for raw, _ in idle:
+            self._close_quietly(raw)
+
+    def stats(self):
+        """Return a snapshot of pool usage, including checkout wait times."""
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                "checkouts": self._checkouts,
+                "connects": self._connects,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": (self._wait_total / self._checkouts * 1000)
+                if self._checkouts else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+            }
+
+    # ------------------------- helpers ------------------------- #
+    @staticmethod
+    def _is_alive(raw):
+        try:
+            return raw.is_connected()
+        except Exception:  # noqa: BLE001
+            return False
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:  # noqa: BLE001
+            logger.debug("Failed to close a discarded connection", exc_info=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, creating it from environment settings."""
+    global _pool  # pylint: disable=global-statement
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    size=_env_int("SCMS_POOL_SIZE", 5),
+                    max_overflow=_env_int("SCMS_POOL_MAX_OVERFLOW", 10),
+                    idle_timeout=_env_float("SCMS_POOL_IDLE_TIMEOUT", 300.0),
+                    checkout_timeout=_env_float("SCMS_POOL_CHECKOUT_TIMEOUT", 30.0),
+                    health_check=os.getenv("SCMS_POOL_HEALTH_CHECK", "true") != "false",
+                )
+    return _pool
+
+
+def get_connection():
+    """Borrow a database connection from the pool; ``close()`` returns it."""
+    note_connection()
+    return get_pool().acquire()
+
+
+def warm_pool():
+    """Pre-open the pool's base connections (called on app start)."""
+    return get_pool().warm()
+
+
+def pool_stats():
+    """Return usage statistics for the connection pool."""
+    return get_pool().stats()
+
+
+def close_pool():
+    """Close all idle pooled connections."""
+    get_pool().close_all()
@@ -0,0 +1,284 @@
+"""Deterministic synthetic dataset generator for load testing SCMS.
+
+The same ``seed`` and ``scale`` always produce the same rows, so benchmark
+runs on different machines or commits are comparable. Row streams are
+generated lazily and loaded in chunks with multi-row INSERTs, with unique
+and foreign-key checks switched off for the loading session. Memory stays
+flat even at the ``full`` scale (about 31M rows).
+
+Loading replaces everything except Users. Summary metrics are rebuilt and
+the in-process caches expired afterwards::
+
+    python -m db.datagen --scale small --seed 42
+    python -m db.datagen --scale full --chunk-size 20000
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+from db.cache import invalidate_tables
+from db.connection import get_connection
+from db.metrics import rebuild_metrics
+from db.routing import invalidate_route_graph
+
+SCALES = {
+    "tiny": {
+        "products": 200, "warehouses": 20, "hubs": 10, "inventory": 2_000,
+        "orders": 5_000, "logistics": 5_000, "logs": 20_000, "forecasts": 800,
+    },
+    "small": {
+        "products": 5_000, "warehouses": 100, "hubs": 40, "inventory": 50_000,
+        "orders": 250_000, "logistics": 250_000, "logs": 1_000_000, "forecasts": 20_000,
+    },
+    "full": {
+        "products": 100_000, "warehouses": 400, "hubs": 120, "inventory": 1_000_000,
+        "orders": 5_000_000, "logistics": 5_000_000, "logs": 20_000_000,
+        "forecasts": 400_000,
+    },
+}
+
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 10_000
+USER_IDS = (1, 2)
+ORDER_HISTORY_START = date(2024, 1, 1)
+ORDER_HISTORY_DAYS = 366
+
+# Load order respects foreign keys; TRUNCATE order is irrelevant with checks off.
+TABLES = ("Products", "Inventory", "Routes", "Orders", "Logistics", "DemandForecast", "Logs")
+
+INSERT_SQL = {
+    "Products": "INSERT INTO Products (sku, name, description, threshold) "
+                "VALUES (%s, %s, %s, %s)",
+    "Inventory": "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s)",
+    "Routes": "INSERT INTO Routes (origin, destination, cost, distance_km) "
+              "VALUES (%s, %s, %s, %s)",
+    "Orders": "INSERT INTO Orders "
+              "(sku, quantity, customer_name, customer_location, status, order_date) "
+              "VALUES (%s, %s, %s, %s, %s, %s)",
+    "Logistics": "INSERT INTO Logistics (sku, origin, destination, transport_cost) "
+                 "VALUES (%s, %s, %s, %s)",
+    "DemandForecast": "INSERT INTO DemandForecast (sku, forecast_value, forecast_date) "
+                      "VALUES (%s, %s, %s)",
+    "Logs": "INSERT INTO Logs (user_id, action) VALUES (%s, %s)",
+}
+
+_CATEGORIES = ("Laptop", "Smartphone", "Router", "Monitor", "Tablet", "Camera", "Speaker")
+
+
+def sku_name(index):
+    """Return the SKU code of the ``index``-th generated product."""
+    return f"SKU{index:06d}"
+
+
+def warehouse_name(index):
+    """Return the name of the ``index``-th generated warehouse."""
+    return f"Warehouse {index:03d}"
+
+
+def hub_name(index):
+    """Return the name of the ``index``-th generated retail hub."""
+    return f"Retail Hub {index}"
+
+
+def _skewed(rng, n):
+    """Pick an index in ``range(n)`` with a long-tailed popularity skew."""
+    return min(int(n * rng.random() ** 3), n - 1)
+
+
+class DatasetGenerator:
+    """Lazily produce the rows of every table for one seed and scale."""
+
+    def __init__(self, scale="small", seed=DEFAULT_SEED):
+        if scale not in SCALES:
+            raise ValueError(f"Unknown scale '{scale}'; choose from {', '.join(SCALES)}")
+        self.scale = scale
+        self.seed = seed
+        self.sizes = SCALES[scale]
+
+    def _rng(self, table):
+        # One independent stream per table, so tables can be generated separately.
+        # Seeded for reproducible test data, not for anything security related.
+        return random.Random(f"{self.seed}:{table}")  # nosec B311
+
+    def counts(self):
+        """Return the number of rows each table will get."""
+        sizes = self.sizes
+        return {
+            "Products": sizes["products"],
+            "Inventory": sizes["inventory"],
+            "Routes": sizes["warehouses"] * sizes["hubs"] + sizes["warehouses"] * 4,
+            "Orders": sizes["orders"],
+            "Logistics": sizes["logistics"],
+            "DemandForecast": sizes["forecasts"],
+            "Logs": sizes["logs"],
+        }
+
+    def rows(self, table):
+        """Return an iterator over the generated rows of ``table``."""
+        return getattr(self, f"_{table.lower()}")()
+
+    def _products(self):
+        rng = self._rng("Products")
+        for i in range(self.sizes["products"]):
+            category = rng.choice(_CATEGORIES)
+            yield (sku_name(i), f"{category} {i}", f"Synthetic {category.lower()} #{i}",
+                   rng.randint(5, 50))
+
+    def _inventory(self):
+        rng = self._rng("Inventory")
+        products = self.sizes["products"]
+        warehouses = self.sizes["warehouses"]
+        total = self.sizes["inventory"]
+        # Spread rows evenly over products; each product gets distinct warehouses.
+        per_product, extra = divmod(total, products)
+        for i in range(products):
+            count = min(per_product + (i < extra), warehouses)
+            for w in rng.sample(range(warehouses), count):
+                yield (sku_name(i), warehouse_name(w), rng.randint(0, 500))
+
+    def _routes(self):
+        rng = self._rng("Routes")
+        warehouses = self.sizes["warehouses"]
+        for w in range(warehouses):
+            for h in range(self.sizes["hubs"]):
+                distance = round(rng.uniform(2, 900), 2)
+                yield (warehouse_name(w), hub_name(h),
+                       round(distance * rng.uniform(0.8, 1.6), 2), distance)
+            # A sparse warehouse-to-warehouse ring for multi-hop routing.
+            for step in (1, 2, 3, 5):
+                distance = round(rng.uniform(10, 900), 2)
+                yield (warehouse_name(w), warehouse_name((w + step) % warehouses),
+                       round(distance * rng.uniform(0.5, 1.0), 2), distance)
+
+    def _orders(self):
+        rng = self._rng("Orders")
+        products = self.sizes["products"]
+        hubs = self.sizes["hubs"]
+        # One year of order history, ending where the generated forecasts start.
+        for _ in range(self.sizes["orders"]):
+            yield (sku_name(_skewed(rng, products)), rng.randint(1, 20),
+                   f"customer{rng.randrange(50_000)}", hub_name(rng.randrange(hubs)),
+                   "Pending" if rng.random() < 0.2 else "Processed",
+                   ORDER_HISTORY_START + timedelta(days=rng.randrange(ORDER_HISTORY_DAYS)))
+
+    def _logistics(self):
+        rng = self._rng("Logistics")
+        products = self.sizes["products"]
+        for _ in range(self.sizes["logistics"]):
+            yield (sku_name(_skewed(rng, products)),
+                   warehouse_name(rng.randrange(self.sizes["warehouses"])),
+                   hub_name(rng.randrange(self.sizes["hubs"])),
+                   round(rng.uniform(50, 20_000), 2))
+
+    def _demandforecast(self):
+        rng = self._rng("DemandForecast")
+        products = self.sizes["products"]
+        start = date(2025, 1, 1)
+        for i in range(self.sizes["forecasts"]):
+            yield (sku_name(i % products), rng.randint(10, 1_000),
+                   start + timedelta(days=7 * (i // products)))
+
+    def _logs(self):
+        rng = self._rng("Logs")
+        products = self.sizes["products"]
+        for i in range(self.sizes["logs"]):
+            sku = sku_name(_skewed(rng, products))
+            kind = rng.random()
+            if kind < 0.5:
+                action = (f"Moved {rng.randint(1, 20)} of {sku} from "
+                          f"{warehouse_name(rng.randrange(self.sizes['warehouses']))} to "
+                          f"{hub_name(rng.randrange(self.sizes['hubs']))}")
+            elif kind < 0.8:
+                action = f"Processed order #{i + 1}: {sku}"
+            else:
+                action = f"Updated inventory for {sku}"
+            yield (rng.choice(USER_IDS), action)
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def load_dataset(scale="small", seed=DEFAULT_SEED, chunk_size=DEFAULT_CHUNK_SIZE,
+                 tables=TABLES, progress=None):
+    """Replace the contents of ``tables`` (default: all) with a generated dataset.
+
+    Only the requested tables are truncated; Reports is cleared only when
+    every table is reloaded. ``progress(table, rows_loaded)`` is called
+    after every chunk. Returns
+    ``{table: (rows, seconds)}``.
+    """
+    generator = DatasetGenerator(scale, seed)
+    conn = get_connection()
+    cursor = conn.cursor()
+    timings = {}
+    try:
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        cursor.execute("SET SESSION unique_checks = 0")
+        for table in tables:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        if set(tables) >= set(TABLES):
+            cursor.execute("TRUNCATE TABLE Reports")
+        cursor.execute(
+            "INSERT IGNORE INTO Users (user_id, username, password, role) VALUES "
+            "(1, 'admin1', 'adminpass123', 'Admin'), (2, 'user1', 'userpass123', 'User')"
+        )
+        conn.commit()
+
+        for table in tables:
+            start = time.perf_counter()
+            loaded = 0
+            for chunk in _chunks(generator.rows(table), chunk_size):
+                cursor.executemany(INSERT_SQL[table], chunk)
+                conn.commit()
+                loaded += len(chunk)
+                if progress:
+                    progress(table, loaded)
+            timings[table] = (loaded, time.perf_counter() - start)
+
+        cursor.execute("SET SESSION foreign_key_checks = 1")
+        cursor.execute("SET SESSION unique_checks = 1")
+        rebuild_metrics(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        conn.discard()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    invalidate_tables(*tables, "SummaryMetrics")
+    invalidate_route_graph()
+    return timings
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Load a synthetic SCMS dataset.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    counts = DatasetGenerator(args.scale, args.seed).counts()
+
+    def progress(table, loaded):
+        print(f"\r{table}: {loaded:,}/{counts[table]:,}", end="", file=sys.stderr)
+
+    timings = load_dataset(args.scale, args.seed, args.chunk_size, progress=progress)
+    print(file=sys.stderr)
+    for table, (rows, seconds) in timings.items():
+        rate = rows / seconds if seconds else 0
+        print(f"{table:<15} {rows:>12,} rows {seconds:>8.1f}s {rate:>10,.0f} rows/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
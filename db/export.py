@@ -0,0 +1,161 @@
+"""Constant-memory CSV and Parquet export of the large SCMS tables.
+
+Rows come from the streaming ``iter_*`` query functions, so only one fetch
+batch is in memory at a time no matter how big the table is. Parquet output
+is written one row group per batch and needs the optional ``pyarrow``
+package.
+
+Command line::
+
+    python -m db.export logs --format csv --output logs.csv
+    python -m db.export logistics --format parquet --output logistics.parquet
+"""
+
+import argparse
+import csv
+import sys
+import tempfile
+
+from db.queries import (
+    STREAM_BATCH_SIZE, iter_forecast, iter_inventory, iter_logistics_records,
+    iter_logs, iter_orders
+)
+
+# name -> (row iterator, column names, pyarrow type names)
+EXPORTS = {
+    "inventory": (
+        iter_inventory,
+        ("inventory_id", "sku", "location", "quantity", "threshold", "name"),
+        ("int64", "string", "string", "int64", "int64", "string"),
+    ),
+    "orders": (
+        iter_orders,
+        ("order_id", "sku", "quantity", "customer_name", "customer_location", "status"),
+        ("int64", "string", "int64", "string", "string", "string"),
+    ),
+    "logistics": (
+        iter_logistics_records,
+        ("logistics_id", "sku", "origin", "destination", "transport_cost"),
+        ("int64", "string", "string", "string", "decimal"),
+    ),
+    "logs": (
+        iter_logs,
+        ("log_id", "user_id", "action"),
+        ("int64", "int64", "string"),
+    ),
+    "forecast": (
+        iter_forecast,
+        ("sku", "forecast_value", "forecast_date"),
+        ("string", "int64", "date"),
+    ),
+}
+FORMATS = ("csv", "parquet")
+
+
+def _export(table):
+    if table not in EXPORTS:
+        raise ValueError(f"Unknown export '{table}'; choose from {', '.join(EXPORTS)}")
+    return EXPORTS[table]
+
+
+def write_csv(table, fileobj, batch_size=STREAM_BATCH_SIZE):
+    """Stream ``table`` as CSV into a text file object; returns the row count."""
+    rows_fn, columns, _ = _export(table)
+    writer = csv.writer(fileobj)
+    writer.writerow(columns)
+    count = 0
+    for row in rows_fn(batch_size=batch_size):
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def _arrow_schema(pa, columns, types):
+    mapping = {
+        "int64": pa.int64(),
+        "string": pa.string(),
+        "decimal": pa.decimal128(10, 2),
+        "date": pa.date32(),
+    }
+    return pa.schema([(name, mapping[kind]) for name, kind in zip(columns, types)])
+
+
+def write_parquet(table, path_or_file, batch_size=STREAM_BATCH_SIZE):
+    """Stream ``table`` into a Parquet file, one row group per batch; returns the row count."""
+    try:
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise ImportError("Parquet export requires the 'pyarrow' package") from exc
+
+    rows_fn, columns, types = _export(table)
+    schema = _arrow_schema(pa, columns, types)
+    count = 0
+    with pq.ParquetWriter(path_or_file, schema) as writer:
+        batch = []
+        for row in rows_fn(batch_size=batch_size):
+            batch.append(row)
+            if len(batch) == batch_size:
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(col, type=t) for col, t in zip(zip(*batch), schema.types)],
+                    schema=schema,
+                ))
+                count += len(batch)
+                batch = []
+        if batch or not count:
+            arrays = list(zip(*batch)) or [[] for _ in columns]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=t) for col, t in zip(arrays, schema.types)],
+                schema=schema,
+            ))
+            count += len(batch)
+    return count
+
+
+def export_to_tempfile(table, fmt, batch_size=STREAM_BATCH_SIZE):
+    """Export ``table`` into a named temporary file; returns ``(file, row_count)``.
+
+    The returned binary file is positioned at the start and is deleted when
+    closed.
+    """
+    fileobj = tempfile.NamedTemporaryFile(suffix=f".{fmt}")  # pylint: disable=consider-using-with
+    try:
+        count = export_table(table, fmt, fileobj.name, batch_size)
+    except Exception:
+        fileobj.close()
+        raise
+    fileobj.seek(0)
+    return fileobj, count
+
+
+def export_table(table, fmt, output, batch_size=STREAM_BATCH_SIZE):
+    """Export ``table`` as ``fmt`` to a path (or ``-`` for stdout CSV); returns the row count."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'; choose from {', '.join(FORMATS)}")
+    if fmt == "parquet":
+        return write_parquet(table, output, batch_size)
+    if output == "-":
+        return write_csv(table, sys.stdout, batch_size)
+    with open(output, "w", newline="", encoding="utf-8") as fileobj:
+        return write_csv(table, fileobj, batch_size)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Export SCMS tables as CSV or Parquet.")
+    parser.add_argument("table", choices=sorted(EXPORTS))
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--output", "-o", default="-",
+                        help="output path ('-' writes CSV to stdout)")
+    parser.add_argument("--batch-size", type=int, default=STREAM_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    if args.format == "parquet" and args.output == "-":
+        parser.error("--output is required for parquet")
+
+    count = export_table(args.table, args.format, args.output, args.batch_size)
+    print(f"Exported {count} rows from {args.table}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""Vectorised statistical demand forecasting from order history.
+
+Order quantities are read with one grouped query per run and bucketed into
+a ``series x periods`` NumPy matrix. A series is one SKU, or one (SKU,
+customer location) pair with ``by_location``. Every model then updates all
+series at once, with one array operation per period, instead of looping
+over SKUs:
+
+* ``moving_average`` - mean of the last ``window`` periods,
+* ``ses`` - simple exponential smoothing with ``alpha``,
+* ``croston`` - Croston's method for intermittent demand: demand sizes and
+  the intervals between demands are smoothed separately and the forecast is
+  their ratio.
+
+Each model produces a flat per-period rate. ``generate_forecasts`` writes
+it as DemandForecast rows for the next ``horizon`` periods (location series
+are summed per SKU) with chunked multi-row inserts, replacing only the
+existing forecasts for the same SKU and date. ``backtest`` holds out
+the most recent periods, fits on the rest and reports MAE, RMSE, WAPE and
+bias for every model::
+
+    python -m db.forecasting backtest --holdout 8
+    python -m db.forecasting generate --model croston --horizon 4 --period week
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+import numpy as np
+
+from db.cache import invalidate_tables
+from db.connection import get_connection
+from db.session import run_in_transaction
+
+# period name -> length in days
+PERIODS = {"day": 1, "week": 7, "month": 30}
+DEFAULT_PERIODS = 52
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def moving_average(history, window=4):
+    """Return the mean of the last ``window`` periods of every series."""
+    return history[:, -window:].mean(axis=1)
+
+
+def ses(history, alpha=0.3):
+    """Return the simple exponential smoothing level of every series."""
+    level = history[:, 0].astype(float)
+    for t in range(1, history.shape[1]):
+        level += alpha * (history[:, t] - level)
+    return level
+
+
+def croston(history, alpha=0.1):
+    """Return Croston's demand-per-period estimate of every series.
+
+    Series without any demand forecast zero.
+    """
+    size = np.zeros(history.shape[0])
+    interval = np.zeros(history.shape[0])
+    since = np.ones(history.shape[0])  # periods since the last demand
+    seen = np.zeros(history.shape[0], dtype=bool)
+    for t in range(history.shape[1]):
+        demand = history[:, t]
+        hit = demand > 0
+        # The first demand initialises both estimates; later ones smooth them.
+        size = np.where(hit, np.where(seen, size + alpha * (demand - size), demand), size)
+        interval = np.where(
+            hit, np.where(seen, interval + alpha * (since - interval), since), interval
+        )
+        since = np.where(hit, 1, since + 1)
+        seen |= hit
+    return np.divide(size, interval, out=np.zeros_like(size), where=seen)
+
+
+MODELS = {"moving_average": moving_average, "ses": ses, "croston": croston}
+
+
+def _model(name):
+    if name not in MODELS:
+        raise ValueError(f"Unknown model '{name}'; choose from {', '.join(MODELS)}")
+    return MODELS[name]
+
+
+def _period_days(period):
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period '{period}'; choose from {', '.join(PERIODS)}")
+    return PERIODS[period]
+
+
+def load_history(periods=DEFAULT_PERIODS, period="week", end=None, by_location=False):
+    """Return ``(keys, history, start)`` for the ``periods`` periods ending on ``end``.
+
+    ``keys`` lists the series (SKU strings, or ``(sku, location)`` pairs with
+    ``by_location``) and ``history[i, t]`` is the quantity ordered for
+    series ``i`` in period ``t``. The last period ends on ``end`` (default
+    today) and ``start`` is the first day of period 0.
+    """
+    days = _period_days(period)
+    if periods < 1:
+        raise ValueError("periods must be at least 1")
+    end = end or date.today()
+    start = end - timedelta(days=periods * days - 1)
+    columns = "sku, customer_location" if by_location else "sku"
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        # ``columns`` is one of two constant column lists.
+        cursor.execute(f"""
+            SELECT {columns}, order_date, SUM(quantity)
+            FROM Orders
+            WHERE order_date BETWEEN %s AND %s
+            GROUP BY {columns}, order_date
+        """, (start, end))  # nosec B608
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    index = {}
+    series = np.empty(len(rows), dtype=np.int64)
+    for i, row in enumerate(rows):
+        series[i] = index.setdefault(row[:-2] if by_location else row[0], len(index))
+    if rows:
+        dates = np.array([row[-2] for row in rows], dtype="datetime64[D]")
+        buckets = (dates - np.datetime64(start, "D")).astype(np.int64) // days
+        quantities = np.array([row[-1] for row in rows], dtype=float)
+    else:
+        buckets = quantities = np.empty(0)
+    history = np.zeros((len(index), periods))
+    np.add.at(history, (series, buckets.astype(np.int64)), quantities)
+    return list(index), history, start
+
+
+def _accuracy(actual, forecast):
+    """Return MAE, RMSE, WAPE and bias of flat ``forecast`` rates against ``actual``."""
+    errors = forecast[:, None] - actual
+    total = actual.sum()
+    return {
+        "mae": float(np.abs(errors).mean()) if errors.size else 0.0,
+        "rmse": float(np.sqrt((errors ** 2).mean())) if errors.size else 0.0,
+        "wape": float(np.abs(errors).sum() / total) if total else 0.0,
+        "bias": float(errors.sum() / total) if total else 0.0,
+    }
+
+
+def backtest(holdout=8, periods=DEFAULT_PERIODS, period="week", end=None, by_location=False,
+             models=tuple(MODELS), params=None):
+    """Fit every model on all but the last ``holdout`` periods and score it on them.
+
+    ``params`` maps a model name to keyword arguments for it. Returns
+    ``{"series": n, "periods": n, "holdout": n, "models": {name: metrics},
+    "seconds": s}`` where metrics are ``mae``, ``rmse``, ``wape`` and
+    ``bias`` (positive = over-forecast) over every series and held-out
+    period.
+    """
+    if not 0 < holdout < periods:
+        raise ValueError("holdout must be between 1 and periods - 1")
+    params = params or {}
+    started = time.perf_counter()
+    keys, history, _ = load_history(periods, period, end, by_location)
+    train, actual = history[:, :-holdout], history[:, -holdout:]
+    scores = {
+        name: _accuracy(actual, _model(name)(train, **params.get(name, {})))
+        for name in models
+    }
+    return {
+        "series": len(keys),
+        "periods": periods,
+        "holdout": holdout,
+        "models": scores,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def generate_forecasts(model="ses", horizon=4, periods=DEFAULT_PERIODS, period="week",
+                       end=None, by_location=False, params=None, write=True, user_id=1,
+                       chunk_size=DEFAULT_CHUNK_SIZE):
+    """Forecast every SKU for the ``horizon`` periods after ``end`` and store the result.
+
+    One DemandForecast row is produced per SKU and future period, dated on
+    the period's first day, with the model's per-period rate rounded to
+    whole units. Zero forecasts are skipped. With ``write`` the rows are
+    stored in one transaction, replacing any forecast for the same SKU and
+    date; forecasts for other SKUs, including hand-entered ones and SKUs
+    whose forecast rounds to zero, are left alone. Returns
+    ``{"series": n, "rows": [(sku, value, date), ...], "seconds": s}``.
+    """
+    fit = _model(model)
+    if horizon < 1:
+        raise ValueError("horizon must be at least 1")
+    days = _period_days(period)
+    started = time.perf_counter()
+    end = end or date.today()
+    keys, history, _ = load_history(periods, period, end, by_location)
+    rates = fit(history, **(params or {})) if keys else np.empty(0)
+
+    if by_location:
+        skus = sorted({sku for sku, _ in keys})
+        position = {sku: i for i, sku in enumerate(skus)}
+        rates = np.bincount(
+            [position[sku] for sku, _ in keys], weights=rates, minlength=len(skus)
+        )
+    else:
+        skus = keys
+    values = np.rint(rates).astype(np.int64)
+    dates = [end + timedelta(days=days * step + 1) for step in range(horizon)]
+    rows = [
+        (sku, int(value), forecast_date)
+        for sku, value in zip(skus, values) if value > 0
+        for forecast_date in dates
+    ]
+
+    if write:
+        def store(session):
+            cursor = session.cursor
+            date_marks = ", ".join(["%s"] * len(dates))
+            # Every SKU has a row on every date, so whole SKUs per chunk let one
+            # set-based DELETE remove exactly the (sku, date) pairs being replaced.
+            for chunk in _chunks(rows, max(chunk_size // horizon, 1) * horizon):
+                chunk_skus = list(dict.fromkeys(sku for sku, _, _ in chunk))
+                cursor.execute(
+                    "DELETE FROM DemandForecast "  # nosec B608
+                    f"WHERE forecast_date IN ({date_marks}) "
+                    f"AND sku IN ({', '.join(['%s'] * len(chunk_skus))})",
+                    [*dates, *chunk_skus],
+                )
+                cursor.executemany(
+                    "INSERT INTO DemandForecast (sku, forecast_value, forecast_date) "
+                    "VALUES (%s, %s, %s)",
+                    chunk,
+                )
+            session.log(
+                user_id,
+                f"Generated {len(rows)} {model} forecasts for {len(skus)} SKUs, "
+                f"{horizon} {period}(s) from {dates[0]}",
+            )
+            session.after_commit(lambda: invalidate_tables("DemandForecast"))
+
+        run_in_transaction(store)
+    return {"series": len(keys), "rows": rows, "seconds": time.perf_counter() - started}
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Forecast SCMS demand from order history.")
+    parser.add_argument("command", choices=("generate", "backtest"))
+    parser.add_argument("--model", choices=sorted(MODELS), default="ses")
+    parser.add_argument("--horizon", type=int, default=4, help="periods to forecast")
+    parser.add_argument("--holdout", type=int, default=8, help="periods held out to score")
+    parser.add_argument("--period", choices=sorted(PERIODS), default="week")
+    parser.add_argument("--periods", type=int, default=DEFAULT_PERIODS,
+                        help="periods of history to fit on")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day of history")
+    parser.add_argument("--by-location", action="store_true",
+                        help="fit one series per SKU and customer location")
+    parser.add_argument("--dry-run", action="store_true", help="do not store forecasts")
+    args = parser.parse_args(argv)
+
+    if args.command == "backtest":
+        report = backtest(args.holdout, args.periods, args.period, args.end, args.by_location)
+        print(f"{report['series']:,} series, {report['periods'] - report['holdout']} "
+              f"{args.period}s fitted, {report['holdout']} held out "
+              f"({report['seconds']:.2f}s)")
+        for name, metrics in report["models"].items():
+            print(f"  {name:<15} MAE {metrics['mae']:.3f}  RMSE {metrics['rmse']:.3f}  "
+                  f"WAPE {metrics['wape']:.1%}  bias {metrics['bias']:+.1%}")
+        return 0
+
+    report = generate_forecasts(
+        args.model, args.horizon, args.periods, args.period, args.end, args.by_location,
+        write=not args.dry_run,
+    )
+    action = "Computed" if args.dry_run else "Stored"
+    print(f"{action} {len(report['rows']):,} forecasts from {report['series']:,} series "
+          f"in {report['seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Set-based batch fulfillment of pending customer orders.
+
+Instead of one ``move_order_to_customer`` transaction per order, pending
+orders are processed in chunks. Each chunk is one transaction that:
+
+1. locks the chunk's pending orders together with every warehouse row that
+   could serve them (Orders joined to Routes and Inventory, one query),
+2. picks the cheapest origin with enough remaining stock for each order,
+   tracking stock already promised to earlier orders in the chunk, and
+3. applies all inventory decrements and increments, Logistics inserts,
+   status updates, summary metrics and audit logs with a handful of
+   multi-row statements (``write_shipments``, shared with the allocation
+   solver).
+"""
+
+from db.cache import invalidate_tables
+from db.metrics import record_metrics
+from db.session import run_in_transaction, transaction
+
+DEFAULT_CHUNK_SIZE = 500
+# Rows per derived-table UPDATE; SQLite allows at most 500 UNION ALL terms.
+DECREMENT_BATCH = 500
+
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def get_pending_order_ids(cursor, limit=None):
+    """Return the ids of all pending orders, oldest first."""
+    sql = "SELECT order_id FROM Orders WHERE status = 'Pending' ORDER BY order_id"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    cursor.execute(sql)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _lock_chunk(cursor, order_ids):
+    """Lock the chunk's pending orders and return them plus their candidate origins."""
+    # Only generated %s placeholders are interpolated into the SQL text.
+    cursor.execute(f"""
+        SELECT order_id, sku, quantity, customer_location
+        FROM Orders
+        WHERE order_id IN ({_placeholders(order_ids)}) AND status = 'Pending'
+        ORDER BY order_id
+        FOR UPDATE
+    """, order_ids)  # nosec B608
+    orders = cursor.fetchall()
+    if not orders:
+        return [], {}
+
+    cursor.execute(f"""
+        SELECT o.order_id, i.location, r.cost, i.quantity
+        FROM Orders o
+        JOIN Routes r ON r.destination = o.customer_location
+        JOIN Inventory i ON i.location = r.origin AND i.sku = o.sku
+        WHERE o.order_id IN ({_placeholders(order_ids)})
+          AND i.quantity > 0 AND i.location NOT LIKE 'Retail Hub%'
+        ORDER BY i.sku, i.location
+        FOR UPDATE
+    """, [o[0] for o in orders])  # nosec B608
+
+    candidates = {}
+    for order_id, location, cost, available in cursor.fetchall():
+        candidates.setdefault(order_id, []).append((cost, location, available))
+    return orders, candidates
+
+
+def _allocate(orders, candidates):
+    """Greedily assign each order the cheapest origin that still has stock."""
+    remaining = {}
+    for order_id, sku, _, _ in orders:
+        for _, location, available in candidates.get(order_id, []):
+            remaining.setdefault((sku, location), available)
+
+    results = []
+    for order_id, sku, quantity, destination in orders:
+        result = {
+            "order_id": order_id,
+            "sku": sku,
+            "quantity": quantity,
+            "destination": destination,
+            "origin": None,
+            "cost": None,
+            "status": "Skipped",
+            "reason": None,
+        }
+        options = sorted(candidates.get(order_id, []))
+        if not options:
+            result["reason"] = "No route from a stocked warehouse"
+        else:
+            for cost, location, _ in options:
+                if remaining[(sku, location)] >= quantity:
+                    remaining[(sku, location)] -= quantity
+                    result.update(
+                        origin=location, cost=cost * quantity, status="Processed"
+                    )
+                    break
+            else:
+                result["reason"] = "No warehouse has enough stock"
+        results.append(result)
+    return results
+
+
+def write_shipments(session, shipments, order_ids, log_entries, user_id=1):
+    """Apply shipments and mark orders Processed with set-based statements.
+
+    ``shipments`` holds ``(sku, origin, destination, quantity, cost)`` tuples.
+    Origin stock is decremented with one UPDATE joined to a derived table
+    per ``DECREMENT_BATCH`` origin rows, destination stock is upserted and
+    Logistics rows inserted with multi-row INSERTs, and all ``order_ids``
+    are updated with a single IN-list (empty for plain stock transfers).
+    """
+    cursor = session.cursor
+
+    decrements = {}
+    increments = {}
+    for sku, origin, destination, quantity, _ in shipments:
+        decrements[(sku, origin)] = decrements.get((sku, origin), 0) + quantity
+        increments[(sku, destination)] = increments.get((sku, destination), 0) + quantity
+
+    rows = list(decrements.items())
+    for start in range(0, len(rows), DECREMENT_BATCH):
+        batch = rows[start:start + DECREMENT_BATCH]
+        derived = " UNION ALL ".join(
+            ["SELECT %s AS sku, %s AS location, %s AS qty"] * len(batch)
+        )
+        # The derived table is built from placeholders only.
+        cursor.execute(f"""
+            UPDATE Inventory i
+            JOIN ({derived}) d ON i.sku = d.sku AND i.location = d.location
+            SET i.quantity = i.quantity - d.qty
+        """, [v for (sku, loc), qty in batch for v in (sku, loc, qty)])  # nosec B608
+
+    cursor.executemany(
+        "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)",
+        [(sku, loc, qty) for (sku, loc), qty in increments.items()],
+    )
+
+    cursor.executemany(
+        "INSERT INTO Logistics (sku, origin, destination, transport_cost) "
+        "VALUES (%s, %s, %s, %s)",
+        [(sku, origin, destination, cost) for sku, origin, destination, _, cost in shipments],
+    )
+
+    order_ids = list(order_ids)
+    if order_ids:
+        # Only generated %s placeholders are interpolated into the SQL text.
+        cursor.execute(
+            "UPDATE Orders SET status = 'Processed' "
+            f"WHERE order_id IN ({_placeholders(order_ids)})",  # nosec B608
+            order_ids,
+        )
+
+    record_metrics(
+        cursor, session,
+        skus=[sku for sku, _ in decrements],
+        processed_orders=len(order_ids),
+        total_logistics_cost=sum(cost for *_, cost in shipments),
+    )
+
+    for action in log_entries:
+        session.log(user_id, action)
+    session.after_commit(lambda: invalidate_tables("Inventory", "Orders", "Logistics"))
+
+
+def fulfill_pending_orders(order_ids=None, chunk_size=DEFAULT_CHUNK_SIZE, user_id=1):
+    """Fulfil a batch of pending orders (all of them by default).
+
+    Each chunk of ``chunk_size`` orders is committed as one transaction,
+    retried from the start on a deadlock or lock wait timeout.
+    Returns one result dict per order with its chosen ``origin``, total
+    ``cost`` and ``status`` ("Processed" or "Skipped" with a ``reason``).
+    Orders that are not pending are left out of the report.
+    """
+    if order_ids is None:
+        with transaction() as session:
+            order_ids = get_pending_order_ids(session.cursor)
+    else:
+        order_ids = list(order_ids)
+
+    report = []
+    for start in range(0, len(order_ids), chunk_size):
+        chunk = order_ids[start:start + chunk_size]
+
+        def process(session, chunk=chunk):
+            orders, candidates = _lock_chunk(session.cursor, chunk)
+            results = _allocate(orders, candidates)
+            fulfilled = [r for r in results if r["status"] == "Processed"]
+            if fulfilled:
+                write_shipments(
+                    session,
+                    [(r["sku"], r["origin"], r["destination"], r["quantity"], r["cost"])
+                     for r in fulfilled],
+                    [r["order_id"] for r in fulfilled],
+                    [f"Processed order #{r['order_id']}: {r['quantity']} units of {r['sku']} "
+                     f"from {r['origin']} to {r['destination']} (₹{r['cost']:.2f})"
+                     for r in fulfilled],
+                    user_id,
+                )
+            return results
+
+        report.extend(run_in_transaction(process))
+    return report
+
+
+def summarize_report(report):
+    """Return processed/skipped counts and total cost for a fulfillment report."""
+    processed = [r for r in report if r["status"] == "Processed"]
+    return {
+        "processed": len(processed),
+        "skipped": len(report) - len(processed),
+        "total_cost": sum(r["cost"] for r in processed),
+    }
@@ -0,0 +1,266 @@
+"""Low-overhead per-query instrumentation for ``db.queries``.
+
+Every public function in ``db.queries`` is wrapped when that module is
+imported (``instrument_module``). Each call records, under a
+``(function, page)`` key:
+
+* call and error counts,
+* a latency histogram with fixed log-spaced buckets, from which
+  p50/p95/p99 are read without storing individual samples,
+* rows returned (list length, ``rows`` of a page dict, or streamed rows),
+* pooled connections checked out directly by the call.
+
+Pages tag themselves with ``set_page("Reports")``. Recording a call costs
+two clock reads, a bisect and one short lock hold, so it can stay enabled
+in production. Set ``SCMS_INSTRUMENTATION=false`` to skip the wrapping
+entirely.
+"""
+
+import bisect
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+DEFAULT_PAGE = "-"
+
+# Bucket upper bounds in ms: 0.05 ms .. ~2 min, each 25 % wider than the last.
+BUCKET_BOUNDS_MS = tuple(0.05 * 1.25 ** i for i in range(67))
+
+_page = contextvars.ContextVar("scms_page", default=DEFAULT_PAGE)
+_frame = contextvars.ContextVar("scms_query_frame", default=None)
+
+
+def _enabled():
+    return os.getenv("SCMS_INSTRUMENTATION", "true").lower() != "false"
+
+
+class _Stats:
+    """Accumulated measurements for one (function, page) pair."""
+
+    __slots__ = ("calls", "errors", "rows", "connections", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.connections = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given fraction of calls."""
+        if not self.calls:
+            return 0.0
+        rank = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                if index < len(BUCKET_BOUNDS_MS):
+                    return min(BUCKET_BOUNDS_MS[index], self.max_ms)
+                break
+        return self.max_ms
+
+
+class QueryMetrics:
+    """Thread-safe registry of per-function, per-page query statistics."""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(self, function, page, elapsed_ms, rows=0, connections=0, error=False):
+        """Add one call's measurements."""
+        index = bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)
+        with self._lock:
+            stats = self._stats.get((function, page))
+            if stats is None:
+                stats = self._stats[(function, page)] = _Stats()
+            stats.calls += 1
+            stats.errors += error
+            stats.rows += rows
+            stats.connections += connections
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.buckets[index] += 1
+
+    def snapshot(self, page=None):
+        """Return one summary dict per (function, page), slowest total time first."""
+        with self._lock:
+            items = [
+                (key, stats) for key, stats in self._stats.items()
+                if page is None or key[1] == page
+            ]
+            summary = [
+                {
+                    "function": function,
+                    "page": key_page,
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "rows": stats.rows,
+                    "connections": stats.connections,
+                    "total_ms": round(stats.total_ms, 3),
+                    "mean_ms": round(stats.total_ms / stats.calls, 3),
+                    "p50_ms": round(stats.percentile(0.50), 3),
+                    "p95_ms": round(stats.percentile(0.95), 3),
+                    "p99_ms": round(stats.percentile(0.99), 3),
+                    "max_ms": round(stats.max_ms, 3),
+                }
+                for (function, key_page), stats in items
+            ]
+        summary.sort(key=lambda s: s["total_ms"], reverse=True)
+        return summary
+
+    def pages(self):
+        """Return the page tags seen so far."""
+        with self._lock:
+            return sorted({page for _, page in self._stats})
+
+    def reset(self):
+        """Drop all recorded statistics."""
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.time()
+
+    def to_json(self, page=None):
+        """Return the snapshot as a JSON document."""
+        return json.dumps({
+            "started_at": self.started_at,
+            "exported_at": time.time(),
+            "queries": self.snapshot(page),
+        }, indent=2)
+
+
+query_metrics = QueryMetrics()
+
+
+def set_page(name):
+    """Tag subsequent query calls in this thread/context with a page name."""
+    _page.set(name)
+
+
+@contextmanager
+def page_context(name):
+    """Tag query calls made inside the block with a page name."""
+    token = _page.set(name)
+    try:
+        yield
+    finally:
+        _page.reset(token)
+
+
+def current_page():
+    """Return the page tag of the current context."""
+    return _page.get()
+
+
+def note_connection():
+    """Count a pooled connection checkout against the innermost running query."""
+    frame = _frame.get()
+    if frame is not None:
+        frame[0] += 1
+
+
+def _row_count(result):
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict) and isinstance(result.get("rows"), list):
+        return len(result["rows"])
+    return 1
+
+
+def _instrumented_rows(gen, name, page, start, frame):
+    """Re-yield a streaming result, recording once the stream ends or is closed."""
+    rows = 0
+    error = False
+    try:
+        while True:
+            token = _frame.set(frame)
+            try:
+                row = next(gen)
+            except StopIteration:
+                return
+            finally:
+                _frame.reset(token)
+            rows += 1
+            yield row
+    except Exception:
+        error = True
+        raise
+    finally:
+        gen.close()
+        query_metrics.record(
+            name, page, (time.perf_counter() - start) * 1000.0, rows, frame[0], error
+        )
+
+
+def instrument(func, name=None):
+    """Wrap ``func`` so each call is timed and recorded in ``query_metrics``."""
+    name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        outer = _frame.get()
+        if outer is not None and outer[1] == name:
+            return func(*args, **kwargs)  # self-recursion, e.g. opening a transaction
+        page = _page.get()
+        frame = [0, name]
+        token = _frame.set(frame)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            query_metrics.record(
+                name, page, (time.perf_counter() - start) * 1000.0, 0, frame[0], True
+            )
+            raise
+        finally:
+            _frame.reset(token)
+        if isinstance(result, types.GeneratorType):
+            return _instrumented_rows(result, name, page, start, frame)
+        query_metrics.record(
+            name, page, (time.perf_counter() - start) * 1000.0, _row_count(result), frame[0]
+        )
+        return result
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def instrument_module(module):
+    """Replace every public function defined in ``module`` with an instrumented wrapper."""
+    if not _enabled():
+        return
+    for attr, value in list(vars(module).items()):
+        if (
+            inspect.isfunction(value)
+            and not attr.startswith("_")
+            and value.__module__ == module.__name__
+            and not getattr(value, "__instrumented__", False)
+        ):
+            setattr(module, attr, instrument(value))
+
+
+def query_stats(page=None):
+    """Return per-query statistics, optionally for one page."""
+    return query_metrics.snapshot(page)
+
+
+def export_query_stats_json(page=None):
+    """Return per-query statistics as JSON."""
+    return query_metrics.to_json(page)
+
+
+def reset_query_stats():
+    """Clear all per-query statistics."""
+    query_metrics.reset()
@@ -0,0 +1,418 @@
+"""Concurrent workload driver for order placement and fulfillment.
+
+``N`` workers (threads, or spawned processes with their own connection
+pools) run against the configured MySQL database for a fixed duration or
+operation count. Each operation either
+
+* places an order (``place_order``) for a SKU drawn from a Zipf-like
+  distribution (``skew`` 0 = uniform, higher = hotter top SKUs), or
+* fulfils one of the worker's own pending orders the way the Logistics
+  Simulator does: ``suggest_cheapest_origin`` and then, in one
+  transaction, ``move_order_to_customer`` and ``update_order_status``.
+
+The report covers throughput, latency percentiles of the successful
+operations, deadlocks (1213) and lock-wait timeouts (1205) that survived
+the transaction retries, the number of retries, and other errors. It also
+checks these invariants against before/after snapshots:
+
+* no inventory row is negative,
+* moves conserve each SKU's total units across all locations,
+* retail hub stock grew by exactly the units fulfilled,
+* placed/processed order counts and Logistics rows match the successes,
+* the incrementally maintained summary metrics did not drift.
+
+Thread mode shares one connection pool, so size it for the worker count
+(``SCMS_POOL_SIZE``/``SCMS_POOL_MAX_OVERFLOW``)::
+
+    SCMS_POOL_SIZE=16 python -m db.loadtest --workers 16 --duration 30 --skew 1.2
+    python -m db.loadtest --mode process --workers 8 --operations 2000 --json load.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import accumulate
+
+import mysql.connector
+
+from db.cache import invalidate_tables
+from db.connection import backend_name, get_connection, get_pool
+from db.log_writer import FLUSH_TIMEOUT as LOG_FLUSH_TIMEOUT, flush_logs
+from db.metrics import reconcile_summary_metrics, refresh_low_stock
+from db.queries import (
+    get_customer_locations, move_order_to_customer, place_order,
+    run_in_transaction, suggest_cheapest_origin, update_order_status
+)
+from db.sqlite_backend import database_path
+
+OPERATIONS = ("place", "fulfill")
+DEADLOCK = 1213
+LOCK_WAIT_TIMEOUT = 1205
+
+
+def zipf_weights(count, skew):
+    """Return cumulative weights where rank ``r`` has weight ``1 / r ** skew``."""
+    return list(accumulate(1.0 / (rank ** skew) for rank in range(1, count + 1)))
+
+
+def percentile(samples, fraction):
+    """Return the nearest-rank percentile of sorted ``samples`` (0 when empty)."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))]
+
+
+def _classify(error):
+    if error.errno == DEADLOCK:
+        return "deadlocks"
+    if error.errno == LOCK_WAIT_TIMEOUT:
+        return "lock_waits"
+    return "errors"
+
+
+def _ship(session, order, origin):
+    order_id, sku, quantity, hub = order
+    move_order_to_customer(order_id, sku, quantity, origin, hub, session=session)
+    update_order_status(order_id, "Processed", session=session)
+
+
+def _fulfil(order, on_retry=None):
+    """Fulfil one order from its cheapest stocked origin in a single transaction."""
+    _, sku, quantity, hub = order
+    suggestion = suggest_cheapest_origin(sku, hub)
+    if suggestion is None:
+        raise ValueError("No stocked origin")
+    run_in_transaction(lambda s: _ship(s, order, suggestion["origin"]), on_retry=on_retry)
+    return quantity
+
+
+def _worker(config):
+    """Run one worker's operation loop; returns its counters and latency samples."""
+    # Seeded workload generator, not used for anything security related.
+    rng = random.Random(f"{config['seed']}:{config['index']}")  # nosec B311
+    skus, hubs = config["skus"], config["hubs"]
+    customer = f"{config['customer_prefix']}-w{config['index']}"
+    result = {
+        "latency_ms": {op: [] for op in OPERATIONS},
+        "ok": dict.fromkeys(OPERATIONS, 0),
+        "unfillable": 0, "deadlocks": 0, "lock_waits": 0, "errors": 0, "retries": 0,
+        "units_fulfilled": 0, "error_samples": [],
+    }
+    pending = []
+    remaining = config["operations"]
+
+    def count_retry(_error, _attempt):
+        result["retries"] += 1
+
+    deadline = time.monotonic() + config["duration"]
+
+    while time.monotonic() < deadline and (remaining is None or remaining > 0):
+        if remaining is not None:
+            remaining -= 1
+        if pending and rng.random() < config["fulfill_ratio"]:
+            op = "fulfill"
+            order = pending.pop(0)
+        else:
+            op = "place"
+            sku = rng.choices(skus, cum_weights=config["weights"])[0]
+            hub = rng.choice(hubs)
+            quantity = rng.randint(1, config["max_quantity"])
+
+        start = time.perf_counter()
+        try:
+            if op == "fulfill":
+                outcome = _fulfil(order, on_retry=count_retry)
+            else:
+                outcome = (place_order(sku, quantity, customer, hub), sku, quantity, hub)
+        except ValueError:
+            result["unfillable"] += 1
+            continue
+        except mysql.connector.Error as e:
+            kind = _classify(e)
+            result[kind] += 1
+            if kind == "errors" and len(result["error_samples"]) < 5:
+                result["error_samples"].append(str(e))
+            continue
+
+        # Failed attempts are counted above; timing them would skew the percentiles.
+        result["latency_ms"][op].append((time.perf_counter() - start) * 1000.0)
+        result["ok"][op] += 1
+        if op == "place":
+            pending.append(outcome)
+        else:
+            result["units_fulfilled"] += outcome
+
+    flush_logs(LOG_FLUSH_TIMEOUT)
+    return result
+
+
+def _targets():
+    """Return SKUs stocked at a warehouse with a retail route, and the retail hubs."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT i.sku, SUM(i.quantity) AS stock
+            FROM Inventory i
+            WHERE i.quantity > 0 AND i.location NOT LIKE 'Retail Hub%'
+              AND EXISTS (
+                  SELECT 1 FROM Routes r
+                  WHERE r.origin = i.location AND r.destination LIKE 'Retail Hub%'
+              )
+            GROUP BY i.sku
+            ORDER BY stock DESC, i.sku
+        """)
+        skus = [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+    return skus, get_customer_locations()
+
+
+def _restock(skus, quantity):
+    conn = get_connection()
+    cursor = conn.cursor()
+    marks = ", ".join(["%s"] * len(skus))
+    try:
+        # Only generated %s placeholders are interpolated into the SQL text.
+        cursor.execute(
+            "UPDATE Inventory SET quantity = %s "
+            f"WHERE location NOT LIKE 'Retail Hub%' AND sku IN ({marks})",  # nosec B608
+            [quantity, *skus],
+        )
+        refresh_low_stock(cursor, skus)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    invalidate_tables("Inventory")
+
+
+def _snapshot(customer_prefix):
+    """Capture the figures the invariant checks compare."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT sku, SUM(quantity) FROM Inventory GROUP BY sku")
+        stock = {sku: int(total) for sku, total in cursor.fetchall()}
+        cursor.execute(
+            "SELECT COALESCE(SUM(quantity), 0) FROM Inventory WHERE location LIKE 'Retail Hub%'"
+        )
+        hub_units = int(cursor.fetchone()[0])
+        cursor.execute("SELECT COUNT(*) FROM Inventory WHERE quantity < 0")
+        negative = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE(MAX(logistics_id), 0) FROM Logistics")
+        logistics_max = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT status, COUNT(*) FROM Orders WHERE customer_name LIKE %s GROUP BY status",
+            (f"{customer_prefix}-%",),
+        )
+        orders = dict(cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.close()
+    return {"stock": stock, "hub_units": hub_units, "negative": negative,
+            "logistics_max": logistics_max, "orders": orders}
+
+
+def _logistics_since(logistics_id):
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM Logistics WHERE logistics_id > %s", (logistics_id,))
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def check_invariants(before, after, totals, check_metrics=True):
+    """Return a list of human-readable invariant violations (empty when consistent)."""
+    violations = []
+    if after["negative"]:
+        violations.append(f"{after['negative']} inventory rows are negative")
+
+    changed = {
+        sku: (before["stock"].get(sku, 0), after["stock"].get(sku, 0))
+        for sku in set(before["stock"]) | set(after["stock"])
+        if before["stock"].get(sku, 0) != after["stock"].get(sku, 0)
+    }
+    for sku, (old, new) in sorted(changed.items())[:20]:
+        violations.append(f"{sku} total units changed {old} -> {new} (moves must conserve)")
+
+    delivered = after["hub_units"] - before["hub_units"]
+    if delivered != totals["units_fulfilled"]:
+        violations.append(
+            f"retail hubs gained {delivered} units but {totals['units_fulfilled']} were fulfilled"
+        )
+
+    placed = sum(after["orders"].values())
+    processed = after["orders"].get("Processed", 0)
+    if placed != totals["ok"]["place"]:
+        violations.append(
+            f"{placed} orders stored but {totals['ok']['place']} placements succeeded"
+        )
+    if processed != totals["ok"]["fulfill"]:
+        violations.append(
+            f"{processed} orders Processed but {totals['ok']['fulfill']} fulfilments succeeded"
+        )
+
+    moves = _logistics_since(before["logistics_max"])
+    if moves != totals["ok"]["fulfill"]:
+        violations.append(
+            f"{moves} Logistics rows written for {totals['ok']['fulfill']} fulfilments"
+        )
+
+    if check_metrics:
+        for label, (stored, actual) in reconcile_summary_metrics().items():
+            violations.append(f"summary metric '{label}' drifted: {stored} vs {actual}")
+    return violations
+
+
+def _merge(results):
+    totals = {
+        "latency_ms": {op: [] for op in OPERATIONS},
+        "ok": dict.fromkeys(OPERATIONS, 0),
+        "unfillable": 0, "deadlocks": 0, "lock_waits": 0, "errors": 0, "retries": 0,
+        "units_fulfilled": 0, "error_samples": [],
+    }
+    for result in results:
+        for op in OPERATIONS:
+            totals["latency_ms"][op].extend(result["latency_ms"][op])
+            totals["ok"][op] += result["ok"][op]
+        for key in ("unfillable", "deadlocks", "lock_waits", "errors", "retries",
+                    "units_fulfilled"):
+            totals[key] += result[key]
+        totals["error_samples"].extend(result["error_samples"])
+    return totals
+
+
+def run_load(workers=8, duration=30.0, operations=None, mode="thread", fulfill_ratio=0.5,
+             skew=1.0, max_quantity=3, restock=None, seed=42, check_metrics=True):
+    """Drive the workload and return a report dict.
+
+    ``operations`` caps the operations per worker (``duration`` still
+    applies). ``restock`` sets every warehouse row of the target SKUs to
+    that quantity before the run so fulfilment is not starved.
+    """
+    if mode not in ("thread", "process"):
+        raise ValueError("mode must be 'thread' or 'process'")
+    if mode == "process" and backend_name() == "sqlite" and database_path() == ":memory:":
+        raise ValueError("process mode needs a shared database; set SCMS_SQLITE_PATH")
+    skus, hubs = _targets()
+    if not skus or not hubs:
+        raise ValueError("No stocked SKUs with routes to a retail hub")
+    if restock is not None:
+        _restock(skus, restock)
+
+    customer_prefix = f"load{int(time.time())}"
+    base = {
+        "skus": skus, "hubs": hubs, "weights": zipf_weights(len(skus), skew),
+        "fulfill_ratio": fulfill_ratio, "max_quantity": max_quantity,
+        "duration": duration, "operations": operations, "seed": seed,
+        "customer_prefix": customer_prefix,
+    }
+    configs = [dict(base, index=i) for i in range(workers)]
+
+    before = _snapshot(customer_prefix)
+    started = time.perf_counter()
+    if mode == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_worker, configs))
+    else:
+        # Spawned children build their own pools instead of inheriting sockets.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            results = list(pool.map(_worker, configs))
+    elapsed = time.perf_counter() - started
+    flush_logs(LOG_FLUSH_TIMEOUT)
+
+    totals = _merge(results)
+    after = _snapshot(customer_prefix)
+    violations = check_invariants(before, after, totals, check_metrics)
+
+    latency = {}
+    for op, samples in totals["latency_ms"].items():
+        samples.sort()
+        latency[op] = {
+            "count": len(samples),
+            "p50_ms": round(percentile(samples, 0.50), 3),
+            "p95_ms": round(percentile(samples, 0.95), 3),
+            "p99_ms": round(percentile(samples, 0.99), 3),
+            "max_ms": round(samples[-1], 3) if samples else 0.0,
+        }
+    succeeded = sum(totals["ok"].values())
+    return {
+        "config": {
+            "workers": workers, "mode": mode, "duration": duration,
+            "operations": operations, "fulfill_ratio": fulfill_ratio, "skew": skew,
+            "skus": len(skus), "hubs": len(hubs), "seed": seed,
+            "customer_prefix": customer_prefix,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "throughput_ops": round(succeeded / elapsed, 2) if elapsed else 0.0,
+        "throughput": {
+            op: round(count / elapsed, 2) if elapsed else 0.0
+            for op, count in totals["ok"].items()
+        },
+        "ok": totals["ok"],
+        "latency": latency,
+        "unfillable": totals["unfillable"],
+        "deadlocks": totals["deadlocks"],
+        "lock_waits": totals["lock_waits"],
+        "retries": totals["retries"],
+        "errors": totals["errors"],
+        "error_samples": totals["error_samples"][:5],
+        "violations": violations,
+    }
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Concurrent SCMS order workload driver.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--operations", type=int, help="max operations per worker")
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--fulfill-ratio", type=float, default=0.5)
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent, 0 = uniform")
+    parser.add_argument("--max-quantity", type=int, default=3)
+    parser.add_argument("--restock", type=int, help="reset warehouse stock to this first")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write the full report here")
+    args = parser.parse_args(argv)
+
+    if args.mode == "thread":
+        capacity = get_pool().size + get_pool().max_overflow
+        if args.workers > capacity:
+            print(f"warning: {args.workers} workers share a pool of {capacity} connections; "
+                  "raise SCMS_POOL_SIZE to avoid measuring pool waits", file=sys.stderr)
+
+    report = run_load(
+        workers=args.workers, duration=args.duration, operations=args.operations,
+        mode=args.mode, fulfill_ratio=args.fulfill_ratio, skew=args.skew,
+        max_quantity=args.max_quantity, restock=args.restock, seed=args.seed,
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fileobj:
+            json.dump(report, fileobj, indent=2)
+
+    print(f"{report['throughput_ops']:.1f} ops/s over {report['elapsed_s']:.1f}s "
+          f"({report['config']['workers']} {report['config']['mode']} workers)")
+    for op, stats in report["latency"].items():
+        print(f"  {op:<8} {report['throughput'][op]:>8.1f}/s  p50 {stats['p50_ms']:.1f} ms  "
+              f"p95 {stats['p95_ms']:.1f} ms  p99 {stats['p99_ms']:.1f} ms")
+    print(f"  deadlocks {report['deadlocks']}  lock waits {report['lock_waits']}  "
+          f"retried {report['retries']}  errors {report['errors']}  "
+          f"unfillable {report['unfillable']}")
+    for violation in report["violations"]:
+        print(f"VIOLATION {violation}")
+    return 1 if report["violations"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
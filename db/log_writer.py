@@ -0,0 +1,232 @@
+"""Buffered, asynchronous writer for the Logs audit table.
+
+``write_log`` used to open a connection and commit one row per call. The
+writer below queues rows in memory and a background thread inserts them in
+batches with a single multi-row ``executemany``, either when ``batch_size``
+rows are waiting or ``flush_interval`` seconds have passed. Set
+``SCMS_LOG_SYNC=true`` (or configure ``synchronous=True``) to write each row
+immediately, e.g. for tests.
+
+A batch that fails is retried ``max_retries`` times. After that its rows are
+handed to ``dead_letter`` (by default logged at ERROR on the
+``db.log_writer.dead_letter`` logger, i.e. stderr), so a bad row or a long
+outage cannot stop the queue from draining. ``flush_logs`` waits at most
+``SCMS_LOG_FLUSH_TIMEOUT`` seconds (default 5) and logs a warning on timeout.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from db.connection import get_connection
+
+logger = logging.getLogger(__name__)
+dead_letter_logger = logging.getLogger(f"{__name__}.dead_letter")
+
+INSERT_LOGS_SQL = "INSERT INTO Logs (user_id, action) VALUES (%s, %s)"
+MAX_RETRIES = 5
+FLUSH_TIMEOUT = float(os.getenv("SCMS_LOG_FLUSH_TIMEOUT", "5"))
+
+_FLUSH = object()
+_STOP = object()
+
+
+def log_dead_letters(rows):
+    """Default ``dead_letter`` handler: log every undeliverable row."""
+    for user_id, action in rows:
+        dead_letter_logger.error("Undelivered audit log row: user_id=%s action=%r",
+                                 user_id, action)
+
+
+class LogWriter:
+    """Queue-backed audit log writer flushed by a worker thread."""
+
+    def __init__(self, connect_fn=get_connection, max_queue=10000, batch_size=500,
+                 flush_interval=1.0, synchronous=False, max_retries=MAX_RETRIES,
+                 dead_letter=log_dead_letters):
+        self._connect = connect_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous
+        self.max_retries = max_retries
+        self._dead_letter = dead_letter
+        self.dead_lettered = 0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._cond = threading.Condition()
+        self._unflushed = 0
+        self._thread = None
+        self._closed = False
+
+    # ------------------------- public API ------------------------- #
+    def write(self, user_id, action):
+        """Record a log row; blocks only when the queue is full."""
+        if self.synchronous or self._closed:
+            self._insert([(user_id, action)])
+            return
+        self._ensure_worker()
+        with self._cond:
+            self._unflushed += 1
+        self._queue.put((user_id, action))
+
+    def flush(self, timeout=None):
+        """Wait until every queued row is in the database; False on timeout."""
+        with self._cond:
+            if not self._unflushed:
+                return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            # A full queue must not block past the deadline either.
+            self._queue.put(_FLUSH, timeout=timeout)
+        except queue.Full:
+            return False
+        with self._cond:
+            while self._unflushed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        """Flush pending rows and stop the worker thread."""
+        flushed = self.flush(timeout)
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return False
+            self._thread.join(timeout)
+        return flushed
+
+    def pending(self):
+        """Return the number of rows not yet written."""
+        with self._cond:
+            return self._unflushed
+
+    # ------------------------- worker ------------------------- #
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._cond:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name="scms-log-writer", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        batch = []
+        failures = 0
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = _FLUSH
+
+            if item is _STOP:
+                self._flush_batch(batch)
+                return
+            if item is not _FLUSH:
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+
+            if batch and not self._flush_batch(batch):
+                failures += 1
+                if failures > self.max_retries:
+                    self._give_up(batch)
+                    failures = 0
+                else:
+                    # Keep the rows and retry on the next trigger.
+                    time.sleep(min(self.flush_interval, 1.0))
+            elif not batch:
+                with self._cond:
+                    self._cond.notify_all()
+            deadline = time.monotonic() + self.flush_interval
+
+    def _flush_batch(self, batch):
+        if not batch:
+            return True
+        try:
+            self._insert(batch)
+        except Exception:  # noqa: BLE001 - never kill the worker on a DB hiccup
+            logger.exception("Failed to write %d audit log rows", len(batch))
+            return False
+        self._done(batch)
+        return True
+
+    def _give_up(self, batch):
+        logger.error("Dead-lettering %d audit log rows after %d failed attempts",
+                     len(batch), self.max_retries + 1)
+        try:
+            self._dead_letter(list(batch))
+        except Exception:  # noqa: BLE001 - the rows are dropped either way
+            logger.exception("Dead-letter handler failed")
+        self.dead_lettered += len(batch)
+        self._done(batch)
+
+    def _done(self, batch):
+        with self._cond:
+            self._unflushed -= len(batch)
+            self._cond.notify_all()
+        batch.clear()
+
+    def _insert(self, rows):
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(INSERT_LOGS_SQL, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    """Return the process-wide log writer, creating it from environment settings."""
+    global _writer  # pylint: disable=global-statement
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = LogWriter(synchronous=os.getenv("SCMS_LOG_SYNC") == "true")
+    return _writer
+
+
+def configure_log_writer(**options):
+    """Replace the process-wide writer, flushing the previous one first."""
+    global _writer  # pylint: disable=global-statement
+    with _writer_lock:
+        previous, _writer = _writer, LogWriter(**options)
+    if previous is not None:
+        previous.close()
+    return _writer
+
+
+def flush_logs(timeout=FLUSH_TIMEOUT):
+    """Flush the process-wide writer, if one has been created; False on timeout."""
+    if _writer is None or _writer.flush(timeout):
+        return True
+    logger.warning("Audit log flush timed out after %ss; %d rows still queued",
+                   timeout, _writer.pending())
+    return False
+
+
+def shutdown_log_writer():
+    """Flush-on-shutdown hook; registered with ``atexit``."""
+    if _writer is not None:
+        _writer.close()
+
+
+atexit.register(shutdown_log_writer)
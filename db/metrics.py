@@ -0,0 +1,228 @@
+"""Incrementally maintained summary metrics for the reports page.
+
+``generate_summary_report`` used to run four aggregate queries over Orders,
+Inventory and Logistics on every page load. The counters now live in a
+single ``SummaryMetrics`` row. Mutating query functions adjust it inside
+their own transaction, so the report is one primary-key read.
+
+"Low Stock Items" counts distinct SKUs below threshold at some warehouse.
+That cannot be derived from a delta alone, so ``LowStockSkus`` records which
+SKUs are currently low. ``refresh_low_stock`` re-evaluates only the SKUs a
+write touched and applies the difference to the counter.
+
+Every writer touches the one SummaryMetrics row, so it must be locked last
+and held briefly. ``record_metrics`` therefore defers the work of a session
+until right before its ``COMMIT``, after every Inventory lock the
+transaction takes. The low flags are evaluated with a plain (non-locking)
+read; an ``INSERT ... SELECT`` would share-lock every Inventory row of the
+SKU and deadlock concurrent moves of a hot SKU. Under concurrent writes to
+the same SKU a flag can therefore lag until the next write of that SKU or
+the next reconciliation.
+
+``reconcile_summary_metrics`` recomputes everything from scratch, reports
+any drift (e.g. from manual SQL) and optionally repairs it::
+
+    python -m db.metrics            # report drift
+    python -m db.metrics --fix      # report and repair
+"""
+
+import argparse
+import sys
+from decimal import Decimal
+
+from db.cache import invalidate_tables
+from db.session import transaction
+
+METRICS_ID = 1
+
+# report label -> SummaryMetrics column
+COLUMNS = {
+    "Total Orders": "total_orders",
+    "Processed Orders": "processed_orders",
+    "Low Stock Items": "low_stock_items",
+    "Total Logistics Cost": "total_logistics_cost",
+}
+
+_LOW_STOCK_SELECT = """
+    SELECT DISTINCT i.sku
+    FROM Inventory i
+    JOIN Products p ON i.sku = p.sku
+    WHERE i.quantity < p.threshold AND i.location NOT LIKE 'Retail Hub%'
+"""
+
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def adjust_metrics(cursor, total_orders=0, processed_orders=0, low_stock_items=0,
+                   total_logistics_cost=0):
+    """Add deltas to the metrics row inside the caller's transaction."""
+    if not (total_orders or processed_orders or low_stock_items or total_logistics_cost):
+        return
+    cursor.execute("""
+        UPDATE SummaryMetrics
+        SET total_orders = total_orders + %s,
+            processed_orders = processed_orders + %s,
+            low_stock_items = low_stock_items + %s,
+            total_logistics_cost = total_logistics_cost + %s
+        WHERE metric_id = %s
+    """, (total_orders, processed_orders, low_stock_items, total_logistics_cost, METRICS_ID))
+
+
+def _low_stock_change(cursor, skus):
+    """Update the LowStockSkus rows of ``skus``; returns the change in low SKUs."""
+    skus = sorted(set(skus))
+    if not skus:
+        return 0
+    marks = _placeholders(skus)
+    # Only generated %s placeholders are interpolated into the SQL text.
+    cursor.execute(f"{_LOW_STOCK_SELECT} AND i.sku IN ({marks})", skus)  # nosec B608
+    low = {row[0] for row in cursor.fetchall()}
+    cursor.execute(f"SELECT sku FROM LowStockSkus WHERE sku IN ({marks})", skus)  # nosec B608
+    flagged = {row[0] for row in cursor.fetchall()}
+
+    # Only existing keys are deleted and only new keys inserted, so no gap
+    # locks are taken; the row counts keep the counter in step with the table.
+    change = 0
+    added = sorted(low - flagged)
+    if added:
+        cursor.execute(
+            "INSERT IGNORE INTO LowStockSkus (sku) VALUES " + ", ".join(["(%s)"] * len(added)),
+            added,
+        )
+        change += cursor.rowcount
+    cleared = sorted(flagged - low)
+    if cleared:
+        cursor.execute(
+            f"DELETE FROM LowStockSkus WHERE sku IN ({_placeholders(cleared)})",  # nosec B608
+            cleared,
+        )
+        change -= cursor.rowcount
+    return change
+
+
+def refresh_low_stock(cursor, skus):
+    """Re-evaluate the low-stock flag of ``skus`` and adjust the counter by the change."""
+    adjust_metrics(cursor, low_stock_items=_low_stock_change(cursor, skus))
+
+
+def record_metrics(cursor, session=None, skus=(), **deltas):
+    """Refresh the low flag of ``skus`` and add ``deltas`` to the metrics row.
+
+    Without a session both happen now, on ``cursor``. With one they are
+    merged with the session's other metric changes and applied once, right
+    before it commits.
+    """
+    if session is None:
+        deltas["low_stock_items"] = (
+            deltas.get("low_stock_items", 0) + _low_stock_change(cursor, skus)
+        )
+        adjust_metrics(cursor, **deltas)
+        return
+    pending = session.deferred.get("metrics")
+    if pending is None:
+        pending = session.deferred["metrics"] = {"skus": set(), "deltas": {}}
+        session.before_commit(
+            lambda: record_metrics(session.cursor, skus=pending["skus"], **pending["deltas"])
+        )
+    pending["skus"].update(skus)
+    for name, value in deltas.items():
+        pending["deltas"][name] = pending["deltas"].get(name, 0) + value
+
+
+def read_metrics(cursor):
+    """Return the stored metrics as a report dict, or None if the row is missing."""
+    cursor.execute("""
+        SELECT total_orders, processed_orders, low_stock_items, total_logistics_cost
+        FROM SummaryMetrics
+        WHERE metric_id = %s
+    """, (METRICS_ID,))
+    row = cursor.fetchone()
+    return dict(zip(COLUMNS, row)) if row else None
+
+
+def compute_metrics(cursor):
+    """Recompute every metric from the base tables (full scans)."""
+    cursor.execute("SELECT COUNT(*) FROM Orders")
+    total_orders = cursor.fetchone()[0]
+
+    cursor.execute("SELECT COUNT(*) FROM Orders WHERE status = 'Processed'")
+    processed_orders = cursor.fetchone()[0]
+
+    cursor.execute(_LOW_STOCK_SELECT)
+    low_stock_items = len(cursor.fetchall())
+
+    cursor.execute("SELECT SUM(transport_cost) FROM Logistics")
+    # MySQL sums DECIMAL exactly; SQLite returns a float.
+    total_logistics_cost = Decimal(str(cursor.fetchone()[0] or 0)).quantize(Decimal("0.01"))
+
+    return {
+        "Total Orders": total_orders,
+        "Processed Orders": processed_orders,
+        "Low Stock Items": low_stock_items,
+        "Total Logistics Cost": total_logistics_cost,
+    }
+
+
+def rebuild_metrics(cursor):
+    """Recompute the metrics row and low-stock set from scratch; returns the metrics."""
+    cursor.execute("DELETE FROM LowStockSkus")
+    cursor.execute(f"INSERT INTO LowStockSkus (sku) {_LOW_STOCK_SELECT}")
+    metrics = compute_metrics(cursor)
+    cursor.execute("""
+        REPLACE INTO SummaryMetrics
+            (metric_id, total_orders, processed_orders, low_stock_items, total_logistics_cost)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (METRICS_ID, *metrics.values()))
+    return metrics
+
+
+def reconcile_summary_metrics(fix=False):
+    """Compare stored metrics with a full recomputation.
+
+    Returns ``{label: (stored, actual)}`` for every metric that drifted
+    (empty when consistent). The metrics row is locked first, so concurrent
+    writers wait instead of producing false drift. With ``fix`` the row and
+    the low-stock set are rebuilt.
+    """
+    with transaction() as session:
+        cursor = session.cursor
+        cursor.execute(
+            "SELECT metric_id FROM SummaryMetrics WHERE metric_id = %s FOR UPDATE",
+            (METRICS_ID,),
+        )
+        cursor.fetchall()
+        stored = read_metrics(cursor) or {}
+        actual = compute_metrics(cursor)
+        drift = {
+            label: (stored.get(label), value)
+            for label, value in actual.items()
+            if stored.get(label) != value
+        }
+        if fix and drift:
+            rebuild_metrics(cursor)
+            session.after_commit(lambda: invalidate_tables("SummaryMetrics"))
+            session.log(1, "Reconciled summary metrics: " + ", ".join(
+                f"{label} {old} -> {new}" for label, (old, new) in drift.items()
+            ))
+    return drift
+
+
+def main(argv=None):
+    """Command-line entry point for the reconciliation job."""
+    parser = argparse.ArgumentParser(description="Reconcile SCMS summary metrics.")
+    parser.add_argument("--fix", action="store_true", help="rebuild metrics on drift")
+    args = parser.parse_args(argv)
+
+    drift = reconcile_summary_metrics(fix=args.fix)
+    if not drift:
+        print("Summary metrics are consistent.")
+        return 0
+    for label, (stored, actual) in drift.items():
+        print(f"DRIFT {label}: stored={stored} actual={actual}")
+    return 0 if args.fix else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""Versioned, idempotent schema migrations for a live SCMS database.
+
+``db/schema.sql`` drops and recreates the database. Later changes ship as
+numbered SQL files in ``db/migrations`` (``0003_workload_indexes.sql``)
+and are applied in version order. Each applied version is recorded in
+``SchemaMigrations`` with a checksum of its file. Editing a migration after
+it was applied is reported as an error instead of being silently skipped.
+
+MySQL commits DDL implicitly, so a failed migration can leave some of its
+statements applied. Errors that only mean "already done" (duplicate
+table, column or index, or dropping one that is gone) are therefore
+treated as success. Re-running the same migration is always safe.
+
+Command line::
+
+    python -m db.migrate              # apply pending migrations
+    python -m db.migrate --status     # list applied and pending versions
+    python -m db.migrate --target 2   # stop after version 2
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+import mysql.connector
+
+from db.connection import get_connection
+
+MIGRATIONS_DIR = Path(__file__).with_name("migrations")
+LOCK_NAME = "scms_schema_migrate"
+LOCK_TIMEOUT = 60
+
+# MySQL errors that mean the statement's effect is already in place.
+ALREADY_APPLIED_ERRORS = {
+    1050,  # ER_TABLE_EXISTS_ERROR
+    1060,  # ER_DUP_FIELDNAME
+    1061,  # ER_DUP_KEYNAME
+    1091,  # ER_CANT_DROP_FIELD_OR_KEY
+}
+
+Migration = namedtuple("Migration", "version name path checksum")
+
+_FILENAME = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+class MigrationError(Exception):
+    """Raised when migrations cannot be applied safely."""
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Return the migrations in ``directory`` sorted by version."""
+    migrations = []
+    for path in Path(directory).glob("*.sql"):
+        match = _FILENAME.match(path.name)
+        if not match:
+            raise MigrationError(f"Bad migration filename: {path.name}")
+        checksum = hashlib.sha256(path.read_bytes()).hexdigest()
+        migrations.append(Migration(int(match.group(1)), match.group(2), path, checksum))
+    migrations.sort()
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError("Duplicate migration version numbers")
+    return migrations
+
+
+def split_statements(sql):
+    """Split a migration script into statements, dropping ``--`` comment lines."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def _ensure_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS SchemaMigrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    """)
+
+
+def applied_migrations(cursor):
+    """Return ``{version: checksum}`` for every recorded migration."""
+    _ensure_table(cursor)
+    cursor.execute("SELECT version, checksum FROM SchemaMigrations")
+    return dict(cursor.fetchall())
+
+
+def _check_checksums(migrations, applied):
+    for migration in migrations:
+        recorded = applied.get(migration.version)
+        if recorded is not None and recorded != migration.checksum:
+            raise MigrationError(
+                f"Migration {migration.version} ({migration.name}) was modified "
+                "after it was applied; add a new migration instead"
+            )
+
+
+def _apply(cursor, migration):
+    for statement in split_statements(migration.path.read_text(encoding="utf-8")):
+        try:
+            cursor.execute(statement)
+            if cursor.with_rows:
+                cursor.fetchall()
+        except mysql.connector.Error as e:
+            if e.errno not in ALREADY_APPLIED_ERRORS:
+                raise MigrationError(
+                    f"Migration {migration.version} ({migration.name}) failed: {e}"
+                ) from e
+    cursor.execute(
+        "INSERT INTO SchemaMigrations (version, name, checksum) VALUES (%s, %s, %s)",
+        (migration.version, migration.name, migration.checksum),
+    )
+
+
+def migrate(target=None, dry_run=False, directory=MIGRATIONS_DIR, connect_fn=get_connection):
+    """Apply pending migrations up to ``target``; returns the migrations applied.
+
+    A MySQL named lock keeps concurrent runners (e.g. several app instances
+    starting at once) from applying the same version twice. With
+    ``dry_run`` the pending migrations are returned without being applied.
+    """
+    migrations = [m for m in discover(directory) if target is None or m.version <= target]
+    conn = connect_fn()
+    cursor = conn.cursor(buffered=True)
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise MigrationError("Another migration run holds the schema lock")
+        try:
+            applied = applied_migrations(cursor)
+            _check_checksums(migrations, applied)
+            pending = [m for m in migrations if m.version not in applied]
+            if not dry_run:
+                for migration in pending:
+                    try:
+                        _apply(cursor, migration)
+                    except Exception:
+                        conn.rollback()
+                        raise
+                    conn.commit()
+            return pending
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def migration_status(directory=MIGRATIONS_DIR, connect_fn=get_connection):
+    """Return ``(migration, applied)`` pairs for every known migration."""
+    migrations = discover(directory)
+    conn = connect_fn()
+    cursor = conn.cursor(buffered=True)
+    try:
+        applied = applied_migrations(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return [(m, m.version in applied) for m in migrations]
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Apply SCMS schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list migrations and exit")
+    parser.add_argument("--target", type=int, help="highest version to apply")
+    parser.add_argument("--dry-run", action="store_true", help="show pending migrations only")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.status:
+            for migration, applied in migration_status():
+                state = "applied" if applied else "pending"
+                print(f"{migration.version:04d} {migration.name:<40} {state}")
+            return 0
+        pending = migrate(target=args.target, dry_run=args.dry_run)
+    except MigrationError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    verb = "Pending" if args.dry_run else "Applied"
+    for migration in pending:
+        print(f"{verb} {migration.version:04d} {migration.name}")
+    if not pending:
+        print("Schema is up to date.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+-- Incrementally maintained report counters (see db/metrics.py).
+CREATE TABLE IF NOT EXISTS SummaryMetrics (
+    metric_id TINYINT PRIMARY KEY,
+    total_orders BIGINT NOT NULL DEFAULT 0,
+    processed_orders BIGINT NOT NULL DEFAULT 0,
+    low_stock_items INT NOT NULL DEFAULT 0,
+    total_logistics_cost DECIMAL(14, 2) NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS LowStockSkus (
+    sku VARCHAR(20) PRIMARY KEY
+) ENGINE=InnoDB;
+
+INSERT IGNORE INTO LowStockSkus (sku)
+SELECT DISTINCT i.sku
+FROM Inventory i
+JOIN Products p ON i.sku = p.sku
+WHERE i.quantity < p.threshold AND i.location NOT LIKE 'Retail Hub%';
+
+INSERT IGNORE INTO SummaryMetrics
+    (metric_id, total_orders, processed_orders, low_stock_items, total_logistics_cost)
+SELECT 1,
+       (SELECT COUNT(*) FROM Orders),
+       (SELECT COUNT(*) FROM Orders WHERE status = 'Processed'),
+       (SELECT COUNT(*) FROM LowStockSkus),
+       (SELECT COALESCE(SUM(transport_cost), 0) FROM Logistics);
@@ -0,0 +1,2 @@
+-- get_forecast_gap_report: WHERE sku = ? AND forecast_date BETWEEN ? AND ?
+CREATE INDEX idx_forecast_sku_date ON DemandForecast (sku, forecast_date);
@@ -0,0 +1,33 @@
+-- Composite indexes matched to the queries in db/queries.py. InnoDB appends
+-- the primary key to every secondary index, so (col) already serves
+-- "WHERE col = ? ORDER BY id" keyset pages; the ids are listed explicitly
+-- where that ordering is the point of the index.
+
+-- get_orders (User role): WHERE customer_name = ? ORDER BY order_id DESC,
+-- and the customer filter of get_orders_page.
+CREATE INDEX idx_orders_customer ON Orders (customer_name, order_id);
+
+-- get_orders_page location filter; batch fulfillment joins Orders to Routes
+-- on customer_location.
+CREATE INDEX idx_orders_location ON Orders (customer_location, order_id);
+
+-- Pending-order scans that only need the SKU (allocation, fulfillment plan):
+-- WHERE status = 'Pending' ... sku IN (SELECT DISTINCT sku ...), covered.
+CREATE INDEX idx_orders_status_sku ON Orders (status, sku);
+
+-- get_products_by_warehouse, warehouse stock lookups and DISTINCT location,
+-- covered without touching the clustered rows. A prefix LIKE 'Retail Hub%'
+-- can range-scan it; NOT LIKE still filters rows after the lookup.
+CREATE INDEX idx_inventory_location ON Inventory (location, sku, quantity);
+
+-- get_logistics_page location filter: origin = ? OR destination = ?,
+-- resolved with an index-merge union of the two.
+CREATE INDEX idx_logistics_origin ON Logistics (origin, logistics_id);
+CREATE INDEX idx_logistics_destination ON Logistics (destination, logistics_id);
+
+-- get_valid_origins_for_destination, suggest_cheapest_origin and the
+-- fulfillment joins look routes up by destination; covered including cost.
+CREATE INDEX idx_routes_destination ON Routes (destination, origin, cost);
+
+-- idx_origin_dest duplicates the unique_route key and only slows writes.
+DROP INDEX idx_origin_dest ON Routes;
@@ -0,0 +1,6 @@
+-- Order dates give db/forecasting.py a demand history. Orders placed before
+-- this migration are dated on the day it runs.
+ALTER TABLE Orders ADD COLUMN order_date DATE NOT NULL DEFAULT (CURRENT_DATE);
+
+-- Forecast history: WHERE order_date BETWEEN ? AND ? GROUP BY sku, order_date.
+CREATE INDEX idx_orders_date ON Orders (order_date, sku);
@@ -0,0 +1,105 @@
+"""Concurrent loading of independent page queries.
+
+A Streamlit page that runs its queries one after another waits for the sum
+of their round trips. ``fetch_all`` submits independent read calls to a
+shared thread pool, so the wait is roughly that of the slowest call. Each
+call borrows its own pooled connection::
+
+    data = fetch_all(
+        report=generate_summary_report,
+        logistics=partial(get_logistics_page, limit=50),
+    )
+    data["report"], data["logistics"]
+
+``submit(fn)`` starts a single call in the background and returns its
+``Future``, for pages that can render widgets while a query runs.
+
+Calls run in a copy of the caller's context, so instrumentation page tags
+carry over. Mutations and anything that must share a ``transaction()``
+session should stay sequential.
+"""
+
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker = threading.local()
+
+
+def _enabled():
+    return os.getenv("SCMS_PARALLEL_FETCH", "true").lower() != "false"
+
+
+def get_executor():
+    """Return the process-wide fetch thread pool, creating it on first use."""
+    global _executor  # pylint: disable=global-statement
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("SCMS_FETCH_WORKERS", "8")),
+                    thread_name_prefix="scms-fetch",
+                    initializer=_mark_worker,
+                )
+    return _executor
+
+
+def _mark_worker():
+    _worker.active = True
+
+
+def _inline():
+    return getattr(_worker, "active", False) or not _enabled()
+
+
+def submit(fn):
+    """Start ``fn()`` on the fetch pool and return its ``Future``.
+
+    Inside a fetch worker or with ``SCMS_PARALLEL_FETCH=false`` the call runs
+    immediately and an already completed future is returned.
+    """
+    if _inline():
+        future = Future()
+        try:
+            future.set_result(fn())
+        except Exception as e:  # pylint: disable=broad-except
+            future.set_exception(e)
+        return future
+    return get_executor().submit(contextvars.copy_context().run, fn)
+
+
+def fetch_all(**calls):
+    """Run each zero-argument callable concurrently; return ``{name: result}``.
+
+    Every call runs to completion. If any raised, the first failure in
+    argument order is re-raised. A single call, a call made from inside a
+    fetch worker (to avoid starving the pool) or ``SCMS_PARALLEL_FETCH=false``
+    runs inline.
+    """
+    if len(calls) <= 1 or _inline():
+        return {name: fn() for name, fn in calls.items()}
+
+    futures = {name: submit(fn) for name, fn in calls.items()}
+    results = {}
+    error = None
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:  # pylint: disable=broad-except
+            if error is None:
+                error = e
+    if error is not None:
+        raise error
+    return results
+
+
+def shutdown_fetch_pool():
+    """Stop the fetch thread pool (it is recreated on next use)."""
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
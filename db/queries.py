@@ -1,615 +1,996 @@
 """Database query functions for products, inventory, logistics, and orders."""
 
+import sys
+from contextlib import contextmanager
+
+from db.cache import cached_query, invalidate_tables, reference_cache
 from db.connection import get_connection
+from db.instrumentation import instrument_module
+from db.log_writer import FLUSH_TIMEOUT as LOG_FLUSH_TIMEOUT, flush_logs, get_log_writer
+from db.metrics import read_metrics, rebuild_metrics, record_metrics
+from db.routing import get_route_graph, invalidate_route_graph
+from db.session import run_in_transaction
 
 
-# ------------------------- PRODUCT FUNCTIONS ------------------------- #
-def get_all_products():
-    """Fetch all products from the database."""
+@contextmanager
+def _cursor(session=None, commit=False):
+    """Borrow a pooled connection and yield a cursor, returning both afterwards.
+
+    The transaction is committed when ``commit`` is set and rolled back if the
+    block raises, so a failing query never leaves a dirty connection in the pool.
+    Inside a ``transaction()`` the session's cursor is reused and committing is
+    left to the session.
+    """
+    if session is not None:
+        yield session.cursor
+        return
+
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM Products")
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+    try:
+        yield cursor
+        if commit:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _after_commit(session, callback):
+    """Run ``callback`` now, or after the session commits when one is given."""
+    if session is not None:
+        session.after_commit(callback)
+    else:
+        callback()
+
+
+STREAM_BATCH_SIZE = 1000
+
+
+def _iter_rows(sql, params=(), batch_size=STREAM_BATCH_SIZE, session=None):
+    """Yield a query's rows from an unbuffered cursor, ``batch_size`` at a time.
+
+    Only one batch is held in memory. If the caller stops early, the borrowed
+    connection is discarded instead of draining the rest of the result set.
+    """
+    if session is not None:
+        session.cursor.execute(sql, params)
+        while rows := session.cursor.fetchmany(batch_size):
+            yield from rows
+        return
+
+    conn = get_connection()
+    cursor = conn.cursor(buffered=False)
+    finished = False
+    try:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(batch_size):
+            yield from rows
+        finished = True
+    finally:
+        if finished:
+            cursor.close()
+            conn.close()
+        else:
+            conn.discard()
+
+
+def _routes(session=None):
+    """Return the Routes table as ``{(origin, destination): (cost, km)}``.
+
+    Like ``cached_query``, the cache is only used without a session, so reads
+    inside a transaction see its own uncommitted route changes.
+    """
+    def load():
+        with _cursor(session) as cursor:
+            cursor.execute(
+                "SELECT origin, destination, cost, distance_km FROM Routes ORDER BY route_id"
+            )
+            return {(o, d): (cost, km) for o, d, cost, km in cursor.fetchall()}
+
+    if session is not None:
+        return load()
+    return reference_cache.get("routes", ("Routes",), load)
+
+
+def _keyset_page(cursor, table, id_column, columns, filters, before_id, after_id, limit):
+    """Fetch one newest-first page of ``table`` using its auto-increment id as cursor.
+
+    ``filters`` is a list of ``(sql_condition, params)`` pairs. Passing
+    ``before_id`` pages towards older rows, ``after_id`` towards newer ones.
+    Returns ``{"rows": [...], "next": id or None, "prev": id or None}`` where
+    ``next``/``prev`` are the ``before_id``/``after_id`` for the adjacent pages.
+    """
+    conditions = [condition for condition, _ in filters]
+    params = [p for _, values in filters for p in values]
+    if after_id is not None:
+        conditions.append(f"{id_column} > %s")
+        params.append(after_id)
+        order = "ASC"
+    else:
+        if before_id is not None:
+            conditions.append(f"{id_column} < %s")
+            params.append(before_id)
+        order = "DESC"
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # Identifiers and conditions are code constants; values are bound as %s.
+    cursor.execute(f"""
+        SELECT {id_column}, {', '.join(columns)}
+        FROM {table}
+        {where}
+        ORDER BY {id_column} {order}
+        LIMIT %s
+    """, params + [limit + 1])  # nosec B608
+    rows = cursor.fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if after_id is not None:
+        rows.reverse()
+        newer, older = has_more, bool(rows)
+    else:
+        newer, older = before_id is not None, has_more
+    return {
+        "rows": rows,
+        "next": rows[-1][0] if rows and older else None,
+        "prev": rows[0][0] if rows and newer else None,
+    }
+
 
+# ------------------------- PRODUCT FUNCTIONS ------------------------- #
+@cached_query("Products")
+def get_all_products(session=None):
+    """Fetch all products from the database."""
+    with _cursor(session) as cursor:
+        cursor.execute("SELECT * FROM Products")
+        return cursor.fetchall()
 
-def add_product(sku, name, description, threshold):
+
+def add_product(sku, name, description, threshold, session=None):
     """Add a new product to the database."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO Products (sku, name, description, threshold) VALUES (%s, %s, %s, %s)",
-        (sku, name, description, threshold),
-    )
-    conn.commit()
-    write_log(1, f"Created product {sku}")
-    cursor.close()
-    conn.close()
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute(
+            "INSERT INTO Products (sku, name, description, threshold) VALUES (%s, %s, %s, %s)",
+            (sku, name, description, threshold),
+        )
+    _after_commit(session, lambda: invalidate_tables("Products"))
+    write_log(1, f"Created product {sku}", session=session)
 
 
-def update_product(sku, name, description, threshold):
+def update_product(sku, name, description, threshold, session=None):
     """Update an existing product in the database."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE Products SET name=%s, description=%s, threshold=%s WHERE sku=%s",
-        (name, description, threshold, sku),
-    )
-    conn.commit()
-    write_log(1, f"Updated product {sku}")
-    cursor.close()
-    conn.close()
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute(
+            "UPDATE Products SET name=%s, description=%s, threshold=%s WHERE sku=%s",
+            (name, description, threshold, sku),
+        )
+        record_metrics(cursor, session, skus=[sku])
+    _after_commit(session, lambda: invalidate_tables("Products"))
+    write_log(1, f"Updated product {sku}", session=session)
 
 
-def delete_product(sku):
+def delete_product(sku, session=None):
     """Delete a product and its inventory records."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM Inventory WHERE sku = %s", (sku,))
-    cursor.execute("DELETE FROM Products WHERE sku = %s", (sku,))
-    conn.commit()
-    write_log(1, f"Deleted product {sku}")
-    cursor.close()
-    conn.close()
+    with _cursor(session, commit=True) as cursor:
+        # Lock the product before its stock, in the same order as move_product.
+        cursor.execute("SELECT sku FROM Products WHERE sku = %s FOR UPDATE", (sku,))
+        cursor.fetchall()
+        cursor.execute("DELETE FROM Inventory WHERE sku = %s", (sku,))
+        cursor.execute("DELETE FROM Products WHERE sku = %s", (sku,))
+        record_metrics(cursor, session, skus=[sku])
+    _after_commit(session, lambda: invalidate_tables("Products", "Inventory"))
+    write_log(1, f"Deleted product {sku}", session=session)
+
+
+def upsert_product_with_inventory(sku, name, description, threshold, quantities,
+                                  session=None, create=False):
+    """Create or update a product and set its quantity at each location, atomically.
+
+    ``quantities`` maps location to quantity. The product and all inventory
+    rows are written with one upsert each in a single transaction, retried on
+    deadlock when no session is given. With ``create`` the product must be
+    new: an existing SKU raises ValueError instead of being overwritten.
+    Returns the number of locations set.
+    """
+    sku = sku.strip().upper()
+    quantities = {location.strip(): qty for location, qty in quantities.items()}
+    if not sku:
+        raise ValueError("SKU is required")
+    if any(qty < 0 for qty in quantities.values()):
+        raise ValueError("Quantity must not be negative")
+
+    if session is None:
+        return run_in_transaction(lambda s: upsert_product_with_inventory(
+            sku, name, description, threshold, quantities, session=s, create=create
+        ))
+
+    with _cursor(session, commit=True) as cursor:
+        if create:
+            cursor.execute("SELECT 1 FROM Products WHERE sku = %s FOR UPDATE", (sku,))
+            if cursor.fetchall():
+                raise ValueError(f"Product '{sku}' already exists; use Update Product instead")
+        cursor.execute("""
+            INSERT INTO Products (sku, name, description, threshold) VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE name = VALUES(name), description = VALUES(description),
+                                    threshold = VALUES(threshold)
+        """, (sku, name, description, threshold))
+        if quantities:
+            # Only generated %s placeholders are interpolated into the SQL text.
+            cursor.execute(
+                "INSERT INTO Inventory (sku, location, quantity) VALUES "  # nosec B608
+                + ", ".join(["(%s, %s, %s)"] * len(quantities))
+                + " ON DUPLICATE KEY UPDATE quantity = VALUES(quantity)",
+                [value for location, qty in quantities.items()
+                 for value in (sku, location, qty)],
+            )
+        record_metrics(cursor, session, skus=[sku])
+    _after_commit(session, lambda: invalidate_tables("Products", "Inventory"))
+    write_log(
+        1,
+        f"Saved product {sku} with stock at {len(quantities)} location(s)",
+        session=session,
+    )
+    return len(quantities)
 
 
 # ------------------------- INVENTORY FUNCTIONS ------------------------- #
-def get_inventory():
+@cached_query("Inventory", "Products")
+def get_inventory(session=None):
     """Fetch all inventory records along with product details."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
+    with _cursor(session) as cursor:
+        cursor.execute("""
+            SELECT Inventory.inventory_id, Inventory.sku, Inventory.location, Inventory.quantity,
+                   Products.threshold, Products.name
+            FROM Inventory
+            JOIN Products ON Inventory.sku = Products.sku
+        """)
+        return cursor.fetchall()
+
+
+def iter_inventory(batch_size=STREAM_BATCH_SIZE, session=None):
+    """Stream inventory records with product details (same columns as get_inventory)."""
+    return _iter_rows("""
         SELECT Inventory.inventory_id, Inventory.sku, Inventory.location, Inventory.quantity,
                Products.threshold, Products.name
         FROM Inventory
         JOIN Products ON Inventory.sku = Products.sku
-    """)
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+        ORDER BY Inventory.inventory_id
+    """, batch_size=batch_size, session=session)
 
 
-def add_inventory(sku, location, quantity):
+def add_inventory(sku, location, quantity, session=None):
     """Add new inventory for a product at a specific location."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s)",
-        (sku, location, quantity),
-    )
-    conn.commit()
-    write_log(1, f"Added inventory for {sku} at {location}: {quantity}")
-    cursor.close()
-    conn.close()
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute(
+            "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s)",
+            (sku, location, quantity),
+        )
+        record_metrics(cursor, session, skus=[sku])
+    _after_commit(session, lambda: invalidate_tables("Inventory"))
+    write_log(1, f"Added inventory for {sku} at {location}: {quantity}", session=session)
 
 
-def update_inventory(sku, location, quantity):
+def update_inventory(sku, location, quantity, session=None):
     """Update inventory quantity for a product at a given location."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE Inventory
-        SET quantity = %s
-        WHERE sku = %s AND location = %s
-    """, (quantity, sku, location))
-    conn.commit()
-    write_log(1, f"Updated inventory for {sku} at {location}: {quantity}")
-    cursor.close()
-    conn.close()
-
-
-def delete_inventory_for_sku(sku):
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute("""
+            UPDATE Inventory
+            SET quantity = %s
+            WHERE sku = %s AND location = %s
+        """, (quantity, sku, location))
+        record_metrics(cursor, session, skus=[sku])
+    _after_commit(session, lambda: invalidate_tables("Inventory"))
+    write_log(1, f"Updated inventory for {sku} at {location}: {quantity}", session=session)
+
+
+def delete_inventory_for_sku(sku, session=None):
     """Delete all inventory entries for a given SKU."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM Inventory WHERE sku = %s", (sku,))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute("DELETE FROM Inventory WHERE sku = %s", (sku,))
+        record_metrics(cursor, session, skus=[sku])
+    _after_commit(session, lambda: invalidate_tables("Inventory"))
 
 
-def get_low_stock():
+@cached_query("Inventory", "Products")
+def get_low_stock(session=None):
     """Fetch all products with quantity below threshold (excluding retail hubs)."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT i.sku, p.name, i.location, i.quantity, p.threshold
-        FROM Inventory i
-        JOIN Products p ON i.sku = p.sku
-        WHERE i.quantity < p.threshold AND i.location NOT LIKE 'Retail Hub%'
-    """)
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
-
-
-def get_products_by_warehouse(location):
+    with _cursor(session) as cursor:
+        cursor.execute("""
+            SELECT i.sku, p.name, i.location, i.quantity, p.threshold
+            FROM Inventory i
+            JOIN Products p ON i.sku = p.sku
+            WHERE i.quantity < p.threshold AND i.location NOT LIKE 'Retail Hub%'
+        """)
+        return cursor.fetchall()
+
+
+@cached_query("Inventory", "Products")
+def get_products_by_warehouse(location, session=None):
     """Get all products stored at a specific warehouse."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT Inventory.sku, Products.name, Inventory.quantity
-        FROM Inventory
-        JOIN Products ON Inventory.sku = Products.sku
-        WHERE Inventory.location = %s
-    """, (location,))
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+    with _cursor(session) as cursor:
+        cursor.execute("""
+            SELECT Inventory.sku, Products.name, Inventory.quantity
+            FROM Inventory
+            JOIN Products ON Inventory.sku = Products.sku
+            WHERE Inventory.location = %s
+        """, (location,))
+        return cursor.fetchall()
 
 
 # ------------------------- LOGISTICS FUNCTIONS ------------------------- #
-def move_product(sku, origin, destination, quantity, transport_cost):
-    """Move a product between two locations and log the transfer."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
+def move_product(sku, origin, destination, quantity, transport_cost, session=None):
+    """Move a product between two locations and log the transfer.
+
+    Moves of one SKU first serialise on its Products row. Both inventory
+    rows are then locked in index order, the origin is decremented only
+    while it still holds ``quantity`` (checked via the row count) and the
+    destination is upserted. Concurrent moves of one SKU therefore cannot
+    oversell, and cannot deadlock on opposite directions or on the gap lock
+    of a destination row that does not exist yet. Metric updates are
+    deferred to the end of the transaction (see ``record_metrics``), so
+    Products -> Inventory -> metrics is the only lock order. Without a
+    session the move is its own transaction, retried on deadlock.
+    """
     sku = sku.strip().upper()
     origin = origin.strip()
     destination = destination.strip()
+    if quantity <= 0:
+        raise ValueError("Quantity must be positive")
+
+    if session is None:
+        run_in_transaction(lambda s: move_product(
+            sku, origin, destination, quantity, transport_cost, session=s
+        ))
+        return None
+
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute("SELECT sku FROM Products WHERE sku = %s FOR UPDATE", (sku,))
+        if not cursor.fetchall():
+            raise ValueError(f"Unknown product {sku}")
+        cursor.execute(
+            "SELECT location FROM Inventory WHERE sku = %s AND location IN (%s, %s) "
+            "ORDER BY location FOR UPDATE",
+            (sku, origin, destination),
+        )
+        cursor.fetchall()
 
-    cursor.execute(
-        "SELECT quantity FROM Inventory WHERE sku = %s AND location = %s",
-        (sku, origin),
-    )
-    result = cursor.fetchone()
-    if not result or result[0] < quantity:
-        conn.rollback()
-        cursor.close()
-        conn.close()
-        raise ValueError("Insufficient stock at origin")
-
-    cursor.execute(
-        "UPDATE Inventory SET quantity = quantity - %s "
-        "WHERE sku = %s AND location = %s",
-        (quantity, sku, origin),
-    )
-
-    cursor.execute(
-        "SELECT quantity FROM Inventory WHERE sku = %s AND location = %s",
-        (sku, destination),
-    )
-    if cursor.fetchone():
         cursor.execute(
-            "UPDATE Inventory SET quantity = quantity + %s "
-            "WHERE sku = %s AND location = %s",
-            (quantity, sku, destination),
+            "UPDATE Inventory SET quantity = quantity - %s "
+            "WHERE sku = %s AND location = %s AND quantity >= %s",
+            (quantity, sku, origin, quantity),
         )
-    else:
+        if cursor.rowcount != 1:
+            raise ValueError("Insufficient stock at origin")
+
         cursor.execute(
-            "INSERT INTO Inventory (sku, location, quantity) "
-            "VALUES (%s, %s, %s)",
+            "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)",
             (sku, destination, quantity),
         )
 
-    cursor.execute(
-        "INSERT INTO Logistics (sku, origin, destination, transport_cost) "
-        "VALUES (%s, %s, %s, %s)",
-        (sku, origin, destination, transport_cost),
-    )
+        cursor.execute(
+            "INSERT INTO Logistics (sku, origin, destination, transport_cost) "
+            "VALUES (%s, %s, %s, %s)",
+            (sku, origin, destination, transport_cost),
+        )
+        record_metrics(cursor, session, skus=[sku], total_logistics_cost=transport_cost)
 
-    conn.commit()
+    _after_commit(session, lambda: invalidate_tables("Inventory", "Logistics"))
     write_log(
         1,
         f"Moved {quantity} of {sku} from {origin} to {destination} "
         f"(₹{transport_cost:.2f})",
+        session=session,
     )
-    cursor.close()
-    conn.close()
+    return None
 
-def get_route_cost(origin, destination):
+
+def get_route_cost(origin, destination, session=None):
     """Return the cost of a route between origin and destination."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT cost FROM Routes WHERE origin = %s AND destination = %s",
-        (origin, destination),
+    route = _routes(session).get((origin, destination))
+    return route[0] if route else None
+
+
+def add_route(origin, destination, cost, distance_km, session=None):
+    """Add a route, or update its cost and distance if it already exists."""
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute("""
+            INSERT INTO Routes (origin, destination, cost, distance_km)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE cost = VALUES(cost), distance_km = VALUES(distance_km)
+        """, (origin, destination, cost, distance_km))
+    _after_commit(session, lambda: invalidate_tables("Routes"))
+    _after_commit(
+        session,
+        lambda: get_route_graph().set_route(origin, destination, cost, distance_km),
     )
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return result[0] if result else None
+    write_log(1, f"Saved route {origin} -> {destination} (₹{cost})", session=session)
+
+
+def delete_route(origin, destination, session=None):
+    """Delete the route between two locations."""
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute(
+            "DELETE FROM Routes WHERE origin = %s AND destination = %s",
+            (origin, destination),
+        )
+    _after_commit(session, lambda: invalidate_tables("Routes"))
+    _after_commit(session, lambda: get_route_graph().remove_route(origin, destination))
+    write_log(1, f"Deleted route {origin} -> {destination}", session=session)
+
+
+def get_shortest_route(origin, destination, weight="cost"):
+    """Return the cheapest multi-leg path (by ``cost`` or ``distance``), or None."""
+    return get_route_graph().shortest_path(origin, destination, weight)
+
 
 # ------------------------- ORDER FUNCTIONS ------------------------- #
-def place_order(sku, quantity, customer_name, customer_location):
-    """Insert a new customer order."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO Orders (sku, quantity, customer_name, customer_location, status)
-        VALUES (%s, %s, %s, %s, 'Pending')
-    """, (sku, quantity, customer_name, customer_location))
-    conn.commit()
-    cursor.close()
-    conn.close()
+def place_order(sku, quantity, customer_name, customer_location, session=None):
+    """Insert a new customer order and return its id."""
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute("""
+            INSERT INTO Orders (sku, quantity, customer_name, customer_location, status)
+            VALUES (%s, %s, %s, %s, 'Pending')
+        """, (sku, quantity, customer_name, customer_location))
+        order_id = cursor.lastrowid
+        record_metrics(cursor, session, total_orders=1)
+    _after_commit(session, lambda: invalidate_tables("Orders"))
+    return order_id
 
 
-def get_orders(username=None, role="Admin"):
+@cached_query("Orders")
+def get_orders(username=None, role="Admin", session=None):
     """Retrieve orders based on user role."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    if role == "User":
-        cursor.execute("""
-            SELECT order_id, sku, quantity, customer_name, customer_location, status
-            FROM Orders
-            WHERE customer_name = %s
-            ORDER BY order_id DESC
-        """, (username,))
-    else:
-        cursor.execute("""
-            SELECT order_id, sku, quantity, customer_name, customer_location, status
-            FROM Orders
-            ORDER BY order_id DESC
-        """)
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+    with _cursor(session) as cursor:
+        if role == "User":
+            cursor.execute("""
+                SELECT order_id, sku, quantity, customer_name, customer_location, status
+                FROM Orders
+                WHERE customer_name = %s
+                ORDER BY order_id DESC
+            """, (username,))
+        else:
+            cursor.execute("""
+                SELECT order_id, sku, quantity, customer_name, customer_location, status
+                FROM Orders
+                ORDER BY order_id DESC
+            """)
+        return cursor.fetchall()
+
+
+def iter_orders(status=None, batch_size=STREAM_BATCH_SIZE, session=None):
+    """Stream orders oldest first, optionally filtered by status."""
+    where, params = ("WHERE status = %s", (status,)) if status else ("", ())
+    # Identifiers and conditions are code constants; values are bound as %s.
+    return _iter_rows(f"""
+        SELECT order_id, sku, quantity, customer_name, customer_location, status
+        FROM Orders
+        {where}
+        ORDER BY order_id
+    """, params, batch_size=batch_size, session=session)  # nosec B608
+
+
+@cached_query("Orders")
+def get_orders_page(before_id=None, after_id=None, limit=50, status=None, sku=None,
+                    customer=None, location=None, session=None):
+    """Return one keyset-paginated page of orders, newest first, with optional filters."""
+    filters = [
+        (f"{column} = %s", (value,))
+        for column, value in (
+            ("status", status), ("sku", sku),
+            ("customer_name", customer), ("customer_location", location),
+        )
+        if value
+    ]
+    with _cursor(session) as cursor:
+        return _keyset_page(
+            cursor, "Orders", "order_id",
+            ("sku", "quantity", "customer_name", "customer_location", "status"),
+            filters, before_id, after_id, limit,
+        )
 
 
-def update_order_status(order_id, status):
+def update_order_status(order_id, status, session=None):
     """Update order status."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE Orders SET status = %s WHERE order_id = %s", (status, order_id))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute(
+            "SELECT status FROM Orders WHERE order_id = %s FOR UPDATE", (order_id,)
+        )
+        row = cursor.fetchone()
+        cursor.execute("UPDATE Orders SET status = %s WHERE order_id = %s", (status, order_id))
+        if row:
+            record_metrics(
+                cursor, session,
+                processed_orders=int(status == "Processed") - int(row[0] == "Processed"),
+            )
+    _after_commit(session, lambda: invalidate_tables("Orders"))
 
 
 # ------------------------- FORECAST FUNCTIONS ------------------------- #
-def get_forecast():
+@cached_query("DemandForecast")
+def get_forecast(session=None):
     """Fetch all demand forecasts."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT sku, forecast_value, forecast_date FROM DemandForecast")
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+    with _cursor(session) as cursor:
+        cursor.execute("SELECT sku, forecast_value, forecast_date FROM DemandForecast")
+        return cursor.fetchall()
+
+
+def iter_forecast(batch_size=STREAM_BATCH_SIZE, session=None):
+    """Stream demand forecasts (same columns as get_forecast)."""
+    return _iter_rows(
+        "SELECT sku, forecast_value, forecast_date FROM DemandForecast ORDER BY forecast_id",
+        batch_size=batch_size, session=session,
+    )
 
 
-def add_forecast(sku, forecast_value, forecast_date):
+def add_forecast(sku, forecast_value, forecast_date, session=None):
     """Add a new demand forecast record."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO DemandForecast (sku, forecast_value, forecast_date)
-        VALUES (%s, %s, %s)
-    """, (sku, forecast_value, forecast_date))
-    conn.commit()
-    write_log(1, f"Forecasted {forecast_value} units of {sku} for {forecast_date}")
-    cursor.close()
-    conn.close()
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute("""
+            INSERT INTO DemandForecast (sku, forecast_value, forecast_date)
+            VALUES (%s, %s, %s)
+        """, (sku, forecast_value, forecast_date))
+    _after_commit(session, lambda: invalidate_tables("DemandForecast"))
+    write_log(
+        1,
+        f"Forecasted {forecast_value} units of {sku} for {forecast_date}",
+        session=session,
+    )
+
+
+@cached_query("DemandForecast", "Inventory")
+def get_forecast_gap_report(start_date=None, end_date=None, sku=None, session=None):
+    """Return forecasts with current inventory, gap and status from one grouped join.
+
+    Optional ``start_date``/``end_date`` (inclusive) and ``sku`` filters are
+    applied in SQL. Each row is a dict with ``sku``, ``forecast``, ``date``,
+    ``inventory``, ``gap`` and ``status`` ("OK" or "Shortage").
+    """
+    conditions = []
+    params = []
+    inventory_filter = ""
+    if sku:
+        inventory_filter = "WHERE sku = %s"
+        params.append(sku)
+        conditions.append("f.sku = %s")
+    if start_date:
+        conditions.append("f.forecast_date >= %s")
+    if end_date:
+        conditions.append("f.forecast_date <= %s")
+    params.extend(v for v in (sku, start_date, end_date) if v)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with _cursor(session) as cursor:
+        # Identifiers and conditions are code constants; values are bound as %s.
+        cursor.execute(f"""
+            SELECT f.sku, f.forecast_value, f.forecast_date,
+                   COALESCE(inv.total, 0) AS inventory,
+                   f.forecast_value - COALESCE(inv.total, 0) AS gap
+            FROM DemandForecast f
+            LEFT JOIN (
+                SELECT sku, SUM(quantity) AS total
+                FROM Inventory
+                {inventory_filter}
+                GROUP BY sku
+            ) inv ON inv.sku = f.sku
+            {where}
+            ORDER BY f.forecast_date, f.sku
+        """, params)  # nosec B608
+        rows = cursor.fetchall()
+
+    return [
+        {
+            "sku": row_sku,
+            "forecast": forecast,
+            "date": forecast_date,
+            "inventory": inventory,
+            "gap": gap,
+            "status": "OK" if gap <= 0 else "Shortage",
+        }
+        for row_sku, forecast, forecast_date, inventory, gap in rows
+    ]
 
 
 # ------------------------- UTILITY FUNCTIONS ------------------------- #
-def get_inventory_for_sku(sku):
+@cached_query("Inventory")
+def get_inventory_for_sku(sku, session=None):
     """Return inventory locations and quantities for a specific SKU."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT location, quantity FROM Inventory
-        WHERE sku = %s AND quantity > 0
-        ORDER BY quantity DESC
-    """, (sku,))
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
-
-
-def delete_order(order_id):
-    """Delete an order by ID."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM Orders WHERE order_id = %s", (order_id,))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with _cursor(session) as cursor:
+        cursor.execute("""
+            SELECT location, quantity FROM Inventory
+            WHERE sku = %s AND quantity > 0
+            ORDER BY quantity DESC
+        """, (sku,))
+        return cursor.fetchall()
 
-def write_log(user_id, action):
-    """Write an action log."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO Logs (user_id, action) VALUES (%s, %s)", (user_id, action))
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-def move_order_to_customer(order_id, sku, quantity, origin, destination):
-    """Move an order's products from warehouse to customer."""
-    cost_per_unit = get_route_cost(origin, destination)
-    if cost_per_unit is None:
-        raise ValueError("No route found")
-
-    total_cost = cost_per_unit * quantity
-    move_product(sku, origin, destination, quantity, total_cost)
+
+def delete_order(order_id, session=None):
+    """Delete an order by ID."""
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute(
+            "SELECT status FROM Orders WHERE order_id = %s FOR UPDATE", (order_id,)
+        )
+        row = cursor.fetchone()
+        cursor.execute("DELETE FROM Orders WHERE order_id = %s", (order_id,))
+        if row:
+            record_metrics(
+                cursor, session, total_orders=-1, processed_orders=-int(row[0] == "Processed")
+            )
+    _after_commit(session, lambda: invalidate_tables("Orders"))
+
+
+def write_log(user_id, action, session=None):
+    """Queue an action log, or add it to the session's commit when given one."""
+    if session is not None:
+        session.log(user_id, action)
+    else:
+        get_log_writer().write(user_id, action)
+
+def move_order_to_customer(order_id, sku, quantity, origin, destination,
+                           multi_hop=False, session=None):
+    """Move an order's products from warehouse to customer in one transaction.
+
+    With ``multi_hop`` the stock travels along the cheapest path in the route
+    graph, recording one Logistics movement per leg.
+    """
+    if session is None:
+        return run_in_transaction(lambda s: move_order_to_customer(
+            order_id, sku, quantity, origin, destination, multi_hop=multi_hop, session=s
+        ))
+
+    if multi_hop:
+        route = get_shortest_route(origin, destination)
+        if route is None:
+            raise ValueError("No route found")
+        legs = route["legs"]
+    else:
+        cost_per_unit = get_route_cost(origin, destination, session=session)
+        if cost_per_unit is None:
+            raise ValueError("No route found")
+        legs = [{"origin": origin, "destination": destination, "cost": cost_per_unit}]
+
+    total_cost = 0
+    for leg in legs:
+        leg_cost = leg["cost"] * quantity
+        move_product(
+            sku, leg["origin"], leg["destination"], quantity, leg_cost, session=session
+        )
+        total_cost += leg_cost
     write_log(
         1,
         f"Moved order #{order_id}: {quantity} of {sku} "
-        f"from {origin} to {destination}"
+        f"from {origin} to {destination}",
+        session=session,
     )
+    return total_cost
 
 
-def get_all_warehouse_locations():
+def get_all_warehouse_locations(session=None):
     """Return a list of all warehouse locations."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT location FROM Inventory")
-    results = [row[0] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
-    return results
+    def load():
+        with _cursor(session) as cursor:
+            cursor.execute("SELECT DISTINCT location FROM Inventory")
+            return [row[0] for row in cursor.fetchall()]
+
+    if session is not None:
+        return load()
+    return list(reference_cache.get("inventory_locations", ("Inventory",), load))
 
 
-def get_valid_origins_for_destination(destination, sku):
+@cached_query("Routes", "Inventory")
+def get_valid_origins_for_destination(destination, sku, session=None):
     """Get valid origins that can ship a given SKU to a destination."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT DISTINCT r.origin
-        FROM Routes r
-        JOIN Inventory i ON r.origin = i.location
-        WHERE r.destination = %s AND i.sku = %s AND i.quantity > 0
-    """, (destination, sku))
-    results = [row[0] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
-    return results
-
-
-def get_customer_locations():
+    with _cursor(session) as cursor:
+        cursor.execute("""
+            SELECT DISTINCT r.origin
+            FROM Routes r
+            JOIN Inventory i ON r.origin = i.location
+            WHERE r.destination = %s AND i.sku = %s AND i.quantity > 0
+        """, (destination, sku))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def get_customer_locations(session=None):
     """Retrieve all retail hub destinations."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT DISTINCT destination FROM Routes WHERE destination LIKE 'Retail Hub%'"
-    )
-    results = [row[0] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
-    return results
+    destinations = dict.fromkeys(d for _, d in _routes(session))
+    return [d for d in destinations if d.startswith("Retail Hub")]
 
 
-def get_inventory_locations_for_sku(sku):
+@cached_query("Inventory")
+def get_inventory_locations_for_sku(sku, session=None):
     """Get all locations where a SKU is stored."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT location FROM Inventory WHERE sku = %s", (sku,))
-    results = [row[0] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
-    return results
+    with _cursor(session) as cursor:
+        cursor.execute("SELECT location FROM Inventory WHERE sku = %s", (sku,))
+        return [row[0] for row in cursor.fetchall()]
 
 
-def get_locations():
+def get_locations(session=None):
     """Return all origins and destinations in the Routes table."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT origin FROM Routes")
-    origins = [row[0] for row in cursor.fetchall() if not row[0].startswith("Retail Hub")]
-    cursor.execute("SELECT DISTINCT destination FROM Routes")
-    destinations = [row[0] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
+    routes = _routes(session)
+    origins = [o for o in dict.fromkeys(o for o, _ in routes) if not o.startswith("Retail Hub")]
+    destinations = list(dict.fromkeys(d for _, d in routes))
     return origins, destinations
 
 
-def get_inventory_for_forecast(sku):
+@cached_query("Inventory")
+def get_inventory_for_forecast(sku, session=None):
     """Get total available quantity for a SKU across all locations."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT SUM(quantity) FROM Inventory WHERE sku = %s", (sku,))
-    result = cursor.fetchone()[0]
-    cursor.close()
-    conn.close()
+    with _cursor(session) as cursor:
+        cursor.execute("SELECT SUM(quantity) FROM Inventory WHERE sku = %s", (sku,))
+        result = cursor.fetchone()[0]
     return result or 0
 
 
-def get_cheapest_route_details(origin, destination):
+def get_cheapest_route_details(origin, destination, session=None):
     """Return the cheapest route between two locations with cost and distance."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT cost, distance_km FROM Routes
-        WHERE origin = %s AND destination = %s
-        ORDER BY cost ASC LIMIT 1
-    """, (origin, destination))
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return {"cost": result[0], "distance": result[1]} if result else None
-
-
-def generate_summary_report():
-    """Generate a summary report of key logistics and inventory statistics."""
-    conn = get_connection()
-    cursor = conn.cursor()
+    route = _routes(session).get((origin, destination))
+    return {"cost": route[0], "distance": route[1]} if route else None
 
-    cursor.execute("SELECT COUNT(*) FROM Orders")
-    total_orders = cursor.fetchone()[0]
 
-    cursor.execute("SELECT COUNT(*) FROM Orders WHERE status = 'Processed'")
-    processed_orders = cursor.fetchone()[0]
+@cached_query("SummaryMetrics", "Orders", "Inventory", "Products", "Logistics")
+def generate_summary_report(session=None):
+    """Generate a summary report of key logistics and inventory statistics.
 
-    cursor.execute("""
-        SELECT DISTINCT i.sku
-        FROM Inventory i
-        JOIN Products p ON i.sku = p.sku
-        WHERE i.quantity < p.threshold AND i.location NOT LIKE 'Retail Hub%'
-    """)
-    low_stock_items = len(cursor.fetchall())
+    The figures are maintained incrementally in SummaryMetrics, so this is a
+    single primary-key read. A missing row is rebuilt from the base tables.
+    """
+    with _cursor(session) as cursor:
+        report = read_metrics(cursor)
+    if report is None:
+        with _cursor(session, commit=True) as cursor:
+            report = rebuild_metrics(cursor)
+    return report
 
-    cursor.execute("SELECT SUM(transport_cost) FROM Logistics")
-    total_logistics_cost = cursor.fetchone()[0] or 0
 
-    cursor.close()
-    conn.close()
-
-    return {
-        "Total Orders": total_orders,
-        "Processed Orders": processed_orders,
-        "Low Stock Items": low_stock_items,
-        "Total Logistics Cost": total_logistics_cost,
-    }
-
-
-def suggest_cheapest_origin(sku, destination):
+@cached_query("Inventory", "Routes")
+def suggest_cheapest_origin(sku, destination, session=None):
     """Suggest the cheapest origin location for a given SKU and destination."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT i.location, r.cost
-        FROM Inventory i
-        JOIN Routes r ON i.location = r.origin AND r.destination = %s
-        WHERE i.sku = %s AND i.quantity > 0 AND i.location NOT LIKE 'Retail Hub%'
-        ORDER BY r.cost ASC
-        LIMIT 1
-    """, (destination, sku))
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    with _cursor(session) as cursor:
+        cursor.execute("""
+            SELECT i.location, r.cost
+            FROM Inventory i
+            JOIN Routes r ON i.location = r.origin AND r.destination = %s
+            WHERE i.sku = %s AND i.quantity > 0 AND i.location NOT LIKE 'Retail Hub%'
+            ORDER BY r.cost ASC
+            LIMIT 1
+        """, (destination, sku))
+        result = cursor.fetchone()
     return {"origin": result[0], "cost": result[1]} if result else None
 
 
-def get_logistics_records():
+@cached_query("Orders", "Inventory", "Routes")
+def get_fulfillment_plan(session=None):
+    """Return every pending order with its stocked origins, route costs and suggestion.
+
+    One query replaces the per-order inventory, suggestion and route-cost
+    lookups. Each entry lists the warehouses holding enough stock for the
+    order (most stock first) with their per-unit route ``cost`` to the
+    customer (``None`` when no direct route exists), and ``suggestion`` is the
+    cheapest of those that can actually ship.
+    """
+    with _cursor(session) as cursor:
+        cursor.execute("""
+            SELECT o.order_id, o.sku, o.quantity, o.customer_name, o.customer_location,
+                   i.location, i.quantity, r.cost
+            FROM Orders o
+            LEFT JOIN Inventory i
+                   ON i.sku = o.sku AND i.quantity >= o.quantity
+                  AND i.location NOT LIKE 'Retail Hub%'
+            LEFT JOIN Routes r
+                   ON r.origin = i.location AND r.destination = o.customer_location
+            WHERE o.status = 'Pending'
+            ORDER BY o.order_id DESC, i.quantity DESC, i.location
+        """)
+        rows = cursor.fetchall()
+
+    plan = []
+    for order_id, sku, qty, customer, location, origin, available, cost in rows:
+        if not plan or plan[-1]["order_id"] != order_id:
+            plan.append({
+                "order_id": order_id,
+                "sku": sku,
+                "quantity": qty,
+                "customer": customer,
+                "location": location,
+                "origins": [],
+                "suggestion": None,
+            })
+        entry = plan[-1]
+        if origin is None:
+            continue
+        entry["origins"].append({"location": origin, "available": available, "cost": cost})
+        best = entry["suggestion"]
+        if cost is not None and (best is None or cost < best["cost"]):
+            entry["suggestion"] = {"origin": origin, "cost": cost}
+    return plan
+
+
+@cached_query("Logistics")
+def get_logistics_records(session=None):
     """Fetch all logistics transaction records."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT sku, origin, destination, transport_cost
+    with _cursor(session) as cursor:
+        cursor.execute("""
+            SELECT sku, origin, destination, transport_cost
+            FROM Logistics
+            ORDER BY logistics_id DESC
+        """)
+        return cursor.fetchall()
+
+
+def iter_logistics_records(batch_size=STREAM_BATCH_SIZE, session=None):
+    """Stream logistics records oldest first, including their ids."""
+    return _iter_rows("""
+        SELECT logistics_id, sku, origin, destination, transport_cost
         FROM Logistics
-        ORDER BY logistics_id DESC
-    """)
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+        ORDER BY logistics_id
+    """, batch_size=batch_size, session=session)
+
+
+@cached_query("Logistics")
+def get_logistics_page(before_id=None, after_id=None, limit=50, sku=None, location=None,
+                       session=None):
+    """Return one keyset-paginated page of logistics records, newest first.
+
+    ``location`` matches either the origin or the destination.
+    """
+    filters = []
+    if sku:
+        filters.append(("sku = %s", (sku,)))
+    if location:
+        filters.append(("(origin = %s OR destination = %s)", (location, location)))
+    with _cursor(session) as cursor:
+        return _keyset_page(
+            cursor, "Logistics", "logistics_id",
+            ("sku", "origin", "destination", "transport_cost"),
+            filters, before_id, after_id, limit,
+        )
 
 
-def get_logs():
-    """Retrieve all system log entries."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT user_id, action
-        FROM Logs
-        ORDER BY log_id DESC
-    """)
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
-
-
-def reset_simulation():
-    """Reset the simulation to its initial database state."""
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_logs_page(before_id=None, after_id=None, limit=50, user_id=None, search=None,
+                  session=None):
+    """Return one keyset-paginated page of log entries, newest first.
+
+    ``search`` matches a substring of the action text (e.g. a SKU or location).
+    """
+    filters = []
+    if user_id is not None:
+        filters.append(("user_id = %s", (user_id,)))
+    if search:
+        filters.append(("action LIKE %s", (f"%{search}%",)))
+    flush_logs(LOG_FLUSH_TIMEOUT)
+    with _cursor(session) as cursor:
+        return _keyset_page(
+            cursor, "Logs", "log_id", ("user_id", "action"),
+            filters, before_id, after_id, limit,
+        )
 
-    # Clear dynamic tables
-    cursor.execute("DELETE FROM Orders")
-    cursor.execute("DELETE FROM Logistics")
-    cursor.execute("DELETE FROM DemandForecast")
-    cursor.execute("DELETE FROM Reports")
-    cursor.execute("DELETE FROM Logs")
-    cursor.execute("DELETE FROM Inventory")
-    cursor.execute("DELETE FROM Products")
-    cursor.execute("DELETE FROM Routes")
-    cursor.execute("DELETE FROM Users")
-
-    # Reset AUTO_INCREMENT
-    for table in [
-        "Users", "Orders", "Logistics", "DemandForecast",
-        "Reports", "Logs", "Inventory", "Routes"
-    ]:
-        cursor.execute(f"ALTER TABLE {table} AUTO_INCREMENT = 1")
-
-    # Reinsert base users
-    cursor.execute("""
-        INSERT INTO Users (username, password, role)
-        VALUES (%s, %s, %s)
-    """, ('admin1', 'adminpass123', 'Admin'))
-    cursor.execute("""
-        INSERT INTO Users (username, password, role)
-        VALUES (%s, %s, %s)
-    """, ('user1', 'userpass123', 'User'))
-
-    # Reinsert products
-    products = [
-        ('SKU001', 'Laptop', 'High-performance laptop', 5),
-        ('SKU002', 'Smartphone', 'Latest model smartphone', 10),
-        ('SKU003', 'Router', 'Dual-band WiFi router', 8),
-    ]
-    cursor.executemany(
-        "INSERT INTO Products (sku, name, description, threshold) VALUES (%s, %s, %s, %s)",
-        products,
-    )
 
-    # Reinsert inventory
-    inventory = [
-        ('SKU001', 'Warehouse A', 20),
-        ('SKU002', 'Warehouse B', 15),
-        ('SKU003', 'Warehouse A', 5),
-    ]
-    cursor.executemany(
-        "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s)",
-        inventory,
+def iter_logs(batch_size=STREAM_BATCH_SIZE, session=None):
+    """Stream log entries oldest first, including their ids."""
+    flush_logs(LOG_FLUSH_TIMEOUT)
+    return _iter_rows(
+        "SELECT log_id, user_id, action FROM Logs ORDER BY log_id",
+        batch_size=batch_size, session=session,
     )
 
-    # Reinsert routes
-    routes = [
-        ('Warehouse A', 'Retail Hub 1', 150.00, 25.5),
-        ('Warehouse A', 'Retail Hub 2', 120.00, 5.0),
-        ('Warehouse A', 'Retail Hub 3', 90.00, 10.0),
-        ('Warehouse B', 'Retail Hub 1', 70.00, 15.0),
-        ('Warehouse B', 'Retail Hub 2', 100.00, 25.0),
-        ('Warehouse B', 'Retail Hub 3', 175.00, 30.0),
-        ('Warehouse B', 'Warehouse A', 80.00, 20.0),
-        ('Warehouse A', 'Warehouse B', 100.00, 30.0),
-    ]
-    cursor.executemany(
-        "INSERT INTO Routes (origin, destination, cost, distance_km) VALUES (%s, %s, %s, %s)",
-        routes,
-    )
 
-    conn.commit()
-    write_log(1, "Simulation reset to initial state")
+def get_logs(session=None):
+    """Retrieve all system log entries."""
+    flush_logs(LOG_FLUSH_TIMEOUT)
+    with _cursor(session) as cursor:
+        cursor.execute("""
+            SELECT user_id, action
+            FROM Logs
+            ORDER BY log_id DESC
+        """)
+        return cursor.fetchall()
+
 
-    cursor.close()
-    conn.close()
+def reset_simulation(session=None):
+    """Reset the simulation to its initial database state."""
+    flush_logs(LOG_FLUSH_TIMEOUT)
+    with _cursor(session, commit=True) as cursor:
+        # Clear dynamic tables
+        cursor.execute("DELETE FROM Orders")
+        cursor.execute("DELETE FROM Logistics")
+        cursor.execute("DELETE FROM DemandForecast")
+        cursor.execute("DELETE FROM Reports")
+        cursor.execute("DELETE FROM Logs")
+        cursor.execute("DELETE FROM Inventory")
+        cursor.execute("DELETE FROM Products")
+        cursor.execute("DELETE FROM Routes")
+        cursor.execute("DELETE FROM Users")
+
+        # Reset AUTO_INCREMENT
+        for table in [
+            "Users", "Orders", "Logistics", "DemandForecast",
+            "Reports", "Logs", "Inventory", "Routes"
+        ]:
+            cursor.execute(f"ALTER TABLE {table} AUTO_INCREMENT = 1")
+
+        # Reinsert base users
+        cursor.execute("""
+            INSERT INTO Users (username, password, role)
+            VALUES (%s, %s, %s)
+        """, ('admin1', 'adminpass123', 'Admin'))
+        cursor.execute("""
+            INSERT INTO Users (username, password, role)
+            VALUES (%s, %s, %s)
+        """, ('user1', 'userpass123', 'User'))
+
+        # Reinsert products
+        products = [
+            ('SKU001', 'Laptop', 'High-performance laptop', 5),
+            ('SKU002', 'Smartphone', 'Latest model smartphone', 10),
+            ('SKU003', 'Router', 'Dual-band WiFi router', 8),
+        ]
+        cursor.executemany(
+            "INSERT INTO Products (sku, name, description, threshold) VALUES (%s, %s, %s, %s)",
+            products,
+        )
 
+        # Reinsert inventory
+        inventory = [
+            ('SKU001', 'Warehouse A', 20),
+            ('SKU002', 'Warehouse B', 15),
+            ('SKU003', 'Warehouse A', 5),
+        ]
+        cursor.executemany(
+            "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s)",
+            inventory,
+        )
+
+        # Reinsert routes
+        routes = [
+            ('Warehouse A', 'Retail Hub 1', 150.00, 25.5),
+            ('Warehouse A', 'Retail Hub 2', 120.00, 5.0),
+            ('Warehouse A', 'Retail Hub 3', 90.00, 10.0),
+            ('Warehouse B', 'Retail Hub 1', 70.00, 15.0),
+            ('Warehouse B', 'Retail Hub 2', 100.00, 25.0),
+            ('Warehouse B', 'Retail Hub 3', 175.00, 30.0),
+            ('Warehouse B', 'Warehouse A', 80.00, 20.0),
+            ('Warehouse A', 'Warehouse B', 100.00, 30.0),
+        ]
+        cursor.executemany(
+            "INSERT INTO Routes (origin, destination, cost, distance_km) VALUES (%s, %s, %s, %s)",
+            routes,
+        )
 
-def validate_user(username, password):
+        rebuild_metrics(cursor)
+
+    _after_commit(session, lambda: invalidate_tables(
+        "Products", "Inventory", "Routes", "Orders", "Logistics", "DemandForecast",
+        "SummaryMetrics",
+    ))
+    _after_commit(session, invalidate_route_graph)
+    write_log(1, "Simulation reset to initial state", session=session)
+
+
+def validate_user(username, password, session=None):
     """Validate user credentials and return role info."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT user_id, role FROM Users WHERE username = %s AND password = %s",
-        (username, password),
-    )
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    with _cursor(session) as cursor:
+        cursor.execute(
+            "SELECT user_id, role FROM Users WHERE username = %s AND password = %s",
+            (username, password),
+        )
+        result = cursor.fetchone()
     if result:
         return {"user_id": result[0], "role": result[1]}
     return None
 
 
-def create_user(username, password):
+def create_user(username, password, session=None):
     """Create a new user with default 'User' role."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO Users (username, password, role)
-        VALUES (%s, %s, 'User')
-    """, (username, password))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with _cursor(session, commit=True) as cursor:
+        cursor.execute("""
+            INSERT INTO Users (username, password, role)
+            VALUES (%s, %s, 'User')
+        """, (username, password))
+
+
+# Time every public query function (see db/instrumentation.py).
+instrument_module(sys.modules[__name__])
@@ -0,0 +1,152 @@
+"""Cost-minimal rebalancing of low warehouse stock, with reorder suggestions.
+
+Every warehouse row below its product threshold is a demand for
+``threshold - quantity`` units. Every warehouse row above it can give its
+surplus, ``quantity - threshold``, without becoming low itself. For each
+SKU with a shortfall this is a transportation problem over the direct
+warehouse-to-warehouse routes, solved with ``solve_transportation`` from
+``db.allocation``. The shortfall no transfer can cover becomes a reorder
+suggestion.
+
+Only SKUs that are low somewhere are read, and a SKU's graph is limited to
+the warehouses holding it. Planning therefore scales with the shortfalls,
+not with the full catalog x location matrix.
+
+``plan_replenishment(apply=True)`` locks the rows, re-plans and writes all
+transfers in the same transaction with the set-based ``write_shipments``::
+
+    python -m db.replenishment            # dry run
+    python -m db.replenishment --apply
+"""
+
+import argparse
+import sys
+
+from db.allocation import solve_transportation
+from db.fulfillment import write_shipments
+from db.session import run_in_transaction
+
+
+def _load(cursor, lock):
+    # Only the constant locking clause is appended; no values reach the SQL text.
+    suffix = " FOR UPDATE" if lock else ""
+    cursor.execute("""
+        SELECT i.sku, i.location, i.quantity, p.threshold
+        FROM Inventory i
+        JOIN Products p ON i.sku = p.sku
+        WHERE i.location NOT LIKE 'Retail Hub%'
+          AND i.sku IN (
+              SELECT l.sku
+              FROM Inventory l
+              JOIN Products lp ON l.sku = lp.sku
+              WHERE l.quantity < lp.threshold AND l.location NOT LIKE 'Retail Hub%'
+          )
+        ORDER BY i.sku, i.location
+    """ + suffix)  # nosec B608
+    stock = cursor.fetchall()
+    cursor.execute(
+        "SELECT origin, destination, cost FROM Routes "
+        "WHERE origin NOT LIKE 'Retail Hub%' AND destination NOT LIKE 'Retail Hub%'"
+    )
+    routes = {(o, d): cost for o, d, cost in cursor.fetchall()}
+    return stock, routes
+
+
+def build_replenishment_plan(stock, routes):
+    """Return ``(transfers, reorders)`` for ``(sku, location, quantity, threshold)`` rows.
+
+    ``transfers`` are dicts with sku, origin, destination, quantity,
+    unit_cost and cost. ``reorders`` are dicts with sku, location, quantity
+    (the shortfall left after transfers), on_hand and threshold.
+    """
+    by_sku = {}
+    for sku, location, quantity, threshold in stock:
+        by_sku.setdefault(sku, []).append((location, quantity, threshold or 0))
+
+    transfers = []
+    reorders = []
+    for sku, rows in by_sku.items():
+        need = {loc: threshold - qty for loc, qty, threshold in rows if qty < threshold}
+        surplus = {loc: qty - threshold for loc, qty, threshold in rows if qty > threshold}
+        costs = {
+            (w, h): routes[(w, h)]
+            for w in surplus for h in need if (w, h) in routes
+        }
+        flows = solve_transportation(surplus, need, costs)
+        for (origin, destination), units in sorted(flows.items()):
+            need[destination] -= units
+            transfers.append({
+                "sku": sku,
+                "origin": origin,
+                "destination": destination,
+                "quantity": units,
+                "unit_cost": routes[(origin, destination)],
+                "cost": routes[(origin, destination)] * units,
+            })
+        for location, quantity, threshold in rows:
+            if need.get(location, 0) > 0:
+                reorders.append({
+                    "sku": sku,
+                    "location": location,
+                    "quantity": need[location],
+                    "on_hand": quantity,
+                    "threshold": threshold,
+                })
+    return transfers, reorders
+
+
+def summarize_replenishment(transfers, reorders):
+    """Return transfer and reorder counts, units and the total transfer cost."""
+    return {
+        "transfers": len(transfers),
+        "transfer_units": sum(t["quantity"] for t in transfers),
+        "transfer_cost": sum(t["cost"] for t in transfers),
+        "reorders": len(reorders),
+        "reorder_units": sum(r["quantity"] for r in reorders),
+    }
+
+
+def plan_replenishment(apply=False, user_id=1):
+    """Plan (and optionally execute) transfers that lift low warehouse stock to threshold.
+
+    Returns ``(transfers, reorders)`` as in ``build_replenishment_plan``.
+    With ``apply`` the stock rows of the affected SKUs are locked while
+    planning, and every transfer is written in the same transaction, which
+    is re-planned from scratch on a deadlock or lock wait timeout.
+    """
+    def plan(session):
+        stock, routes = _load(session.cursor, lock=apply)
+        transfers, reorders = build_replenishment_plan(stock, routes)
+        if apply and transfers:
+            write_shipments(
+                session,
+                [(t["sku"], t["origin"], t["destination"], t["quantity"], t["cost"])
+                 for t in transfers],
+                [],
+                [f"Rebalanced {t['quantity']} units of {t['sku']} from {t['origin']} "
+                 f"to {t['destination']} (₹{t['cost']:.2f})"
+                 for t in transfers],
+                user_id,
+            )
+        return transfers, reorders
+
+    return run_in_transaction(plan)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Rebalance low SCMS warehouse stock.")
+    parser.add_argument("--apply", action="store_true", help="execute the transfers")
+    args = parser.parse_args(argv)
+
+    transfers, reorders = plan_replenishment(apply=args.apply)
+    summary = summarize_replenishment(transfers, reorders)
+    action = "Executed" if args.apply else "Planned"
+    print(f"{action} {summary['transfers']:,} transfers ({summary['transfer_units']:,} units, "
+          f"₹{summary['transfer_cost']:,.2f}); {summary['reorders']:,} reorders "
+          f"({summary['reorder_units']:,} units) still needed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
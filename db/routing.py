@@ -0,0 +1,196 @@
+"""In-memory route graph with multi-hop shortest paths over the Routes table.
+
+The Routes table is loaded once into an adjacency map. Shortest paths are
+computed with Dijkstra's algorithm, weighted by per-unit ``cost`` or by
+``distance_km``. The single-source tree for each (origin, weight) pair is
+memoised, so repeated lookups are a dictionary walk with no database round
+trip.
+
+Edge updates are applied in place. A cached tree is only dropped when the
+change can affect it: the edge was on the tree and got worse or was removed,
+or the edge now offers a shorter way into its destination.
+
+Writes made through ``db.queries`` update the process-wide graph directly.
+Writes from other processes cannot, so the graph is also reloaded once it is
+``SCMS_ROUTE_GRAPH_TTL`` seconds old (default: the ``SCMS_CACHE_TTL`` of the
+reference cache, 300).
+"""
+
+import heapq
+import os
+import threading
+import time
+from decimal import Decimal
+
+from db.connection import get_connection
+
+WEIGHTS = ("cost", "distance")
+ROUTE_GRAPH_TTL = float(os.getenv("SCMS_ROUTE_GRAPH_TTL", os.getenv("SCMS_CACHE_TTL", "300")))
+
+
+def _edge(cost, distance):
+    return {"cost": Decimal(str(cost)), "distance": Decimal(str(distance or 0))}
+
+
+class RouteGraph:
+    """Directed graph of locations with cost and distance on each edge.
+
+    Costs and distances are stored as ``Decimal`` like the values loaded from
+    MySQL, whatever numeric type they are given as, so any path can be summed.
+    """
+
+    def __init__(self, routes=()):
+        self._edges = {}  # origin -> {destination: {"cost": ..., "distance": ...}}
+        self._trees = {}  # (origin, weight) -> (dist, prev)
+        self._lock = threading.RLock()
+        self.version = 0
+        for origin, destination, cost, distance in routes:
+            self._edges.setdefault(origin, {})[destination] = _edge(cost, distance)
+
+    # ------------------------- graph edits ------------------------- #
+    def set_route(self, origin, destination, cost, distance):
+        """Add or update an edge, invalidating only the trees it can change."""
+        with self._lock:
+            old = self._edges.get(origin, {}).get(destination)
+            edge = _edge(cost, distance)
+            self._edges.setdefault(origin, {})[destination] = edge
+            for key in list(self._trees):
+                weight = key[1]
+                dist, prev = self._trees[key]
+                uses_edge = prev.get(destination) == origin
+                got_worse = old is not None and edge[weight] > old[weight]
+                if uses_edge and got_worse:
+                    del self._trees[key]
+                elif origin in dist and (
+                    destination not in dist
+                    or dist[origin] + edge[weight] < dist[destination]
+                ):
+                    del self._trees[key]
+            self.version += 1
+
+    def remove_route(self, origin, destination):
+        """Remove an edge, invalidating the trees that routed through it."""
+        with self._lock:
+            if self._edges.get(origin, {}).pop(destination, None) is None:
+                return
+            for key in list(self._trees):
+                if self._trees[key][1].get(destination) == origin:
+                    del self._trees[key]
+            self.version += 1
+
+    # ------------------------- queries ------------------------- #
+    def nodes(self):
+        """Return every location that appears in the graph."""
+        with self._lock:
+            found = set(self._edges)
+            for targets in self._edges.values():
+                found.update(targets)
+            return found
+
+    def edge(self, origin, destination):
+        """Return the direct edge between two locations, or None."""
+        with self._lock:
+            return self._edges.get(origin, {}).get(destination)
+
+    def shortest_path(self, origin, destination, weight="cost"):
+        """Return the cheapest (or shortest) multi-leg path, or None if unreachable.
+
+        The result holds the ordered ``legs`` (dicts with origin, destination,
+        cost and distance), the visited ``path`` and the ``cost`` and
+        ``distance`` totals. Costs are per unit, as in the Routes table.
+        """
+        if weight not in WEIGHTS:
+            raise ValueError(f"weight must be one of {WEIGHTS}")
+        if origin == destination:
+            return None
+        # Walk the tree and read its edges under the lock, so a concurrent
+        # edit cannot remove an edge between the two.
+        with self._lock:
+            dist, prev = self._tree(origin, weight)
+            if destination not in dist:
+                return None
+
+            path = [destination]
+            while path[-1] != origin:
+                path.append(prev[path[-1]])
+            path.reverse()
+
+            legs = []
+            for leg_origin, leg_destination in zip(path, path[1:]):
+                edge = self._edges[leg_origin][leg_destination]
+                legs.append({
+                    "origin": leg_origin,
+                    "destination": leg_destination,
+                    "cost": edge["cost"],
+                    "distance": edge["distance"],
+                })
+        return {
+            "path": path,
+            "legs": legs,
+            "cost": sum(leg["cost"] for leg in legs),
+            "distance": sum(leg["distance"] for leg in legs),
+        }
+
+    def _tree(self, origin, weight):
+        key = (origin, weight)
+        with self._lock:
+            tree = self._trees.get(key)
+            if tree is None:
+                tree = self._dijkstra(origin, weight)
+                self._trees[key] = tree
+            return tree
+
+    def _dijkstra(self, origin, weight):
+        dist = {origin: 0}
+        prev = {}
+        heap = [(0, origin)]
+        done = set()
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            for neighbour, edge in self._edges.get(node, {}).items():
+                candidate = d + edge[weight]
+                if neighbour not in dist or candidate < dist[neighbour]:
+                    dist[neighbour] = candidate
+                    prev[neighbour] = node
+                    heapq.heappush(heap, (candidate, neighbour))
+        return dist, prev
+
+
+def load_route_graph():
+    """Build a RouteGraph from the Routes table."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT origin, destination, cost, distance_km FROM Routes")
+        return RouteGraph(cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.close()
+
+
+_graph = None
+_graph_expires = 0.0
+_graph_lock = threading.Lock()
+
+
+def get_route_graph():
+    """Return the process-wide route graph, (re)loading it when missing or expired."""
+    global _graph, _graph_expires  # pylint: disable=global-statement
+    graph = _graph
+    if graph is None or time.monotonic() >= _graph_expires:
+        with _graph_lock:
+            if _graph is None or time.monotonic() >= _graph_expires:
+                _graph = load_route_graph()
+                _graph_expires = time.monotonic() + ROUTE_GRAPH_TTL
+            graph = _graph
+    return graph
+
+
+def invalidate_route_graph():
+    """Drop the process-wide graph so it is reloaded on next use."""
+    global _graph  # pylint: disable=global-statement
+    with _graph_lock:
+        _graph = None
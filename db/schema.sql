@@ -1,3 +1,4 @@
+-- Baseline schema. Apply later changes with: python -m db.migrate (see db/migrations).
 DROP DATABASE IF EXISTS scms;
 CREATE DATABASE scms;
 USE scms;
@@ -36,8 +37,10 @@ CREATE TABLE Orders (
     customer_name VARCHAR(100),
     customer_location VARCHAR(100) NOT NULL,
     status ENUM('Pending', 'Processed') DEFAULT 'Pending',
+    order_date DATE NOT NULL DEFAULT (CURRENT_DATE),
     FOREIGN KEY (sku) REFERENCES Products(sku),
-    INDEX idx_status (status)  
+    INDEX idx_status (status),
+    INDEX idx_orders_date (order_date, sku)
 ) ENGINE=InnoDB;
 
 -- Logistics Table
@@ -67,7 +70,8 @@ CREATE TABLE DemandForecast (
     sku VARCHAR(20) NOT NULL,
     forecast_value INT NOT NULL,
     forecast_date DATE NOT NULL,
-    FOREIGN KEY (sku) REFERENCES Products(sku)
+    FOREIGN KEY (sku) REFERENCES Products(sku),
+    INDEX idx_forecast_sku_date (sku, forecast_date)
 ) ENGINE=InnoDB;
 
 -- Reports Table
@@ -85,6 +89,20 @@ CREATE TABLE Logs (
     FOREIGN KEY (user_id) REFERENCES Users(user_id)
 ) ENGINE=InnoDB;
 
+-- Summary Metrics (single row, maintained by the mutating query functions)
+CREATE TABLE SummaryMetrics (
+    metric_id TINYINT PRIMARY KEY,
+    total_orders BIGINT NOT NULL DEFAULT 0,
+    processed_orders BIGINT NOT NULL DEFAULT 0,
+    low_stock_items INT NOT NULL DEFAULT 0,
+    total_logistics_cost DECIMAL(14, 2) NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+
+-- SKUs currently below threshold at some warehouse
+CREATE TABLE LowStockSkus (
+    sku VARCHAR(20) PRIMARY KEY
+) ENGINE=InnoDB;
+
 -- Sample Users
 INSERT INTO Users (username, password, role) VALUES
 ('admin1', 'adminpass123', 'Admin'),
@@ -113,6 +131,21 @@ INSERT INTO Routes (origin, destination, cost, distance_km) VALUES
 ('Warehouse B', 'Warehouse A', 80.00, 20.0),
 ('Warehouse A', 'Warehouse B', 100.00, 30.0);
 
+-- Initial Summary Metrics
+INSERT INTO LowStockSkus (sku)
+SELECT DISTINCT i.sku
+FROM Inventory i
+JOIN Products p ON i.sku = p.sku
+WHERE i.quantity < p.threshold AND i.location NOT LIKE 'Retail Hub%';
+
+INSERT INTO SummaryMetrics
+    (metric_id, total_orders, processed_orders, low_stock_items, total_logistics_cost)
+SELECT 1,
+       (SELECT COUNT(*) FROM Orders),
+       (SELECT COUNT(*) FROM Orders WHERE status = 'Processed'),
+       (SELECT COUNT(*) FROM LowStockSkus),
+       (SELECT COALESCE(SUM(transport_cost), 0) FROM Logistics);
+
 -- Sample Queries 
 SELECT * FROM Users; 
 SELECT * FROM Products; 
@@ -0,0 +1,143 @@
+-- SQLite baseline, mirroring db/schema.sql for SCMS_DB_BACKEND=sqlite.
+-- Applied automatically on first connect, followed by db/migrations.
+-- Text columns use NOCASE like MySQL's default collation, and the length
+-- checks stand in for MySQL strict mode rejecting over-long VARCHARs.
+
+-- Users Table
+CREATE TABLE Users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(50) NOT NULL UNIQUE COLLATE NOCASE CHECK (length(username) <= 50),
+    password VARCHAR(100) NOT NULL CHECK (length(password) <= 100),
+    role TEXT NOT NULL CHECK (role IN ('Admin', 'User'))
+);
+
+-- Products Table
+CREATE TABLE Products (
+    sku VARCHAR(20) NOT NULL PRIMARY KEY COLLATE NOCASE CHECK (length(sku) <= 20),
+    name VARCHAR(100) NOT NULL CHECK (length(name) <= 100),
+    description TEXT,
+    threshold INT DEFAULT 10
+);
+
+-- Inventory Table
+CREATE TABLE Inventory (
+    inventory_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sku VARCHAR(20) NOT NULL COLLATE NOCASE REFERENCES Products(sku),
+    location VARCHAR(100) NOT NULL COLLATE NOCASE CHECK (length(location) <= 100),
+    quantity INT DEFAULT 0 CHECK (quantity >= 0),
+    CONSTRAINT unique_sku_location UNIQUE (sku, location)
+);
+
+-- Orders Table
+CREATE TABLE Orders (
+    order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sku VARCHAR(20) NOT NULL COLLATE NOCASE REFERENCES Products(sku),
+    quantity INT NOT NULL,
+    customer_name VARCHAR(100) COLLATE NOCASE CHECK (length(customer_name) <= 100),
+    customer_location VARCHAR(100) NOT NULL COLLATE NOCASE
+        CHECK (length(customer_location) <= 100),
+    status TEXT DEFAULT 'Pending' CHECK (status IN ('Pending', 'Processed')),
+    order_date DATE NOT NULL DEFAULT CURRENT_DATE
+);
+CREATE INDEX idx_status ON Orders (status);
+CREATE INDEX idx_orders_date ON Orders (order_date, sku);
+
+-- Logistics Table
+CREATE TABLE Logistics (
+    logistics_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sku VARCHAR(20) NOT NULL COLLATE NOCASE REFERENCES Products(sku),
+    origin VARCHAR(100) NOT NULL COLLATE NOCASE CHECK (length(origin) <= 100),
+    destination VARCHAR(100) NOT NULL COLLATE NOCASE CHECK (length(destination) <= 100),
+    transport_cost DECIMAL(10,2) NOT NULL
+);
+
+-- Routes Table
+CREATE TABLE Routes (
+    route_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin VARCHAR(100) NOT NULL COLLATE NOCASE CHECK (length(origin) <= 100),
+    destination VARCHAR(100) NOT NULL COLLATE NOCASE CHECK (length(destination) <= 100),
+    cost DECIMAL(10,2) NOT NULL,
+    distance_km DECIMAL(6,2),
+    CONSTRAINT unique_route UNIQUE (origin, destination)
+);
+CREATE INDEX idx_origin_dest ON Routes (origin, destination);
+
+-- Demand Forecast Table
+CREATE TABLE DemandForecast (
+    forecast_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sku VARCHAR(20) NOT NULL COLLATE NOCASE REFERENCES Products(sku),
+    forecast_value INT NOT NULL,
+    forecast_date DATE NOT NULL
+);
+CREATE INDEX idx_forecast_sku_date ON DemandForecast (sku, forecast_date);
+
+-- Reports Table
+CREATE TABLE Reports (
+    report_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    generated_by VARCHAR(50) NOT NULL,
+    summary TEXT
+);
+
+-- Logs Table
+CREATE TABLE Logs (
+    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES Users(user_id),
+    action TEXT NOT NULL
+);
+
+-- Summary Metrics (single row, maintained by the mutating query functions)
+CREATE TABLE SummaryMetrics (
+    metric_id TINYINT PRIMARY KEY,
+    total_orders BIGINT NOT NULL DEFAULT 0,
+    processed_orders BIGINT NOT NULL DEFAULT 0,
+    low_stock_items INT NOT NULL DEFAULT 0,
+    total_logistics_cost DECIMAL(14, 2) NOT NULL DEFAULT 0
+);
+
+-- SKUs currently below threshold at some warehouse
+CREATE TABLE LowStockSkus (
+    sku VARCHAR(20) NOT NULL PRIMARY KEY COLLATE NOCASE
+);
+
+-- Sample Users
+INSERT INTO Users (username, password, role) VALUES
+('admin1', 'adminpass123', 'Admin'),
+('user1', 'userpass123', 'User');
+
+-- Sample Products
+INSERT INTO Products (sku, name, description, threshold) VALUES
+('SKU001', 'Laptop', 'High-performance laptop', 5),
+('SKU002', 'Smartphone', 'Latest model smartphone', 10),
+('SKU003', 'Router', 'Dual-band WiFi router', 8);
+
+-- Sample Inventory
+INSERT INTO Inventory (sku, location, quantity) VALUES
+('SKU001', 'Warehouse A', 20),
+('SKU002', 'Warehouse B', 15),
+('SKU003', 'Warehouse A', 5);
+
+-- Sample Routes
+INSERT INTO Routes (origin, destination, cost, distance_km) VALUES
+('Warehouse A', 'Retail Hub 1', 150.00, 25.5),
+('Warehouse A', 'Retail Hub 2', 120.00, 5.0),
+('Warehouse A', 'Retail Hub 3', 90.00, 10.0),
+('Warehouse B', 'Retail Hub 1', 70.00, 15.0),
+('Warehouse B', 'Retail Hub 2', 100.00, 25.0),
+('Warehouse B', 'Retail Hub 3', 175.00, 30.0),
+('Warehouse B', 'Warehouse A', 80.00, 20.0),
+('Warehouse A', 'Warehouse B', 100.00, 30.0);
+
+-- Initial Summary Metrics
+INSERT INTO LowStockSkus (sku)
+SELECT DISTINCT i.sku
+FROM Inventory i
+JOIN Products p ON i.sku = p.sku
+WHERE i.quantity < p.threshold AND i.location NOT LIKE 'Retail Hub%';
+
+INSERT INTO SummaryMetrics
+    (metric_id, total_orders, processed_orders, low_stock_items, total_logistics_cost)
+SELECT 1,
+       (SELECT COUNT(*) FROM Orders),
+       (SELECT COUNT(*) FROM Orders WHERE status = 'Processed'),
+       (SELECT COUNT(*) FROM LowStockSkus),
+       (SELECT COALESCE(SUM(transport_cost), 0) FROM Logistics);
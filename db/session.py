@@ -0,0 +1,120 @@
+"""Unit-of-work sessions that let several query functions share one transaction.
+
+Usage::
+
+    with transaction() as session:
+        move_order_to_customer(order_id, sku, qty, origin, dest, session=session)
+        update_order_status(order_id, "Processed", session=session)
+        write_log(1, f"Processed order #{order_id}", session=session)
+
+Every function in ``db.queries`` accepts an optional ``session``. When one is
+given the function runs on the session's connection and does not commit;
+audit log rows are buffered and inserted with a single ``executemany`` right
+before the one ``COMMIT``.
+
+``run_in_transaction(fn)`` does the same for ``fn(session)`` and re-runs the
+whole transaction, with jittered exponential backoff, when MySQL aborts it
+with a deadlock or lock-wait timeout.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+
+from db.connection import get_connection
+from db.log_writer import INSERT_LOGS_SQL
+
+# ER_LOCK_DEADLOCK and ER_LOCK_WAIT_TIMEOUT: safe to retry from the start.
+RETRYABLE_ERRORS = {1213, 1205}
+DEADLOCK_RETRIES = 3
+RETRY_BACKOFF = 0.02
+
+
+class Session:
+    """One borrowed connection and cursor, committed once as a unit."""
+
+    def __init__(self, conn):
+        self.connection = conn
+        self.cursor = conn.cursor(buffered=True)
+        self._logs = []
+        self._before_commit = []
+        self._after_commit = []
+        # Per-transaction state of before-commit work, keyed by its owner.
+        self.deferred = {}
+
+    def log(self, user_id, action):
+        """Buffer an audit log row to be written with the commit."""
+        self._logs.append((user_id, action))
+
+    def before_commit(self, callback):
+        """Run ``callback`` as the last statement(s) of the transaction, before ``COMMIT``."""
+        self._before_commit.append(callback)
+
+    def after_commit(self, callback):
+        """Run ``callback`` once the transaction has committed successfully."""
+        self._after_commit.append(callback)
+
+    def commit(self):
+        """Write buffered logs, run before-commit work, commit, then run after-commit callbacks."""
+        if self._logs:
+            self.cursor.executemany(INSERT_LOGS_SQL, self._logs)
+            self._logs = []
+        callbacks, self._before_commit = self._before_commit, []
+        for callback in callbacks:
+            callback()
+        self.deferred = {}
+        self.connection.commit()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
+
+    def rollback(self):
+        """Discard all work done in this session, including buffered logs."""
+        self._logs = []
+        self._before_commit = []
+        self._after_commit = []
+        self.deferred = {}
+        self.connection.rollback()
+
+    def close(self):
+        """Release the cursor and return the connection to the pool."""
+        self.cursor.close()
+        self.connection.close()
+
+
+@contextmanager
+def transaction():
+    """Yield a ``Session`` that commits on success and rolls back on error."""
+    session = Session(get_connection())
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def run_in_transaction(fn, retries=DEADLOCK_RETRIES, backoff=RETRY_BACKOFF, on_retry=None):
+    """Return ``fn(session)`` run in its own transaction, retrying deadlocks.
+
+    A deadlock or lock-wait timeout rolls the attempt back and retries it up to
+    ``retries`` times, sleeping ``backoff * 2**attempt`` (+/-50 % jitter)
+    in between. ``on_retry(error, attempt)`` is called before each retry.
+    ``fn`` must therefore be safe to re-run.
+    """
+    for attempt in range(retries + 1):
+        try:
+            with transaction() as session:
+                return fn(session)
+        except mysql.connector.Error as e:
+            if e.errno not in RETRYABLE_ERRORS or attempt == retries:
+                raise
+            if on_retry is not None:
+                on_retry(e, attempt)
+            # Jitter only spreads retries out; it need not be unpredictable.
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))  # nosec B311
+    return None  # unreachable; the last attempt returns or raises
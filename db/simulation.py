@@ -0,0 +1,426 @@
+"""Discrete-event supply chain simulation over an in-memory snapshot.
+
+Products, Inventory and Routes are read once into a ``Snapshot``. A run then
+never touches the database: events sit on a heap ordered by simulated time
+(hours) and are processed one at a time.
+
+* ``order`` - a customer order arrives at a retail hub. Arrivals form a
+  Poisson process of ``orders_per_day``; SKUs are drawn from a Zipf-like
+  distribution over the stocked SKUs (``skew`` 0 = uniform). The order ships
+  from the cheapest warehouse with enough stock and a direct route to the
+  hub, like ``fulfill_pending_orders``; otherwise it is backordered.
+* ``delivery`` - a shipment reaches its hub.
+* ``arrival`` - a transfer or supplier replenishment reaches a warehouse;
+  backordered orders for that SKU are retried oldest first.
+
+Lead times come from ``Routes.distance_km``: ``handling_hours`` plus the
+distance at ``speed_kmh``. Whenever a warehouse row's stock position (on hand
+plus on order) drops below the product threshold it is topped up to
+``order_up_to`` times the threshold. Stock is transferred from the cheapest
+warehouse that stays at or above its own threshold, or else reordered from
+the supplier with ``supplier_lead_hours``.
+
+``persist_run`` writes the simulated Orders, Logistics rows and audit log
+in one transaction. Orders are dated from ``start_date`` plus their
+simulated day, so a run that starts in the past backfills order history.
+Inventory is left as it was, so the same snapshot can be replayed::
+
+    python -m db.simulation --days 90 --orders-per-day 400
+    python -m db.simulation --days 30 --seed 7 --persist --json sim.json
+    python -m db.simulation --days 180 --start-date 2025-01-01 --persist
+"""
+
+import argparse
+import heapq
+import json
+import random
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import islice
+
+from db.cache import invalidate_tables
+from db.connection import get_connection
+from db.loadtest import percentile, zipf_weights
+from db.metrics import adjust_metrics
+from db.session import run_in_transaction
+
+HOURS_PER_DAY = 24
+SPEED_KMH = 60.0
+HANDLING_HOURS = 4.0
+SUPPLIER_LEAD_HOURS = 72.0
+ORDER_UP_TO = 3
+DEFAULT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class Snapshot:
+    """The tables a simulation reads, loaded once."""
+
+    thresholds: dict  # sku -> threshold
+    stock: dict  # (sku, location) -> quantity, warehouses only
+    routes: dict  # (origin, destination) -> (cost, distance_km)
+
+    def hubs(self):
+        """Return the retail hubs that routes lead to."""
+        return sorted({d for _, d in self.routes if d.startswith("Retail Hub")})
+
+    def stocked_skus(self):
+        """Return SKUs held at a warehouse with a route to a hub, most stock first."""
+        shipping = {o for o, d in self.routes if d.startswith("Retail Hub")}
+        totals = {}
+        for (sku, location), quantity in self.stock.items():
+            if location in shipping:
+                totals[sku] = totals.get(sku, 0) + quantity
+        return [sku for sku, total in sorted(totals.items(), key=lambda t: (-t[1], t[0]))
+                if total > 0]
+
+
+def load_snapshot():
+    """Read Products, warehouse Inventory and Routes into a ``Snapshot``."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT sku, threshold FROM Products")
+        thresholds = {sku: threshold or 0 for sku, threshold in cursor.fetchall()}
+        cursor.execute(
+            "SELECT sku, location, quantity FROM Inventory "
+            "WHERE location NOT LIKE 'Retail Hub%'"
+        )
+        stock = {(sku, location): quantity for sku, location, quantity in cursor.fetchall()}
+        cursor.execute("SELECT origin, destination, cost, distance_km FROM Routes")
+        routes = {(o, d): (cost, distance) for o, d, cost, distance in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+    return Snapshot(thresholds, stock, routes)
+
+
+class Simulation:
+    """One seeded simulation run over a copy of a snapshot's stock."""
+
+    def __init__(self, snapshot, orders_per_day=200.0, max_quantity=5, skew=1.0, seed=42,
+                 speed_kmh=SPEED_KMH, handling_hours=HANDLING_HOURS,
+                 supplier_lead_hours=SUPPLIER_LEAD_HOURS, order_up_to=ORDER_UP_TO,
+                 start_date=None):
+        if orders_per_day <= 0:
+            raise ValueError("orders_per_day must be positive")
+        self.snapshot = snapshot
+        self.skus = snapshot.stocked_skus()
+        self.hubs = snapshot.hubs()
+        if not self.skus or not self.hubs:
+            raise ValueError("No stocked SKUs with routes to a retail hub")
+        self.orders_per_day = orders_per_day
+        self.max_quantity = max_quantity
+        self.speed_kmh = speed_kmh
+        self.handling_hours = handling_hours
+        self.supplier_lead_hours = supplier_lead_hours
+        self.order_up_to = order_up_to
+        self.start_date = start_date or date.today()
+        # Seeded for reproducible runs, not for anything security related.
+        self._rng = random.Random(seed)  # nosec B311
+        self._weights = zipf_weights(len(self.skus), skew)
+
+        self.now = 0.0
+        self.stock = dict(snapshot.stock)
+        self._on_order = {}
+        self._heap = []
+        self._seq = 0
+        self._backlog = {}  # sku -> deque of (order index, placed at) waiting for stock
+        self._locations = {}  # sku -> warehouses holding it
+        for sku, location in self.stock:
+            self._locations.setdefault(sku, []).append(location)
+        self._options = {}  # (sku, hub) -> [(cost, location, lead_hours)] cheapest first
+
+        # Results, in the shape persist_run writes them.
+        self.orders = []  # [sku, quantity, customer, hub, status, order_date]
+        self.shipments = []  # (sku, origin, destination, cost)
+        self.log = []
+        self._lead_times = []
+        self._daily = []
+        self.counts = dict.fromkeys((
+            "events", "fulfilled", "backordered", "delivered", "transfers",
+            "transfer_units", "replenishments", "replenished_units", "units_shipped",
+        ), 0)
+        self.transport_cost = 0
+        self.transfer_cost = 0
+        self.elapsed = 0.0
+
+    # ------------------------- scheduling ------------------------- #
+    def _schedule(self, at, kind, payload):
+        self._seq += 1
+        heapq.heappush(self._heap, (at, self._seq, kind, payload))
+
+    def lead_hours(self, origin, destination):
+        """Return the transit time of the direct route, in hours."""
+        distance = self.snapshot.routes[(origin, destination)][1] or 0
+        return self.handling_hours + float(distance) / self.speed_kmh
+
+    def _next_arrival(self):
+        self._schedule(
+            self.now + self._rng.expovariate(self.orders_per_day / HOURS_PER_DAY), "order", None
+        )
+
+    # ------------------------- events ------------------------- #
+    def _on_order_arrival(self, _):
+        sku = self._rng.choices(self.skus, cum_weights=self._weights)[0]
+        hub = self._rng.choice(self.hubs)
+        quantity = self._rng.randint(1, self.max_quantity)
+        customer = f"sim-customer{self._rng.randrange(1000)}"
+        index = len(self.orders)
+        order_date = self.start_date + timedelta(days=int(self.now // HOURS_PER_DAY))
+        self.orders.append([sku, quantity, customer, hub, "Pending", order_date])
+        if not self._ship(index, placed=self.now):
+            self.counts["backordered"] += 1
+            self._backlog.setdefault(sku, deque()).append((index, self.now))
+            for location in self._locations.get(sku, ()):
+                self._review(sku, location)
+        self._next_arrival()
+
+    def _on_delivery(self, payload):
+        self.counts["delivered"] += 1
+        self._lead_times.append(self.now - payload)
+
+    def _on_stock_arrival(self, payload):
+        sku, location, quantity = payload
+        self.stock[(sku, location)] = self.stock.get((sku, location), 0) + quantity
+        self._on_order[(sku, location)] -= quantity
+        waiting = self._backlog.get(sku)
+        if waiting:
+            still_waiting = deque(
+                (index, placed) for index, placed in waiting if not self._ship(index, placed)
+            )
+            self._backlog[sku] = still_waiting
+
+    _HANDLERS = {
+        "order": _on_order_arrival,
+        "delivery": _on_delivery,
+        "arrival": _on_stock_arrival,
+    }
+
+    # ------------------------- policies ------------------------- #
+    def _origins(self, sku, hub):
+        key = (sku, hub)
+        if key not in self._options:
+            self._options[key] = sorted(
+                (self.snapshot.routes[(location, hub)][0], location,
+                 self.lead_hours(location, hub))
+                for location in self._locations.get(sku, ())
+                if (location, hub) in self.snapshot.routes
+            )
+        return self._options[key]
+
+    def _ship(self, index, placed):
+        """Ship order ``index`` from the cheapest stocked origin; False if none can."""
+        order = self.orders[index]
+        sku, quantity, _, hub, *_ = order
+        for cost, location, lead in self._origins(sku, hub):
+            if self.stock[(sku, location)] >= quantity:
+                self.stock[(sku, location)] -= quantity
+                order[4] = "Processed"
+                total = cost * quantity
+                self.shipments.append((sku, location, hub, total))
+                self.transport_cost += total
+                self.counts["fulfilled"] += 1
+                self.counts["units_shipped"] += quantity
+                self._schedule(self.now + lead, "delivery", placed)
+                self._review(sku, location)
+                return True
+        return False
+
+    def _review(self, sku, location):
+        """Top up a warehouse row whose stock position fell below its threshold."""
+        threshold = self.snapshot.thresholds.get(sku, 0)
+        position = self.stock[(sku, location)] + self._on_order.get((sku, location), 0)
+        if threshold <= 0 or position >= threshold:
+            return
+        quantity = threshold * self.order_up_to - position
+        self._on_order[(sku, location)] = self._on_order.get((sku, location), 0) + quantity
+
+        sources = sorted(
+            (self.snapshot.routes[(source, location)][0], source)
+            for source in self._locations[sku]
+            if (source, location) in self.snapshot.routes
+            and self.stock[(sku, source)] - quantity >= threshold
+        )
+        if sources:
+            cost, source = sources[0]
+            self.stock[(sku, source)] -= quantity
+            total = cost * quantity
+            self.shipments.append((sku, source, location, total))
+            self.transfer_cost += total
+            self.counts["transfers"] += 1
+            self.counts["transfer_units"] += quantity
+            self.log.append(f"Simulated transfer of {quantity} units of {sku} "
+                            f"from {source} to {location}")
+            arrive = self.now + self.lead_hours(source, location)
+        else:
+            self.counts["replenishments"] += 1
+            self.counts["replenished_units"] += quantity
+            self.log.append(f"Simulated replenishment of {quantity} units of {sku} "
+                            f"at {location}")
+            arrive = self.now + self.supplier_lead_hours
+        self._schedule(arrive, "arrival", (sku, location, quantity))
+
+    # ------------------------- running ------------------------- #
+    def _record_day(self, day):
+        self._daily.append({
+            "day": day,
+            "orders": len(self.orders),
+            "fulfilled": self.counts["fulfilled"],
+            "backlog": sum(len(waiting) for waiting in self._backlog.values()),
+            "stock": sum(self.stock.values()),
+        })
+
+    def run(self, days):
+        """Simulate ``days`` days of activity and return ``stats()``."""
+        started = time.perf_counter()
+        end = days * HOURS_PER_DAY
+        if not self._heap:
+            self._next_arrival()
+        day = int(self.now // HOURS_PER_DAY)
+        while self._heap and self._heap[0][0] <= end:
+            at, _, kind, payload = heapq.heappop(self._heap)
+            while at >= (day + 1) * HOURS_PER_DAY:
+                day += 1
+                self._record_day(day)
+            self.now = at
+            self.counts["events"] += 1
+            self._HANDLERS[kind](self, payload)
+        while day < days:
+            day += 1
+            self._record_day(day)
+        self.now = end
+        self.elapsed += time.perf_counter() - started
+        return self.stats()
+
+    def stats(self):
+        """Return the run statistics, including a per-day series."""
+        lead_times = sorted(self._lead_times)
+        elapsed = self.elapsed
+        counts = self.counts
+        return {
+            "days": self.now / HOURS_PER_DAY,
+            "orders": len(self.orders),
+            **counts,
+            "open_backorders": sum(len(waiting) for waiting in self._backlog.values()),
+            "fill_rate": (
+                (len(self.orders) - counts["backordered"]) / len(self.orders)
+                if self.orders else 0.0
+            ),
+            "transport_cost": self.transport_cost,
+            "transfer_cost": self.transfer_cost,
+            "lead_time_hours": {
+                "mean": sum(lead_times) / len(lead_times) if lead_times else 0.0,
+                "p50": percentile(lead_times, 0.50),
+                "p95": percentile(lead_times, 0.95),
+            },
+            "ending_stock": sum(self.stock.values()),
+            "elapsed_s": elapsed,
+            "events_per_sec": counts["events"] / elapsed if elapsed else 0.0,
+            "daily": list(self._daily),
+        }
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def persist_run(simulation, user_id=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write a run's Orders, Logistics rows and log in one transaction.
+
+    Rows are inserted with multi-row ``executemany`` chunks and the summary
+    metrics adjusted to match. Returns ``{"orders": n, "logistics": n,
+    "logs": n}``.
+    """
+    stats = simulation.stats()
+    summary = (
+        f"Simulated {stats['days']:.0f} days: {stats['orders']} orders, "
+        f"{stats['fulfilled']} fulfilled, {stats['transfers']} transfers, "
+        f"{stats['replenishments']} replenishments"
+    )
+    logs = [*simulation.log, summary]
+
+    def write(session):
+        cursor = session.cursor
+        for chunk in _chunks(simulation.orders, chunk_size):
+            cursor.executemany(
+                "INSERT INTO Orders "
+                "(sku, quantity, customer_name, customer_location, status, order_date) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                chunk,
+            )
+        for chunk in _chunks(simulation.shipments, chunk_size):
+            cursor.executemany(
+                "INSERT INTO Logistics (sku, origin, destination, transport_cost) "
+                "VALUES (%s, %s, %s, %s)",
+                chunk,
+            )
+        adjust_metrics(
+            cursor,
+            total_orders=len(simulation.orders),
+            processed_orders=stats["fulfilled"],
+            total_logistics_cost=sum(cost for *_, cost in simulation.shipments),
+        )
+        for action in logs:
+            session.log(user_id, action)
+        session.after_commit(lambda: invalidate_tables("Orders", "Logistics"))
+
+    run_in_transaction(write)
+    return {
+        "orders": len(simulation.orders),
+        "logistics": len(simulation.shipments),
+        "logs": len(logs),
+    }
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Run a discrete-event SCMS simulation.")
+    parser.add_argument("--days", type=float, default=90.0)
+    parser.add_argument("--orders-per-day", type=float, default=200.0)
+    parser.add_argument("--max-quantity", type=int, default=5)
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent, 0 = uniform")
+    parser.add_argument("--speed-kmh", type=float, default=SPEED_KMH)
+    parser.add_argument("--supplier-lead-hours", type=float, default=SUPPLIER_LEAD_HOURS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start-date", type=date.fromisoformat,
+                        help="date of simulated day 0 (default today)")
+    parser.add_argument("--persist", action="store_true", help="write the results")
+    parser.add_argument("--json", help="write the full statistics here")
+    args = parser.parse_args(argv)
+
+    simulation = Simulation(
+        load_snapshot(), orders_per_day=args.orders_per_day,
+        max_quantity=args.max_quantity, skew=args.skew, seed=args.seed,
+        speed_kmh=args.speed_kmh, supplier_lead_hours=args.supplier_lead_hours,
+        start_date=args.start_date,
+    )
+    stats = simulation.run(args.days)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fileobj:
+            json.dump(stats, fileobj, indent=2, default=str)
+
+    print(f"{stats['days']:.0f} simulated days, {stats['events']:,} events in "
+          f"{stats['elapsed_s']:.2f}s ({stats['events_per_sec']:,.0f} events/s)")
+    print(f"  orders {stats['orders']:,}  fulfilled {stats['fulfilled']:,}  "
+          f"fill rate {stats['fill_rate']:.1%}  open backorders {stats['open_backorders']:,}")
+    print(f"  lead time mean {stats['lead_time_hours']['mean']:.1f} h  "
+          f"p95 {stats['lead_time_hours']['p95']:.1f} h")
+    print(f"  transfers {stats['transfers']:,} ({stats['transfer_units']:,} units)  "
+          f"replenishments {stats['replenishments']:,} ({stats['replenished_units']:,} units)")
+    print(f"  transport cost ₹{stats['transport_cost']:,.2f}  "
+          f"transfer cost ₹{stats['transfer_cost']:,.2f}")
+    if args.persist:
+        written = persist_run(simulation)
+        print(f"Persisted {written['orders']:,} orders, {written['logistics']:,} "
+              f"logistics rows and {written['logs']:,} log entries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
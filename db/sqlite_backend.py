@@ -0,0 +1,319 @@
+"""Embedded SQLite backend that speaks the MySQL dialect used by ``db.queries``.
+
+Selected with ``SCMS_DB_BACKEND=sqlite``. ``SCMS_SQLITE_PATH`` names the
+database file (WAL journal, shared by every process that opens it). The
+default, ``:memory:``, is a shared in-memory database private to the current
+process. The schema (``db/schema_sqlite.sql`` plus ``db/migrations``) is
+created on first connect.
+
+Query functions keep writing MySQL SQL. ``translate`` rewrites each statement
+once (cached): ``%s`` placeholders, ``ON DUPLICATE KEY UPDATE``, ``INSERT
+IGNORE``, ``FOR UPDATE``, ``UPDATE ... JOIN``, ``TRUNCATE`` and a few
+session and DDL forms. Connections mimic mysql.connector's. A transaction starts implicitly and
+takes the write lock up front (``BEGIN IMMEDIATE``) when its first statement
+writes or locks rows. SQLite errors are re-raised as mysql.connector errors
+with the matching MySQL errno, so the deadlock retry loop, migrations and
+pages handle both backends the same way.
+
+The in-memory database uses SQLite's shared cache with ``read_uncommitted``,
+so readers never block on writers but can see uncommitted rows. Use a file
+database for multi-process runs such as ``db.loadtest --mode process``.
+"""
+
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+import mysql.connector
+
+SCHEMA_PATH = Path(__file__).with_name("schema_sqlite.sql")
+CENTS = Decimal("0.01")
+
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(date, date.isoformat)
+# Every DECIMAL column in the schema has two decimal places.
+sqlite3.register_converter("DECIMAL", lambda value: Decimal(value.decode()).quantize(CENTS))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+
+_REWRITES = [
+    (re.compile(r"\s+FOR\s+UPDATE\b", re.I), ""),
+    (re.compile(r"\bENGINE\s*=\s*\w+", re.I), ""),
+    (re.compile(r"^(\s*)INSERT\s+IGNORE\b", re.I), r"\1INSERT OR IGNORE"),
+    (re.compile(r"^\s*TRUNCATE\s+TABLE\s+(\w+)\s*$", re.I), r"DELETE FROM \1"),
+    (re.compile(r"^\s*ALTER\s+TABLE\s+(\w+)\s+AUTO_INCREMENT\s*=\s*\d+\s*$", re.I),
+     r"DELETE FROM sqlite_sequence WHERE name = '\1'"),
+    (re.compile(r"^\s*SET\s+SESSION\s+foreign_key_checks\s*=\s*(\d)\s*$", re.I),
+     r"PRAGMA foreign_keys = \1"),
+    (re.compile(r"^\s*DROP\s+INDEX\s+(\w+)\s+ON\s+\w+\s*$", re.I), r"DROP INDEX \1"),
+]
+# MySQL multi-table UPDATE joined to a derived table -> SQLite UPDATE ... FROM.
+_UPDATE_JOIN = re.compile(
+    r"^\s*UPDATE\s+(\w+)\s+(\w+)\s+JOIN\s+(\(.*\))\s+(\w+)\s+ON\s+(.*?)\s+SET\s+(.*?)\s*$",
+    re.I | re.S,
+)
+_UPSERT = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b(.*)$", re.I | re.S)
+_VALUES_REF = re.compile(r"\bVALUES\((\w+)\)", re.I)
+_IGNORED = re.compile(r"^\s*SET\s+SESSION\s+\w+\s*=", re.I)
+_READ = re.compile(r"^\s*(SELECT|WITH)\b", re.I)
+_LOCKING_READ = re.compile(r"\bFOR\s+UPDATE\b", re.I)
+
+# (message fragment, mysql.connector error class, MySQL errno)
+_ERRORS = [
+    ("UNIQUE constraint failed", mysql.connector.errors.IntegrityError, 1062),
+    ("PRIMARY KEY constraint failed", mysql.connector.errors.IntegrityError, 1062),
+    ("FOREIGN KEY constraint failed", mysql.connector.errors.IntegrityError, 1452),
+    ("NOT NULL constraint failed", mysql.connector.errors.IntegrityError, 1048),
+    ("CHECK constraint failed", mysql.connector.errors.DatabaseError, 3819),
+    ("database is locked", mysql.connector.errors.DatabaseError, 1205),
+    ("database table is locked", mysql.connector.errors.DatabaseError, 1205),
+    ("no such table", mysql.connector.errors.ProgrammingError, 1146),
+    ("duplicate column name", mysql.connector.errors.ProgrammingError, 1060),
+    ("no such index", mysql.connector.errors.ProgrammingError, 1091),
+]
+_EXISTS = re.compile(r"^(table|index) \S+ already exists")
+
+
+def _mysql_error(error):
+    """Return the mysql.connector equivalent of a sqlite3 error."""
+    message = str(error)
+    exists = _EXISTS.match(message)
+    if exists:
+        errno = 1050 if exists.group(1) == "table" else 1061
+        return mysql.connector.errors.ProgrammingError(msg=message, errno=errno)
+    for fragment, cls, errno in _ERRORS:
+        if fragment in message:
+            return cls(msg=message, errno=errno)
+    return mysql.connector.errors.DatabaseError(msg=message)
+
+
+@functools.lru_cache(maxsize=1024)
+def translate(sql):
+    """Rewrite one MySQL statement for SQLite; None means it has no SQLite effect."""
+    if _IGNORED.match(sql) and "foreign_key_checks" not in sql:
+        return None
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    join = _UPDATE_JOIN.match(sql)
+    if join:
+        table, alias, derived, derived_alias, condition, assignments = join.groups()
+        if "%s" in condition or "%s" in assignments:
+            raise ValueError("UPDATE ... JOIN parameters must all be in the joined table")
+        assignments = re.sub(rf"\b{alias}\.(\w+)\s*=", r"\1 =", assignments)
+        # Rearranges the already parameterised statement; no values are added.
+        sql = (f"UPDATE {table} AS {alias} SET {assignments} "  # nosec B608
+               f"FROM {derived} AS {derived_alias} WHERE {condition}")
+    upsert = _UPSERT.search(sql)
+    if upsert:
+        assignments = _VALUES_REF.sub(r"excluded.\1", upsert.group(1))
+        sql = f"{sql[:upsert.start()]}ON CONFLICT DO UPDATE SET{assignments}"
+    return sql.replace("%s", "?")
+
+
+@functools.lru_cache(maxsize=1024)
+def _begin_statement(sql):
+    """Return how a transaction opened by ``sql`` must begin (None: don't open one)."""
+    statement = translate(sql)
+    if statement is None or statement.lstrip()[:6].upper() == "PRAGMA":
+        # PRAGMA foreign_keys is a no-op inside a transaction.
+        return None
+    if _READ.match(sql) and not _LOCKING_READ.search(sql):
+        return "BEGIN"
+    return "BEGIN IMMEDIATE"
+
+
+class SQLiteCursor:
+    """A mysql.connector-style cursor over a sqlite3 cursor."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+        self.rowcount = -1
+
+    @property
+    def lastrowid(self):
+        """Id generated by the last INSERT."""
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        """Column descriptions of the last result set, or None."""
+        return self._cursor.description
+
+    @property
+    def with_rows(self):
+        """True when the last statement produced a result set."""
+        return self._cursor.description is not None
+
+    def _run(self, method, sql, params):
+        statement = translate(sql)
+        if statement is None:
+            self.rowcount = 0
+            return
+        self._connection.begin(_begin_statement(sql))
+        try:
+            getattr(self._cursor, method)(statement, params)
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+        self.rowcount = self._cursor.rowcount
+
+    def execute(self, sql, params=()):
+        """Run one statement with ``%s`` parameters."""
+        self._run("execute", sql, tuple(params or ()))
+
+    def executemany(self, sql, seq_params):
+        """Run one statement once per parameter tuple."""
+        self._run("executemany", sql, [tuple(p) for p in seq_params])
+
+    def fetchone(self):
+        """Return the next row or None."""
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        """Return up to ``size`` rows."""
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        """Return all remaining rows."""
+        return self._cursor.fetchall() if self._cursor.description else []
+
+    def close(self):
+        """Close the cursor (a no-op once its connection is closed)."""
+        try:
+            self._cursor.close()
+        except sqlite3.ProgrammingError:
+            pass
+
+
+class SQLiteConnection:
+    """A mysql.connector-style connection over sqlite3 with implicit transactions."""
+
+    def __init__(self, raw, lock_timeout):
+        self.raw = raw
+        self.lock_timeout = lock_timeout
+
+    @property
+    def in_transaction(self):
+        """True while a transaction is open."""
+        return self.raw.in_transaction
+
+    def begin(self, statement):
+        """Open a transaction unless one is already open.
+
+        The shared-cache lock ("database table is locked") is not covered by
+        SQLite's busy timeout, so ``BEGIN IMMEDIATE`` is retried here.
+        """
+        if statement is None or self.raw.in_transaction:
+            return
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.001
+        while True:
+            try:
+                self.raw.execute(statement)
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or time.monotonic() >= deadline:
+                    raise _mysql_error(e) from e
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def cursor(self, **_options):
+        """Return a new cursor; mysql.connector options such as ``buffered`` are ignored."""
+        return SQLiteCursor(self)
+
+    def commit(self):
+        """Commit the open transaction, if any."""
+        if self.raw.in_transaction:
+            try:
+                self.raw.execute("COMMIT")
+            except sqlite3.Error as e:
+                raise _mysql_error(e) from e
+
+    def rollback(self):
+        """Roll back the open transaction, if any."""
+        if self.raw.in_transaction:
+            self.raw.execute("ROLLBACK")
+
+    def is_connected(self):
+        """Return True if the connection is usable."""
+        try:
+            self.raw.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        """Close the underlying sqlite3 connection."""
+        self.raw.close()
+
+
+def database_path():
+    """Return the configured database path (``:memory:`` by default)."""
+    return os.getenv("SCMS_SQLITE_PATH") or ":memory:"
+
+
+def _lock_timeout():
+    return float(os.getenv("SCMS_SQLITE_TIMEOUT", "30"))
+
+
+def _open(path):
+    memory = path == ":memory:"
+    raw = sqlite3.connect(
+        f"file:scms-{os.getpid()}?mode=memory&cache=shared" if memory else path,
+        uri=memory,
+        timeout=_lock_timeout(),
+        isolation_level=None,
+        check_same_thread=False,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+    )
+    # Migrations take a MySQL named lock; SQLite already serialises writers.
+    raw.create_function("GET_LOCK", 2, lambda name, timeout: 1)
+    raw.create_function("RELEASE_LOCK", 1, lambda name: 1)
+    raw.execute("PRAGMA foreign_keys = ON")
+    if memory:
+        raw.execute("PRAGMA read_uncommitted = 1")
+    else:
+        raw.execute("PRAGMA journal_mode = WAL")
+        raw.execute("PRAGMA synchronous = NORMAL")
+    return SQLiteConnection(raw, _lock_timeout())
+
+
+_ready = set()
+_anchors = {}
+_bootstrap_lock = threading.Lock()
+
+
+def _bootstrap(path):
+    """Create the schema and apply migrations the first time ``path`` is opened."""
+    from db.migrate import migrate  # pylint: disable=import-outside-toplevel
+
+    conn = _open(path)
+    if path == ":memory:":
+        # A shared in-memory database lives as long as one connection to it.
+        _anchors[path] = conn
+    try:
+        cursor = conn.raw.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Products'"
+        )
+        if cursor.fetchone() is None:
+            conn.raw.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    finally:
+        if path != ":memory:":
+            conn.close()
+    migrate(connect_fn=lambda: _open(path))
+
+
+def connect(path=None):
+    """Open a new connection to the SQLite database, creating its schema if needed."""
+    path = path or database_path()
+    if path not in _ready:
+        with _bootstrap_lock:
+            if path not in _ready:
+                _bootstrap(path)
+                _ready.add(path)
+    return _open(path)
@@ -1,9 +1,21 @@
 """Streamlit app for SCMS Dashboard: login, registration, and role-based access."""
 
 import streamlit as st
+from db.connection import warm_pool
+from db.instrumentation import set_page
 from db.queries import validate_user, create_user
 
 st.set_page_config(page_title="SCMS Dashboard", layout="wide")
+set_page("Dashboard")
+
+
+@st.cache_resource
+def _warm_connection_pool():
+    """Open the pooled DB connections once per server process."""
+    return warm_pool()
+
+
+_warm_connection_pool()
 
 # Optional: Hide default sidebar header
 st.markdown(
@@ -2,7 +2,11 @@
 
 from datetime import date
 import streamlit as st
-from db.queries import get_forecast, add_forecast, get_inventory_for_forecast
+from db.forecasting import MODELS, PERIODS, backtest, generate_forecasts
+from db.instrumentation import set_page
+from db.queries import add_forecast, get_forecast_gap_report
+
+set_page("Forecast")
 
 if "role" not in st.session_state or st.session_state.role != "Admin":
     st.error("⛔ Access Denied: Admins only.")
@@ -28,26 +32,87 @@ if st.button("Add Forecast"):
         st.error(f"Unexpected error: {unexpected.__class__.__name__}")
         raise
 
+# --- Statistical Forecasts ---
+with st.expander("🤖 Generate Forecasts from Order History"):
+    col1, col2, col3, col4 = st.columns(4)
+    model = col1.selectbox("Model", list(MODELS), index=list(MODELS).index("ses"))
+    period = col2.selectbox("Period", list(PERIODS), index=list(PERIODS).index("week"))
+    periods = col3.number_input("History (periods)", min_value=2, value=52)
+    horizon = col4.number_input("Horizon (periods)", min_value=1, value=4)
+    history_end = st.date_input("History ends on", value=date.today(), key="history_end")
+    by_location = st.checkbox(
+        "Fit each customer location separately", help="Forecasts are summed per SKU."
+    )
+    st.caption(
+        "Generating replaces any stored forecast for the same SKU and date. Forecasts for "
+        "other SKUs, including hand-entered ones and SKUs forecast at zero, are kept."
+    )
+    backtest_col, generate_col = st.columns(2)
+    holdout = backtest_col.number_input("Backtest holdout (periods)", min_value=1, value=8)
+    try:
+        if backtest_col.button("Run Backtest"):
+            report = backtest(holdout, periods, period, history_end, by_location)
+            st.caption(
+                f"{report['series']:,} series, {report['holdout']} of {report['periods']} "
+                f"{period}s held out ({report['seconds']:.2f}s)"
+            )
+            st.table([
+                {
+                    "Model": name,
+                    "MAE": f"{m['mae']:.3f}",
+                    "RMSE": f"{m['rmse']:.3f}",
+                    "WAPE": f"{m['wape']:.1%}",
+                    "Bias": f"{m['bias']:+.1%}",
+                }
+                for name, m in report["models"].items()
+            ])
+        if generate_col.button("Generate Forecasts"):
+            result = generate_forecasts(
+                model, horizon, periods, period, history_end, by_location,
+                user_id=st.session_state.get("user_id") or 1,
+            )
+            st.success(
+                f"✅ Stored {len(result['rows']):,} forecasts from {result['series']:,} "
+                f"series in {result['seconds']:.2f}s"
+            )
+    except ValueError as ve:
+        st.error(f"Validation error: {ve}")
+    except ConnectionError as ce:
+        st.error(f"Database connection failed: {ce}")
+    except Exception as unexpected:
+        st.error(f"Unexpected error: {unexpected.__class__.__name__}")
+        raise
+
 # --- Forecasted Demand Table ---
 st.subheader("📊 Forecasted Demand")
-forecasts = get_forecast()
+
+with st.expander("Filters"):
+    filter_sku = st.text_input("Filter by SKU", key="filter_sku")
+    use_date_range = st.checkbox("Limit to a date range")
+    start_date = end_date = None
+    if use_date_range:
+        date_range = st.date_input("Forecast Dates", value=(date.today(), date.today()))
+        if isinstance(date_range, tuple) and len(date_range) == 2:
+            start_date, end_date = date_range
+
+forecasts = get_forecast_gap_report(
+    start_date=start_date,
+    end_date=end_date,
+    sku=filter_sku.strip().upper() or None,
+)
 
 if forecasts:
-    forecast_table = []
-    for f in forecasts:
-        sku, forecast_qty, f_date = f
-        current_inventory = get_inventory_for_forecast(sku)
-        gap = forecast_qty - current_inventory
-        status = "OK" if gap <= 0 else "⚠️ Shortage"
-
-        forecast_table.append({
-            "SKU": sku,
-            "Forecast Qty": forecast_qty,
-            "Date": f_date,
-            "Current Inventory": current_inventory,
-            "Gap": gap,
-            "Status": status
-        })
+    forecast_table = [
+        {
+            "SKU": f["sku"],
+            "Forecast Qty": f["forecast"],
+            "Date": f["date"],
+            "Current Inventory": f["inventory"],
+            "Gap": f["gap"],
+            "Status": "OK" if f["status"] == "OK" else "⚠️ Shortage"
+        }
+        for f in forecasts
+    ]
 
     st.table(forecast_table)
 else:
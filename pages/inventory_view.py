@@ -1,7 +1,12 @@
 """Streamlit page for viewing inventory levels and low stock alerts."""
 
 import streamlit as st
+from db.instrumentation import set_page
+from db.parallel import fetch_all
 from db.queries import get_inventory, get_low_stock
+from db.replenishment import plan_replenishment, summarize_replenishment
+
+set_page("Inventory")
 
 if "role" not in st.session_state or st.session_state.role != "Admin":
     st.error("⛔ Access Denied: Admins only.")
@@ -9,8 +14,11 @@ if "role" not in st.session_state or st.session_state.role != "Admin":
 
 st.title("📦 Inventory Overview")
 
+# Both tables are needed for the page, so load them together.
+data = fetch_all(inventory=get_inventory, low_stock=get_low_stock)
+
 # --- Organize inventory by location ---
-inventory = get_inventory()
+inventory = data["inventory"]
 location_map = {}
 
 for item in inventory:
@@ -59,8 +67,68 @@ for location in sorted_locations:
 
 # --- Low Stock Alerts ---
 st.subheader("Low Stock Alerts")
-low_stock = get_low_stock()
+low_stock = data["low_stock"]
+# Transfers executed on the previous run; the tables above already reflect them.
+executed = st.session_state.pop("executed_replenishment", None)
+if executed:
+    st.success(
+        f"✅ Executed {executed['transfers']} transfers moving {executed['transfer_units']} "
+        f"units (₹{executed['transfer_cost']:.2f})."
+    )
 if low_stock:
+    # --- Replenishment Plan ---
+    with st.expander("🔁 Replenishment Plan (rebalance surplus stock between warehouses)"):
+        preview_col, apply_col = st.columns([1, 1])
+        preview_clicked = preview_col.button("Preview Plan")
+        apply_clicked = apply_col.button("Execute Transfers")
+        if preview_clicked or apply_clicked:
+            try:
+                transfers, reorders = plan_replenishment(
+                    apply=apply_clicked, user_id=st.session_state.get("user_id") or 1
+                )
+                plan_summary = summarize_replenishment(transfers, reorders)
+                if apply_clicked:
+                    # Reload so the inventory tables and alerts show the new stock.
+                    st.session_state.executed_replenishment = plan_summary
+                    st.rerun()
+                st.info(
+                    f"{plan_summary['transfers']} transfers move "
+                    f"{plan_summary['transfer_units']} units "
+                    f"(₹{plan_summary['transfer_cost']:.2f}); {plan_summary['reorders']} "
+                    f"locations still need {plan_summary['reorder_units']} units from suppliers."
+                )
+                if transfers:
+                    st.markdown("#### Transfers")
+                    st.dataframe([
+                        {
+                            "SKU": t["sku"],
+                            "From": t["origin"],
+                            "To": t["destination"],
+                            "Qty": t["quantity"],
+                            "Cost (₹)": f"{t['cost']:.2f}",
+                        }
+                        for t in transfers
+                    ], use_container_width=True)
+                if reorders:
+                    st.markdown("#### Reorder Suggestions")
+                    st.dataframe([
+                        {
+                            "SKU": r["sku"],
+                            "Location": r["location"],
+                            "On Hand": r["on_hand"],
+                            "Threshold": r["threshold"],
+                            "Reorder Qty": r["quantity"],
+                        }
+                        for r in reorders
+                    ], use_container_width=True)
+            except ValueError as ve:
+                st.error(f"Validation error: {ve}")
+            except ConnectionError as ce:
+                st.error(f"Database error: {ce}")
+            except Exception as unexpected:
+                st.error(f"Unexpected error: {unexpected.__class__.__name__}")
+                raise
+
     for item in low_stock:
         st.error(
             f"{item[1]} ({item[0]}) at {item[2]} is low: {item[3]} units (Threshold: {item[4]})"
@@ -1,13 +1,40 @@
 """Streamlit page for simulating logistics: product movement and order fulfillment."""
 
 import streamlit as st
+from db.instrumentation import set_page
+from db.parallel import submit
 from db.queries import (
-    move_product, get_route_cost, get_orders,
+    move_product, get_route_cost,
     update_order_status, move_order_to_customer,
-    get_inventory_for_sku, get_locations,
+    get_fulfillment_plan, get_locations,
     get_cheapest_route_details, write_log,
-    suggest_cheapest_origin
+    suggest_cheapest_origin, run_in_transaction, get_shortest_route
 )
+from db.allocation import allocate_pending_orders, summarize_plan
+from db.fulfillment import fulfill_pending_orders, summarize_report
+
+
+def _move_legs(session, sku, legs, quantity):
+    """Move stock along every leg of a multi-leg route inside ``session``."""
+    for leg in legs:
+        move_product(
+            sku, leg["origin"], leg["destination"], quantity, leg["cost"] * quantity,
+            session=session
+        )
+
+
+def _process_order(session, order_id, sku, qty, origin, destination):
+    """Ship one order to its customer and mark it Processed inside ``session``."""
+    move_order_to_customer(order_id, sku, qty, origin, destination, session=session)
+    update_order_status(order_id, "Processed", session=session)
+    write_log(
+        1,
+        f"Processed order #{order_id}: {qty} units of {sku} from {origin} to {destination}",
+        session=session
+    )
+
+
+set_page("Logistics Simulator")
 
 if "role" not in st.session_state or st.session_state.role != "Admin":
     st.error("⛔ Access Denied: Admins only.")
@@ -15,6 +42,11 @@ if "role" not in st.session_state or st.session_state.role != "Admin":
 
 st.title("🚚 Logistics Simulator")
 
+# The pending-order plan does not depend on the movement form, so it loads in
+# the background while the form (and its origin suggestion) renders.
+pending_future = submit(get_fulfillment_plan)
+STOCK_MOVED = False  # pylint: disable=C0103
+
 # --- Manual Movement ---
 st.subheader("Manual Product Movement")
 
@@ -65,6 +97,7 @@ if sku and origin and destination and quantity:
                     1,
                     f"Moved {quantity} units of {sku.upper()} from {origin} to {destination}"
                 )
+                STOCK_MOVED = True  # pylint: disable=C0103
                 st.success(
                     f"✅ Moved {quantity} units of {sku} from {origin} to {destination}"
                 )
@@ -76,15 +109,107 @@ if sku and origin and destination and quantity:
                 st.error(f"Unexpected error: {unexpected.__class__.__name__}")
                 raise
     else:
-        st.warning("⚠️ No route found between selected origin and destination.")
+        multi_leg = get_shortest_route(origin.strip(), destination.strip())
+        if multi_leg is None:
+            st.warning("⚠️ No route found between selected origin and destination.")
+        else:
+            total_cost = multi_leg["cost"] * quantity
+            st.info(
+                f"No direct route. Cheapest path: {' → '.join(multi_leg['path'])} "
+                f"({multi_leg['distance']} km), Transport Cost: ₹{total_cost:.2f}"
+            )
+            if st.button("Simulate Multi-leg Movement"):
+                try:
+                    run_in_transaction(lambda s: _move_legs(
+                        s, sku.strip().upper(), multi_leg["legs"], quantity
+                    ))
+                    STOCK_MOVED = True  # pylint: disable=C0103
+                    st.success(
+                        f"✅ Moved {quantity} units of {sku} from {origin} to {destination} "
+                        f"in {len(multi_leg['legs'])} legs"
+                    )
+                except ValueError as ve:
+                    st.error(f"Validation error: {ve}")
+                except ConnectionError as ce:
+                    st.error(f"Database error: {ce}")
+                except Exception as unexpected:
+                    st.error(f"Unexpected error: {unexpected.__class__.__name__}")
+                    raise
 
 # --- Move Orders to Customer ---
 st.subheader("📦 Move Orders to Customer")
 
-orders = get_orders()
-pending_orders = [o for o in orders if o[5] == "Pending"]
+# A manual move above changes stock, so the prefetched plan would be stale.
+pending_orders = get_fulfillment_plan() if STOCK_MOVED else pending_future.result()
 
 if pending_orders:
+    if st.button(f"🚚 Process All {len(pending_orders)} Pending Orders"):
+        try:
+            fulfillment_report = fulfill_pending_orders()
+            summary = summarize_report(fulfillment_report)
+            st.success(
+                f"✅ Processed {summary['processed']} orders "
+                f"(₹{summary['total_cost']:.2f}); skipped {summary['skipped']}."
+            )
+            skipped = [r for r in fulfillment_report if r["status"] != "Processed"]
+            if skipped:
+                st.table([
+                    {
+                        "Order ID": r["order_id"],
+                        "SKU": r["sku"],
+                        "Qty": r["quantity"],
+                        "Location": r["destination"],
+                        "Reason": r["reason"],
+                    }
+                    for r in skipped
+                ])
+            else:
+                st.rerun()
+        except ValueError as ve:
+            st.error(f"Validation error: {ve}")
+        except ConnectionError as ce:
+            st.error(f"Database error: {ce}")
+        except Exception as unexpected:
+            st.error(f"Unexpected error: {unexpected.__class__.__name__}")
+            raise
+
+    with st.expander("🧮 Optimize Allocation (split shipments across warehouses)"):
+        preview_col, apply_col = st.columns([1, 1])
+        preview_clicked = preview_col.button("Preview Plan")
+        apply_clicked = apply_col.button("Apply Plan")
+        if preview_clicked or apply_clicked:
+            try:
+                allocation_plan = allocate_pending_orders(apply=apply_clicked)
+                plan_summary = summarize_plan(allocation_plan)
+                st.info(
+                    f"{plan_summary['allocated']} of {plan_summary['orders']} orders allocated "
+                    f"({plan_summary['split']} split), total ₹{plan_summary['total_cost']:.2f}; "
+                    f"{plan_summary['unfilled']} cannot be filled from current stock."
+                )
+                st.table([
+                    {
+                        "Order ID": e["order_id"],
+                        "SKU": e["sku"],
+                        "Qty": e["quantity"],
+                        "Location": e["destination"],
+                        "From": ", ".join(
+                            f"{s['origin']} ({s['quantity']})" for s in e["shipments"]
+                        ) or "-",
+                        "Cost (₹)": f"{e['cost']:.2f}",
+                        "Status": e["status"],
+                    }
+                    for e in allocation_plan
+                ])
+                if apply_clicked:
+                    st.success("✅ Allocation applied.")
+            except ValueError as ve:
+                st.error(f"Validation error: {ve}")
+            except ConnectionError as ce:
+                st.error(f"Database error: {ce}")
+            except Exception as unexpected:
+                st.error(f"Unexpected error: {unexpected.__class__.__name__}")
+                raise
+
     st.markdown("### Pending Orders")
     header = st.columns([1.2, 2, 1.2, 2, 2, 2])
     header[0].markdown("**Order ID**")
@@ -95,7 +220,11 @@ if pending_orders:
     header[5].markdown("**Action**")
 
     for order in pending_orders:
-        order_id, sku, qty, customer, location, status = order
+        order_id = order["order_id"]
+        sku = order["sku"]
+        qty = order["quantity"]
+        customer = order["customer"]
+        location = order["location"]
         row = st.columns([1.2, 2, 1.2, 2, 2, 2])
         row[0].write(order_id)
         row[1].write(sku)
@@ -103,16 +232,13 @@ if pending_orders:
         row[3].write(customer)
         row[4].write(location)
 
-        inventory_sources = get_inventory_for_sku(sku.strip().upper())
-        valid_origins = [
-            loc for loc, available_qty in inventory_sources
-            if available_qty >= qty and not loc.startswith("Retail Hub")
-        ]
+        route_costs = {o["location"]: o["cost"] for o in order["origins"]}
+        valid_origins = list(route_costs)
 
         if not valid_origins:
             row[5].warning("⚠️ No warehouse has enough stock")
         else:
-            origin_suggestion = suggest_cheapest_origin(sku.strip().upper(), location.strip())
+            origin_suggestion = order["suggestion"]
             if origin_suggestion:
                 row[5].caption(
                     f"💡 Suggested: {origin_suggestion['origin']} "
@@ -128,25 +254,16 @@ if pending_orders:
                 key=f"origin_{order_id}"
             )
 
-            route_cost = get_route_cost(selected_origin.strip(), location.strip())
+            route_cost = route_costs[selected_origin]
             if route_cost is None:
                 row[5].warning("⚠️ No route from origin to customer")
             else:
                 if row[5].button("🚚 Move", key=f"move_{order_id}"):
                     try:
-                        move_order_to_customer(
-                            order_id,
-                            sku.strip().upper(),
-                            qty,
-                            selected_origin.strip(),
-                            location.strip()
-                        )
-                        update_order_status(order_id, "Processed")
-                        write_log(
-                            1,
-                            f"Processed order #{order_id}: {qty} units of {sku.upper()} "
-                            f"from {selected_origin} to {location}"
-                        )
+                        run_in_transaction(lambda s: _process_order(
+                            s, order_id, sku.strip().upper(), qty,
+                            selected_origin.strip(), location.strip()
+                        ))
                         st.success(
                             f"✅ Order #{order_id} moved from {selected_origin} to {location}"
                         )
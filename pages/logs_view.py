@@ -1,7 +1,13 @@
 """Streamlit page for viewing system logs and resetting simulation data."""
 
 import streamlit as st
-from db.queries import get_logs, reset_simulation
+from db.export import FORMATS, export_to_tempfile
+from db.instrumentation import set_page
+from db.queries import get_logs_page, reset_simulation
+
+PAGE_SIZE = 100
+
+set_page("Logs")
 
 if "role" not in st.session_state or st.session_state.role != "Admin":
     st.error("⛔ Access Denied: Admins only.")
@@ -12,19 +18,59 @@ st.title("📝 Logs Viewer")
 # --- Logs Table ---
 st.subheader("System Logs")
 
-logs = get_logs()
+if "logs_cursor" not in st.session_state:
+    st.session_state.logs_cursor = {}
+
+
+def _reset_logs_cursor():
+    st.session_state.logs_cursor = {}
+
+
+search = st.text_input(
+    "Search actions (SKU, location, order #)", key="logs_search",
+    on_change=_reset_logs_cursor
+)
+page = get_logs_page(
+    limit=PAGE_SIZE, search=search.strip() or None, **st.session_state.logs_cursor
+)
+logs = page["rows"]
 
 if logs:
     log_table = []
-    for user_id, action in logs:
+    for log_id, user_id, action in logs:
         log_table.append({
+            "Log ID": log_id,
             "User ID": user_id,
             "Action": action
         })
     st.table(log_table)
+
+    nav = st.columns([1, 1])
+    if page["prev"] is not None and nav[0].button("⬅️ Newer", key="logs_newer"):
+        st.session_state.logs_cursor = {"after_id": page["prev"]}
+        st.rerun()
+    if page["next"] is not None and nav[1].button("Older ➡️", key="logs_older"):
+        st.session_state.logs_cursor = {"before_id": page["next"]}
+        st.rerun()
 else:
     st.info("No logs available.")
 
+# --- Export ---
+with st.expander("⬇️ Export Logs"):
+    export_format = st.radio("Format", FORMATS, horizontal=True, key="logs_export_format")
+    if st.button("Prepare Export", key="logs_export"):
+        try:
+            export_file, exported_rows = export_to_tempfile("logs", export_format)
+            with export_file:
+                st.download_button(
+                    f"Download {exported_rows} rows",
+                    export_file,
+                    file_name=f"scms_logs.{export_format}",
+                    key="logs_download",
+                )
+        except ImportError as ie:
+            st.error(str(ie))
+
 # --- Reset Button ---
 st.subheader("🧹 Reset Simulation")
 
@@ -2,10 +2,15 @@
 
 import time
 import streamlit as st
+from db.instrumentation import set_page
 from db.queries import (
-    place_order, get_orders, delete_order, get_customer_locations
+    place_order, get_orders_page, delete_order, get_customer_locations
 )
 
+PAGE_SIZE = 25
+
+set_page("Order Manager")
+
 # --- Access Control ---
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
     st.error("⛔ Please log in to access this page.")
@@ -51,7 +56,43 @@ if st.button("Place Order"):
 
 # --- Display Orders Based on Role ---
 st.subheader("All Orders" if st.session_state.role == "Admin" else "My Orders")
-orders = get_orders(st.session_state.username, st.session_state.role)
+
+if "orders_cursor" not in st.session_state:
+    st.session_state.orders_cursor = {}
+
+
+def _reset_orders_cursor():
+    st.session_state.orders_cursor = {}
+
+
+filter_cols = st.columns([1, 1, 1, 1])
+status_filter = filter_cols[0].selectbox(
+    "Status", ["All", "Pending", "Processed"], key="orders_status",
+    on_change=_reset_orders_cursor
+)
+sku_filter = filter_cols[1].text_input(
+    "SKU", key="orders_sku", on_change=_reset_orders_cursor
+)
+location_filter = filter_cols[2].selectbox(
+    "Location", ["All"] + locations, key="orders_location",
+    on_change=_reset_orders_cursor
+)
+if st.session_state.role == "User":
+    customer_filter = st.session_state.username
+else:
+    customer_filter = filter_cols[3].text_input(
+        "Customer", key="orders_customer", on_change=_reset_orders_cursor
+    )
+
+page = get_orders_page(
+    limit=PAGE_SIZE,
+    status=None if status_filter == "All" else status_filter,
+    sku=sku_filter.strip().upper() or None,
+    customer=customer_filter.strip() or None,
+    location=None if location_filter == "All" else location_filter,
+    **st.session_state.orders_cursor
+)
+orders = page["rows"]
 
 if orders:
     st.markdown("### 📦 Current Orders")
@@ -90,5 +131,13 @@ if orders:
                     raise
         else:
             row[6].markdown("✅")
+
+    nav = st.columns([1, 1])
+    if page["prev"] is not None and nav[0].button("⬅️ Newer", key="orders_newer"):
+        st.session_state.orders_cursor = {"after_id": page["prev"]}
+        st.rerun()
+    if page["next"] is not None and nav[1].button("Older ➡️", key="orders_older"):
+        st.session_state.orders_cursor = {"before_id": page["next"]}
+        st.rerun()
 else:
     st.info("No orders found.")
@@ -0,0 +1,58 @@
+"""Streamlit page for per-query latency, connection pool and cache statistics."""
+
+import streamlit as st
+from db.cache import cache_stats, clear_cache
+from db.connection import pool_stats
+from db.instrumentation import (
+    export_query_stats_json, query_metrics, query_stats, reset_query_stats, set_page
+)
+
+set_page("Performance")
+
+if "role" not in st.session_state or st.session_state.role != "Admin":
+    st.error("⛔ Access Denied: Admins only.")
+    st.stop()
+
+st.title("⏱️ Performance")
+
+# --- Query Statistics ---
+st.subheader("Query Latency")
+
+page_options = ["All pages"] + query_metrics.pages()
+selected = st.selectbox("Calling page", page_options)
+page = None if selected == "All pages" else selected
+stats = query_stats(page)
+
+if stats:
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Calls", sum(s["calls"] for s in stats))
+    col2.metric("Errors", sum(s["errors"] for s in stats))
+    col3.metric("Connections", sum(s["connections"] for s in stats))
+    col4.metric("Total time (ms)", f"{sum(s['total_ms'] for s in stats):.1f}")
+    st.dataframe(stats, use_container_width=True)
+else:
+    st.info("No queries recorded yet.")
+
+col1, col2 = st.columns(2)
+with col1:
+    st.download_button(
+        "Download JSON",
+        data=export_query_stats_json(page),
+        file_name="query_stats.json",
+        mime="application/json",
+    )
+with col2:
+    if st.button("Reset Statistics"):
+        reset_query_stats()
+        st.rerun()
+
+# --- Connection Pool ---
+st.subheader("Connection Pool")
+st.json(pool_stats())
+
+# --- Query Cache ---
+st.subheader("Query Cache")
+st.json(cache_stats())
+if st.button("Clear Cache"):
+    clear_cache()
+    st.rerun()
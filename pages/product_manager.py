@@ -1,12 +1,17 @@
 """Streamlit page for managing products and inventory across warehouses."""
 
+import io
+
 import streamlit as st
+from db.bulk_import import IMPORTS, import_csv
+from db.instrumentation import set_page
 from db.queries import (
-    get_all_products, add_product, update_product, delete_product,
-    add_inventory, update_inventory, get_all_warehouse_locations,
-    get_inventory_locations_for_sku
+    get_all_products, delete_product, get_all_warehouse_locations,
+    upsert_product_with_inventory
 )
 
+set_page("Product Manager")
+
 # --- Access Control ---
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
     st.error("⛔ Please log in to access this page.")
@@ -67,20 +72,14 @@ if st.session_state.role == "Admin":
 
             if add_clicked:
                 try:
-                    add_product(
-                        st.session_state.sku.strip().upper(),
+                    upsert_product_with_inventory(
+                        st.session_state.sku,
                         st.session_state.name,
                         st.session_state.desc,
-                        st.session_state.threshold
+                        st.session_state.threshold,
+                        {loc: qty for loc, qty in warehouse_quantities.items() if qty > 0},
+                        create=True,
                     )
-                    for loc in selected_locations:
-                        qty = warehouse_quantities[loc]
-                        if qty > 0:
-                            add_inventory(
-                                st.session_state.sku.strip().upper(),
-                                loc.strip(),
-                                qty
-                            )
                     st.success(
                         f"Product '{st.session_state.sku}' added to selected warehouses."
                     )
@@ -96,30 +95,13 @@ if st.session_state.role == "Admin":
 
             if update_clicked:
                 try:
-                    update_product(
-                        st.session_state.sku.strip().upper(),
+                    upsert_product_with_inventory(
+                        st.session_state.sku,
                         st.session_state.name,
                         st.session_state.desc,
-                        st.session_state.threshold
+                        st.session_state.threshold,
+                        warehouse_quantities,
                     )
-                    existing_locations = get_inventory_locations_for_sku(
-                        st.session_state.sku.strip().upper()
-                    )
-
-                    for loc in selected_locations:
-                        qty = warehouse_quantities[loc]
-                        if loc in existing_locations:
-                            update_inventory(
-                                st.session_state.sku.strip().upper(),
-                                loc.strip(),
-                                qty
-                            )
-                        else:
-                            add_inventory(
-                                st.session_state.sku.strip().upper(),
-                                loc.strip(),
-                                qty
-                            )
                 except ValueError as ve:
                     st.error(f"Validation error: {ve}")
                 except ConnectionError as ce:
@@ -128,6 +110,38 @@ if st.session_state.role == "Admin":
                     st.error(f"Unexpected error: {unexpected.__class__.__name__}")
                     raise
 
+    # --- Bulk Import ---
+    with st.expander("📥 Bulk Import from CSV"):
+        import_name = st.selectbox("Table", list(IMPORTS), format_func=str.title)
+        required = ", ".join(IMPORTS[import_name][1])
+        st.caption(f"Header row must include: {required}. Existing keys are updated.")
+        uploaded = st.file_uploader("CSV file", type="csv", key="bulk_import_file")
+        if uploaded is not None and st.button("Import"):
+            try:
+                with st.spinner("Importing..."):
+                    report = import_csv(
+                        import_name,
+                        io.TextIOWrapper(uploaded, encoding="utf-8-sig", newline=""),
+                        user_id=st.session_state.get("user_id") or 1,
+                        source=uploaded.name,
+                    )
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Imported", report["imported"])
+                col2.metric("Rejected", report["rejected"])
+                col3.metric("Rows/sec", f"{report['rows_per_sec']:,.0f}")
+                if report["rejects"]:
+                    st.dataframe(
+                        [{"line": line, "reason": reason} for line, reason in report["rejects"]],
+                        use_container_width=True,
+                    )
+            except ValueError as ve:
+                st.error(f"Validation error: {ve}")
+            except ConnectionError as ce:
+                st.error(f"Database error: {ce}")
+            except Exception as unexpected:
+                st.error(f"Unexpected error: {unexpected.__class__.__name__}")
+                raise
+
 # --- Product List (Visible to All Roles) ---
 st.subheader("All Products")
 
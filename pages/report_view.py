@@ -1,7 +1,14 @@
 """Streamlit page for viewing summary metrics and logistics movement analytics."""
 
+from functools import partial
+
 import streamlit as st
-from db.queries import generate_summary_report, get_logistics_records
+from db.export import FORMATS, export_to_tempfile
+from db.instrumentation import set_page
+from db.parallel import fetch_all
+from db.queries import generate_summary_report, get_logistics_page
+
+PAGE_SIZE = 50
 
 
 def handle_streamlit_error(error: Exception):
@@ -15,6 +22,8 @@ def handle_streamlit_error(error: Exception):
         raise error
 
 
+set_page("Reports")
+
 # --- Access Control ---
 if "role" not in st.session_state or st.session_state.role != "Admin":
     st.error("⛔ Access Denied: Admins only.")
@@ -22,9 +31,29 @@ if "role" not in st.session_state or st.session_state.role != "Admin":
 
 st.title("📊 Reports & Analytics")
 
+if "logistics_cursor" not in st.session_state:
+    st.session_state.logistics_cursor = {}
+
+
+def _reset_logistics_cursor():
+    st.session_state.logistics_cursor = {}
+
+
 # --- Summary Metrics ---
 try:
-    report = generate_summary_report()
+    # The filter widgets below keep their values in session state, so both
+    # queries can be issued together before anything is rendered.
+    data = fetch_all(
+        report=generate_summary_report,
+        logistics=partial(
+            get_logistics_page,
+            limit=PAGE_SIZE,
+            sku=st.session_state.get("logistics_sku", "").strip().upper() or None,
+            location=st.session_state.get("logistics_location", "").strip() or None,
+            **st.session_state.logistics_cursor
+        ),
+    )
+    report = data["report"]
 
     st.metric("Total Orders", report["Total Orders"])
     st.metric("Processed Orders", report["Processed Orders"])
@@ -34,14 +63,20 @@ try:
     # --- Logistics Cost Table ---
     st.subheader("📦 Logistics Movements")
 
-    logistics = get_logistics_records()
+    filter_cols = st.columns([1, 1])
+    filter_cols[0].text_input("SKU", key="logistics_sku", on_change=_reset_logistics_cursor)
+    filter_cols[1].text_input(
+        "Origin or Destination", key="logistics_location", on_change=_reset_logistics_cursor
+    )
+    page = data["logistics"]
+    logistics = page["rows"]
 
     if logistics:
         logistics_table = []
         LOGISTICS_COST_TOTAL = 0  # pylint: disable=C0103
 
         for record in logistics:
-            sku, origin, destination, cost = record
+            _, sku, origin, destination, cost = record
             logistics_table.append({
                 "SKU": sku,
                 "From": origin,
@@ -51,9 +86,33 @@ try:
             LOGISTICS_COST_TOTAL += cost
 
         st.table(logistics_table)
-        st.success(f"🧾 Total Logistics Cost: ₹{LOGISTICS_COST_TOTAL:.2f}")
+        st.success(f"🧾 Logistics Cost on this page: ₹{LOGISTICS_COST_TOTAL:.2f}")
+
+        nav = st.columns([1, 1])
+        if page["prev"] is not None and nav[0].button("⬅️ Newer", key="logistics_newer"):
+            st.session_state.logistics_cursor = {"after_id": page["prev"]}
+            st.rerun()
+        if page["next"] is not None and nav[1].button("Older ➡️", key="logistics_older"):
+            st.session_state.logistics_cursor = {"before_id": page["next"]}
+            st.rerun()
     else:
         st.info("No logistics records found.")
 
 except Exception as unexpected:  # noqa: BLE001
     handle_streamlit_error(unexpected)
+
+# --- Export ---
+with st.expander("⬇️ Export Logistics History"):
+    export_format = st.radio("Format", FORMATS, horizontal=True, key="logistics_export_format")
+    if st.button("Prepare Export", key="logistics_export"):
+        try:
+            export_file, exported_rows = export_to_tempfile("logistics", export_format)
+            with export_file:
+                st.download_button(
+                    f"Download {exported_rows} rows",
+                    export_file,
+                    file_name=f"scms_logistics.{export_format}",
+                    key="logistics_download",
+                )
+        except ImportError as ie:
+            st.error(str(ie))
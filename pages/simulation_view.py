@@ -0,0 +1,110 @@
+"""Streamlit page for running discrete-event supply chain simulations."""
+
+from datetime import date, timedelta
+
+import streamlit as st
+from db.instrumentation import set_page
+from db.simulation import (
+    SPEED_KMH, SUPPLIER_LEAD_HOURS, Simulation, load_snapshot, persist_run
+)
+
+set_page("Simulation")
+
+if "role" not in st.session_state or st.session_state.role != "Admin":
+    st.error("⛔ Access Denied: Admins only.")
+    st.stop()
+
+st.title("🎲 Supply Chain Simulation")
+st.caption(
+    "Simulates order arrivals, shipments, transfers and replenishment in memory. "
+    "Nothing is written to the database unless you persist the run."
+)
+
+# The snapshot is read once and reused for every run until reloaded.
+reload_clicked = st.button("Reload Snapshot")
+if reload_clicked or "sim_snapshot" not in st.session_state:
+    st.session_state.sim_snapshot = load_snapshot()
+    st.session_state.pop("sim_run", None)
+snapshot = st.session_state.sim_snapshot
+st.caption(
+    f"Snapshot: {len(snapshot.thresholds)} products, {len(snapshot.stock)} warehouse stock rows, "
+    f"{len(snapshot.routes)} routes"
+)
+
+col1, col2, col3 = st.columns(3)
+days = col1.number_input("Days", min_value=1, max_value=730, value=90)
+orders_per_day = col2.number_input("Orders per day", min_value=1, value=200)
+max_quantity = col3.number_input("Max units per order", min_value=1, value=5)
+col1, col2, col3, col4 = st.columns(4)
+skew = col1.number_input("SKU skew (0 = uniform)", min_value=0.0, value=1.0, step=0.1)
+speed_kmh = col2.number_input("Speed (km/h)", min_value=1.0, value=SPEED_KMH)
+supplier_lead_hours = col3.number_input(
+    "Supplier lead time (h)", min_value=0.0, value=SUPPLIER_LEAD_HOURS
+)
+seed = col4.number_input("Seed", value=42, step=1)
+start_date = st.date_input(
+    "Start date", value=date.today() - timedelta(days=90),
+    help="Persisted orders are dated from here, so a past start backfills order history.",
+)
+
+if st.button("▶️ Run Simulation"):
+    try:
+        simulation = Simulation(
+            snapshot, orders_per_day=orders_per_day, max_quantity=int(max_quantity),
+            skew=skew, seed=int(seed), speed_kmh=speed_kmh,
+            supplier_lead_hours=supplier_lead_hours, start_date=start_date,
+        )
+        simulation.run(days)
+        st.session_state.sim_run = simulation
+    except ValueError as ve:
+        st.error(f"Validation error: {ve}")
+    except Exception as unexpected:
+        st.error(f"Unexpected error: {unexpected.__class__.__name__}")
+        raise
+
+simulation = st.session_state.get("sim_run")
+if simulation is not None:
+    stats = simulation.stats()
+    st.subheader("Run Statistics")
+    st.caption(
+        f"{stats['days']:.0f} simulated days, {stats['events']:,} events in "
+        f"{stats['elapsed_s']:.2f}s ({stats['events_per_sec']:,.0f} events/s)"
+    )
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Orders", f"{stats['orders']:,}")
+    col2.metric("Fulfilled", f"{stats['fulfilled']:,}")
+    col3.metric("Fill Rate", f"{stats['fill_rate']:.1%}")
+    col4.metric("Open Backorders", f"{stats['open_backorders']:,}")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Mean Lead Time (h)", f"{stats['lead_time_hours']['mean']:.1f}")
+    col2.metric("p95 Lead Time (h)", f"{stats['lead_time_hours']['p95']:.1f}")
+    col3.metric("Transfers", f"{stats['transfers']:,}")
+    col4.metric("Replenishments", f"{stats['replenishments']:,}")
+    col1, col2 = st.columns(2)
+    col1.metric("Transport Cost", f"₹{stats['transport_cost']:,.2f}")
+    col2.metric("Transfer Cost", f"₹{stats['transfer_cost']:,.2f}")
+
+    st.markdown("### Daily Activity")
+    daily = stats["daily"]
+    st.line_chart(
+        {
+            "Orders": [d["orders"] for d in daily],
+            "Fulfilled": [d["fulfilled"] for d in daily],
+            "Backlog": [d["backlog"] for d in daily],
+        }
+    )
+    st.line_chart({"Warehouse stock": [d["stock"] for d in daily]})
+
+    if st.button("💾 Persist Run"):
+        try:
+            written = persist_run(simulation, user_id=st.session_state.get("user_id") or 1)
+            st.session_state.pop("sim_run")
+            st.success(
+                f"✅ Saved {written['orders']:,} orders, {written['logistics']:,} logistics "
+                f"rows and {written['logs']:,} log entries."
+            )
+        except ConnectionError as ce:
+            st.error(f"Database error: {ce}")
+        except Exception as unexpected:
+            st.error(f"Unexpected error: {unexpected.__class__.__name__}")
+            raise
@@ -1,11 +1,18 @@
 """Comprehensive unit tests for the Supply Chain Management System (SCMS) database layer."""
 
+import csv
+import io
+import threading
+import time
+from datetime import date, timedelta
 from decimal import Decimal
+import mysql.connector
+import numpy as np
 import pytest
 
 from db.queries import (
     add_product, get_all_products, update_product, delete_product,
-    add_inventory, get_inventory, get_low_stock, delete_inventory_for_sku,
+    add_inventory, get_inventory, get_low_stock, delete_inventory_for_sku, update_inventory,
     move_product, get_route_cost, get_cheapest_route_details,
     get_products_by_warehouse, get_inventory_locations_for_sku,
     get_customer_locations, get_locations, get_inventory_for_sku,
@@ -15,8 +22,36 @@ from db.queries import (
     get_connection, move_order_to_customer, validate_user,
     suggest_cheapest_origin, create_user, write_log, get_logs,
     get_valid_origins_for_destination, get_all_warehouse_locations,
-    get_logistics_records
+    get_logistics_records, get_fulfillment_plan,
+    get_forecast_gap_report, add_route, delete_route, get_shortest_route,
+    get_orders_page, get_logs_page, get_logistics_page,
+    iter_orders, iter_logs, upsert_product_with_inventory
 )
+from db.benchmark import compare, time_call
+from db.bulk_import import import_csv
+from db.cache import (
+    ReferenceCache, bypass_query_cache, cache_stats, invalidate_tables
+)
+from db.datagen import DatasetGenerator, load_dataset
+from db.connection import ConnectionPool, pool_stats
+from db.export import write_csv
+from db.allocation import allocate_pending_orders, build_plan, solve_transportation
+from db.forecasting import backtest, croston, generate_forecasts, moving_average, ses
+from db.fulfillment import fulfill_pending_orders
+from db.instrumentation import (
+    current_page, export_query_stats_json, page_context, query_stats
+)
+from db.loadtest import percentile, run_load, zipf_weights
+from db.log_writer import LogWriter
+from db.metrics import read_metrics, reconcile_summary_metrics
+from db.migrate import discover, migrate, migration_status, split_statements
+from db.parallel import fetch_all, submit
+from db.replenishment import plan_replenishment
+from db import routing
+from db.routing import RouteGraph
+from db.session import run_in_transaction, transaction
+from db.simulation import Simulation, Snapshot, persist_run
+from db.sqlite_backend import connect as sqlite_connect, translate
 
 
 # ---------------------- SETUP ---------------------- #
@@ -26,6 +61,31 @@ def setup_database():
     db_reset_simulation()
 
 
+# ---------------------- CONNECTION POOL ---------------------- #
+def test_connection_pool_reuses_connections():
+    """Test that repeated queries borrow pooled connections instead of reconnecting."""
+    with bypass_query_cache():
+        get_all_products()
+        before = pool_stats()
+        for _ in range(5):
+            get_all_products()
+        after = pool_stats()
+    assert after["checkouts"] == before["checkouts"] + 5
+    assert after["connects"] == before["connects"]
+    assert after["in_use"] == 0
+
+
+def test_connection_pool_warm_opens_up_to_size():
+    """Test that warming tops the pool up to its size without reusing idle connections."""
+    pool = ConnectionPool(connect_fn=lambda: sqlite_connect(":memory:"), size=3)
+    pool.acquire().close()
+    assert pool.stats()["open"] == 1
+    assert pool.warm() == 2
+    assert pool.stats()["open"] == pool.stats()["idle"] == 3
+    assert pool.warm() == 0
+    pool.close_all()
+
+
 # ---------------------- F-001: Add/Edit/Delete Product ---------------------- #
 def test_add_update_delete_product():
     """Test adding, updating, and deleting a product."""
@@ -46,6 +106,30 @@ def test_add_update_delete_product():
     assert not any(p[0] == sku for p in products)
 
 
+def test_upsert_product_with_inventory_is_one_transaction():
+    """Test a product and its stock are created, updated and rolled back together."""
+    delete_product("UPSERT1")
+    assert upsert_product_with_inventory(
+        " upsert1 ", "Upsert", "Desc", 5, {"Warehouse A": 3, "Warehouse B": 9}, create=True
+    ) == 2
+    assert dict(get_inventory_for_sku("UPSERT1")) == {"Warehouse A": 3, "Warehouse B": 9}
+    assert any(i[0] == "UPSERT1" and i[2] == "Warehouse A" for i in get_low_stock())
+
+    upsert_product_with_inventory("UPSERT1", "Renamed", "Desc", 2, {"Warehouse A": 4})
+    assert [p[1] for p in get_all_products() if p[0] == "UPSERT1"] == ["Renamed"]
+    assert dict(get_inventory_for_sku("UPSERT1")) == {"Warehouse A": 4, "Warehouse B": 9}
+
+    with pytest.raises(mysql.connector.Error):
+        upsert_product_with_inventory("UPSERT1", "Broken", "Desc", 2, {"X" * 200: 1})
+    assert [p[1] for p in get_all_products() if p[0] == "UPSERT1"] == ["Renamed"]
+    with pytest.raises(ValueError):
+        upsert_product_with_inventory("UPSERT1", "Renamed", "Desc", 2, {"Warehouse A": -1})
+    with pytest.raises(ValueError):
+        upsert_product_with_inventory("UPSERT1", "Duplicate", "Desc", 2, {}, create=True)
+    assert [p[1] for p in get_all_products() if p[0] == "UPSERT1"] == ["Renamed"]
+    delete_product("UPSERT1")
+
+
 # ---------------- F-002 & F-003: Inventory Tracking & Low Stock Alert ---------------- #
 def test_inventory_tracking_and_alert():
     """Test inventory tracking and low stock alert behavior."""
@@ -58,6 +142,7 @@ def test_inventory_tracking_and_alert():
         (sku, location),
     )
     conn.commit()
+    invalidate_tables("Inventory")
 
     add_inventory(sku, location, 3)
     inventory = get_inventory()
@@ -89,6 +174,7 @@ def test_move_product_and_cost():
         (sku, origin, 20),
     )
     conn.commit()
+    invalidate_tables("Inventory")
 
     cost = get_route_cost(origin, destination)
     assert cost is not None
@@ -114,6 +200,248 @@ def test_move_product_insufficient_stock():
         move_product(sku, origin, destination, 9999, 10.0)
 
 
+def test_move_product_concurrent_hot_sku_never_oversells():
+    """Test many concurrent movers of one SKU neither oversell nor deadlock."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO Inventory (sku, location, quantity) VALUES ('SKU002', 'Warehouse C', 10) "
+        "ON DUPLICATE KEY UPDATE quantity = 10"
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+    invalidate_tables("Inventory")
+    before = dict(get_inventory_for_sku("SKU002"))
+    moved, errors, retries = [], [], []
+
+    def mover(destination):
+        for _ in range(4):
+            try:
+                # Run the move like move_product does, but record any deadlock
+                # retry instead of letting it pass silently.
+                run_in_transaction(
+                    lambda s, d=destination: move_product(
+                        "SKU002", "Warehouse C", d, 1, 1.0, session=s
+                    ),
+                    on_retry=lambda error, attempt: retries.append(error.errno),
+                )
+                moved.append(1)
+            except ValueError:
+                pass
+            except Exception as e:  # pylint: disable=broad-except
+                errors.append(e)
+
+    threads = [
+        threading.Thread(target=mover, args=(dest,))
+        for dest in ("Warehouse A", "Warehouse B", "Retail Hub 1", "Retail Hub 2") * 2
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    after = dict(get_inventory_for_sku("SKU002"))
+    assert errors == []
+    assert retries == []
+    assert len(moved) == 10
+    assert "Warehouse C" not in after  # sold out; zero rows are not listed
+    assert sum(after.values()) == sum(before.values())
+
+
+def test_run_in_transaction_retries_deadlocks():
+    """Test a deadlocked attempt is retried and the retry callback is told."""
+    attempts, retries = [], []
+
+    def work(session):
+        attempts.append(1)
+        session.cursor.execute("SELECT 1")
+        session.cursor.fetchall()
+        if len(attempts) == 1:
+            raise mysql.connector.errors.DatabaseError(msg="Deadlock found", errno=1213)
+        return "done"
+
+    result = run_in_transaction(work, backoff=0, on_retry=lambda e, n: retries.append(n))
+    assert result == "done"
+    assert len(attempts) == 2 and retries == [0]
+
+    def always_deadlocks(session):
+        raise mysql.connector.errors.DatabaseError(msg="Deadlock found", errno=1213)
+
+    with pytest.raises(mysql.connector.Error):
+        run_in_transaction(always_deadlocks, retries=1, backoff=0)
+
+
+def test_route_graph_shortest_path_and_incremental_updates():
+    """Test multi-hop paths and that edge edits invalidate cached trees."""
+    graph = RouteGraph([
+        ("A", "B", 10, 5), ("B", "C", 10, 5), ("A", "C", 50, 1),
+    ])
+    path = graph.shortest_path("A", "C")
+    assert path["path"] == ["A", "B", "C"]
+    assert path["cost"] == 20
+    assert graph.shortest_path("A", "C", weight="distance")["path"] == ["A", "C"]
+
+    graph.set_route("B", "C", 100, 5)
+    assert graph.shortest_path("A", "C")["path"] == ["A", "C"]
+    graph.remove_route("A", "C")
+    assert graph.shortest_path("A", "C")["cost"] == 110
+    assert graph.shortest_path("C", "A") is None
+
+
+def test_route_graph_sums_float_rows_with_edited_edges():
+    """Test that loaded float costs are stored as Decimal like edited edges."""
+    graph = RouteGraph([("A", "B", 10.1, 5.5), ("B", "C", 20.2, None)])
+    graph.shortest_path("A", "C")  # cache a tree for set_route to compare against
+    graph.set_route("A", "D", 1.5, 2)
+    graph.set_route("D", "B", 1.5, 2)
+    path = graph.shortest_path("A", "C")
+    assert path["path"] == ["A", "D", "B", "C"]
+    assert path["cost"] == Decimal("23.2")
+    assert graph.shortest_path("A", "C", weight="distance")["distance"] == Decimal("4")
+
+
+def test_route_graph_reloads_out_of_process_route_changes(monkeypatch):
+    """Test that the shared route graph picks up Routes rows written elsewhere once expired."""
+    assert get_shortest_route("Warehouse Remote", "Retail Hub 1") is None
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO Routes (origin, destination, cost, distance_km) "
+        "VALUES ('Warehouse Remote', 'Retail Hub 1', 8.00, 20.0)"
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+    assert get_shortest_route("Warehouse Remote", "Retail Hub 1") is None
+
+    monkeypatch.setattr(routing, "_graph_expires", 0.0)
+    assert get_shortest_route("Warehouse Remote", "Retail Hub 1")["cost"] == 8
+    delete_route("Warehouse Remote", "Retail Hub 1")
+    assert get_shortest_route("Warehouse Remote", "Retail Hub 1") is None
+
+
+def test_multi_hop_move_order_to_customer():
+    """Test that an order without a direct route ships via a transshipment leg."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Inventory WHERE sku = 'SKU003' AND location = 'Warehouse C'")
+    conn.commit()
+    cursor.close()
+    conn.close()
+    invalidate_tables("Inventory")
+
+    add_route("Warehouse C", "Warehouse B", 5.00, 12.0)
+    add_inventory("SKU003", "Warehouse C", 4)
+    route = get_shortest_route("Warehouse C", "Retail Hub 1")
+    assert route["path"] == ["Warehouse C", "Warehouse B", "Retail Hub 1"]
+
+    with pytest.raises(ValueError):
+        move_order_to_customer(0, "SKU003", 2, "Warehouse C", "Retail Hub 1")
+    total = move_order_to_customer(0, "SKU003", 2, "Warehouse C", "Retail Hub 1",
+                                   multi_hop=True)
+    assert total == (5 + 70) * 2
+    assert dict(get_inventory_for_sku("SKU003"))["Warehouse C"] == 2
+
+    delete_route("Warehouse C", "Warehouse B")
+    assert get_shortest_route("Warehouse C", "Retail Hub 1") is None
+
+
+def test_reference_cache_versions_and_ttl():
+    """Test that cached values reload after invalidation or TTL expiry."""
+    cache = ReferenceCache(ttl=60)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return len(loads)
+
+    assert cache.get("k", ("Routes",), loader) == 1
+    assert cache.get("k", ("Routes",), loader) == 1
+    cache.invalidate("Inventory")
+    assert cache.get("k", ("Routes",), loader) == 1
+    cache.invalidate("Routes")
+    assert cache.get("k", ("Routes",), loader) == 2
+    assert cache.stats()["hits"] == 2
+
+    cache.ttl = 0
+    cache.invalidate("Routes")
+    cache.get("k", ("Routes",), loader)
+    assert cache.get("k", ("Routes",), loader) == 4
+
+
+def test_route_reads_in_a_session_skip_the_reference_cache():
+    """Test that route lookups inside a transaction see its uncommitted route changes."""
+    get_route_cost("Warehouse Session", "Retail Hub 1")  # warm the reference cache
+
+    class Rollback(Exception):
+        pass
+
+    with pytest.raises(Rollback):
+        with transaction() as session:
+            add_route("Warehouse Session", "Retail Hub 1", 12.5, 30, session=session)
+            assert get_route_cost("Warehouse Session", "Retail Hub 1", session=session) == 12.5
+            raise Rollback
+    assert get_route_cost("Warehouse Session", "Retail Hub 1") is None
+
+
+def test_location_reads_in_a_session_skip_the_reference_cache():
+    """Test that warehouse locations inside a transaction include its uncommitted stock."""
+    assert "Warehouse Session" not in get_all_warehouse_locations()  # warm the cache
+
+    class Rollback(Exception):
+        pass
+
+    with pytest.raises(Rollback):
+        with transaction() as session:
+            add_inventory("SKU001", "Warehouse Session", 3, session=session)
+            assert "Warehouse Session" in get_all_warehouse_locations(session=session)
+            raise Rollback
+    assert "Warehouse Session" not in get_all_warehouse_locations()
+
+
+def test_query_cache_serves_reads_until_a_write():
+    """Test cached reads skip the pool until a mutator bumps their table version."""
+    get_inventory_for_sku("SKU001")
+    checkouts = pool_stats()["checkouts"]
+    first = get_inventory_for_sku("SKU001")
+    first.append(("Scratch", 0))
+    assert ("Scratch", 0) not in get_inventory_for_sku("SKU001")
+    assert pool_stats()["checkouts"] == checkouts
+
+    add_inventory("SKU001", "Warehouse Q", 7)
+    assert ("Warehouse Q", 7) in get_inventory_for_sku("SKU001")
+    with transaction() as session:
+        update_inventory("SKU001", "Warehouse Q", 9, session=session)
+        assert ("Warehouse Q", 9) in get_inventory_for_sku("SKU001", session=session)
+        assert ("Warehouse Q", 7) in get_inventory_for_sku("SKU001")
+    assert ("Warehouse Q", 9) in get_inventory_for_sku("SKU001")
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Inventory WHERE location = 'Warehouse Q'")
+    conn.commit()
+    cursor.close()
+    conn.close()
+    assert ("Warehouse Q", 9) in get_inventory_for_sku("SKU001")
+    invalidate_tables("Inventory")
+    assert "Warehouse Q" not in dict(get_inventory_for_sku("SKU001"))
+
+
+def test_route_lookups_are_served_from_cache():
+    """Test route lookups hit the cache and see committed route changes."""
+    get_route_cost("Warehouse A", "Retail Hub 1")
+    hits = cache_stats()["hits"]
+    for _ in range(3):
+        assert get_route_cost("Warehouse A", "Retail Hub 1") is not None
+    assert cache_stats()["hits"] >= hits + 3
+
+    add_route("Warehouse D", "Retail Hub 9", 42.00, 7.0)
+    assert get_route_cost("Warehouse D", "Retail Hub 9") == 42
+    assert "Retail Hub 9" in get_customer_locations()
+    delete_route("Warehouse D", "Retail Hub 9")
+    assert get_route_cost("Warehouse D", "Retail Hub 9") is None
+
+
 # ---------------------- F-006: Order Management ---------------------- #
 def test_order_flow():
     """Test placing, updating, and deleting customer orders."""
@@ -135,6 +463,91 @@ def test_order_flow():
     assert not any(o[0] == order_id for o in orders)
 
 
+def test_keyset_pagination_walks_orders_both_ways():
+    """Test next/previous cursors page through filtered orders without gaps."""
+    for qty in range(1, 6):
+        place_order("SKU001", qty, "PagedUser", "Retail Hub 2")
+    expected = [o[0] for o in get_orders("PagedUser", "User")]
+
+    first = get_orders_page(limit=2, customer="PagedUser")
+    second = get_orders_page(limit=2, customer="PagedUser", before_id=first["next"])
+    third = get_orders_page(limit=2, customer="PagedUser", before_id=second["next"])
+    seen = [r[0] for page in (first, second, third) for r in page["rows"]]
+    assert seen == expected
+    assert first["prev"] is None and third["next"] is None
+
+    back = get_orders_page(limit=2, customer="PagedUser", after_id=second["prev"])
+    assert back["rows"] == first["rows"]
+
+    pending = get_orders_page(limit=50, customer="PagedUser", status="Processed")
+    assert pending["rows"] == []
+
+
+def test_logs_and_logistics_pages():
+    """Test keyset pages for logs and logistics honour filters and limits."""
+    write_log(1, "Paged log SKU999 entry")
+    logs = get_logs_page(limit=5, search="SKU999")
+    assert logs["rows"] and all("SKU999" in r[2] for r in logs["rows"])
+
+    records = get_logistics_page(limit=3, location="Retail Hub 1")
+    assert len(records["rows"]) <= 3
+    assert all("Retail Hub 1" in (r[2], r[3]) for r in records["rows"])
+
+
+def test_streaming_iterators_match_list_functions():
+    """Test iter_* generators yield the same rows as the list functions in small batches."""
+    assert [o[0] for o in iter_orders(batch_size=2)] == sorted(o[0] for o in get_orders())
+    logs = list(iter_logs(batch_size=3))
+    assert [(l[1], l[2]) for l in reversed(logs)] == list(get_logs())
+
+    in_use = pool_stats()["in_use"]
+    partial = iter_orders(batch_size=1)
+    next(partial)
+    partial.close()  # abandoning a stream must not leak the connection
+    assert pool_stats()["in_use"] <= in_use
+
+
+def test_export_orders_csv():
+    """Test CSV export streams every order with a header row."""
+    out = io.StringIO()
+    count = write_csv("orders", out, batch_size=2)
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+    assert rows[0][0] == "order_id"
+    assert count == len(rows) - 1 == len(get_orders())
+
+
+def test_bulk_import_upserts_chunks_and_reports_rejects():
+    """Test CSV import upserts valid rows in chunks and reports bad lines."""
+    products = import_csv("products", io.StringIO(
+        "sku,name,description,threshold\n"
+        "bulk1,Bulk One,First,4\nBULK2,Bulk Two,,\nBULK3,,No name,1\nBULK4,Bad,,-2\n"
+    ), chunk_size=1)
+    assert products["imported"] == 2
+    assert [line for line, _ in products["rejects"]] == [4, 5]
+    assert {"BULK1", "BULK2"} <= {p[0] for p in get_all_products()}
+
+    inventory = import_csv("inventory", io.StringIO(
+        "location,sku,quantity\nWarehouse A,BULK1,3\nWarehouse A,NOSUCH,1\n"
+        "Warehouse A,BULK1,8\nWarehouse B,BULK2,x\n"
+    ), chunk_size=2)
+    assert inventory["imported"] == 2
+    assert dict(inventory["rejects"]) == {3: "unknown sku NOSUCH",
+                                          5: "quantity must be a whole number"}
+    assert dict(get_inventory_for_sku("BULK1")) == {"Warehouse A": 8}
+
+    routes = import_csv("routes", io.StringIO(
+        "origin,destination,cost,distance_km\nWarehouse Z,Retail Hub 1,12.5,40\n"
+    ))
+    assert routes["imported"] == 1 and routes["rows_per_sec"] > 0
+    assert get_route_cost("Warehouse Z", "Retail Hub 1") == Decimal("12.50")
+    with pytest.raises(ValueError):
+        import_csv("routes", io.StringIO("origin,cost\n"))
+
+    delete_route("Warehouse Z", "Retail Hub 1")
+    delete_product("BULK1")
+    delete_product("BULK2")
+
+
 # ---------------------- F-007: Forecast Demand ---------------------- #
 def test_forecast_and_gap():
     """Test adding a forecast and verifying available inventory."""
@@ -147,6 +560,260 @@ def test_forecast_and_gap():
     assert isinstance(inventory, (int, float, Decimal))
 
 
+def test_forecast_gap_report_matches_per_sku_lookup():
+    """Test the grouped gap report agrees with the per-SKU inventory lookup."""
+    add_forecast("SKU003", 500, "2031-01-15")
+    report = get_forecast_gap_report(sku="SKU003", start_date="2031-01-01",
+                                     end_date="2031-01-31")
+    assert len(report) == 1
+    row = report[0]
+    assert row["inventory"] == get_inventory_for_forecast("SKU003")
+    assert row["gap"] == 500 - row["inventory"]
+    assert row["status"] == "Shortage"
+    assert get_forecast_gap_report(sku="SKU003", start_date="2031-02-01") == []
+
+
+def test_forecast_models_are_vectorised_over_series():
+    """Test each model forecasts every row of a history matrix at once."""
+    history = np.array([[4.0, 4, 4, 4], [0, 6, 0, 6], [0, 0, 0, 0]])
+    assert moving_average(history, window=2).tolist() == [4.0, 3.0, 0.0]
+    assert ses(history, alpha=0.5).tolist() == [4.0, 3.75, 0.0]
+    assert croston(history, alpha=0.5).tolist() == [4.0, 3.0, 0.0]
+
+
+def test_generate_forecasts_from_dated_orders_and_backtest():
+    """Test forecasts are fitted from order history, stored and backtested."""
+    end = date(2020, 3, 1)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO Orders (sku, quantity, customer_name, customer_location, status, "
+        "order_date) VALUES (%s, %s, 'hist', %s, 'Processed', %s)",
+        [("SKU002", 3, hub, end - timedelta(days=7 * week))
+         for week in range(8) for hub in ("Retail Hub 1", "Retail Hub 2")],
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+    invalidate_tables("Orders")
+
+    add_forecast("SKU003", 40, end + timedelta(days=1))  # hand-entered, no order history
+    result = generate_forecasts("moving_average", horizon=2, periods=8, end=end)
+    assert result["rows"] == [
+        ("SKU002", 6, date(2020, 3, 2)), ("SKU002", 6, date(2020, 3, 9))
+    ]
+    by_location = generate_forecasts("ses", horizon=1, periods=8, end=end, by_location=True)
+    assert by_location["series"] == 2 and by_location["rows"][0][1] == 6
+    report = get_forecast_gap_report(sku="SKU002", start_date="2020-03-02",
+                                     end_date="2020-03-31")
+    # The second run replaced the 2 March forecast instead of adding another.
+    assert [(row["date"], row["forecast"]) for row in report] == [
+        (date(2020, 3, 2), 6), (date(2020, 3, 9), 6)
+    ]
+    kept = get_forecast_gap_report(sku="SKU003", start_date="2020-03-02", end_date="2020-03-02")
+    assert [row["forecast"] for row in kept] == [40]
+
+    accuracy = backtest(holdout=2, periods=8, end=end)
+    assert accuracy["series"] == 1
+    assert accuracy["models"]["ses"]["mae"] == 0.0
+
+
+# ---------------------- Instrumentation ---------------------- #
+def test_query_instrumentation_records_calls_by_page():
+    """Test query calls are counted, timed and tagged with the calling page."""
+    with page_context("test-page"), bypass_query_cache():
+        get_all_products()
+        get_all_products()
+        with pytest.raises(ValueError):
+            move_product("SKU001", "Nowhere", "Warehouse A", 1, 1.0)
+        rows = list(iter_orders(batch_size=2))
+
+    stats = {s["function"]: s for s in query_stats("test-page")}
+    assert stats["get_all_products"]["calls"] == 2
+    assert stats["get_all_products"]["connections"] == 2
+    assert stats["get_all_products"]["rows"] == 2 * len(get_all_products())
+    assert stats["get_all_products"]["p99_ms"] >= stats["get_all_products"]["p50_ms"] > 0
+    assert stats["move_product"]["errors"] == 1
+    assert stats["iter_orders"]["rows"] == len(rows)
+    assert '"test-page"' in export_query_stats_json("test-page")
+
+
+# ---------------------- Synthetic data & benchmarks ---------------------- #
+def test_load_dataset_truncates_only_the_requested_tables():
+    """Test that loading a subset of tables leaves the other tables untouched."""
+    products = get_all_products()
+    timings = load_dataset("tiny", tables=("Logs",))
+    assert timings["Logs"][0] == DatasetGenerator("tiny").counts()["Logs"]
+    assert get_all_products() == products
+
+
+def test_dataset_generator_is_deterministic_and_unique():
+    """Test the same seed yields the same rows and unique keys stay unique."""
+    first = DatasetGenerator("tiny", seed=7)
+    second = DatasetGenerator("tiny", seed=7)
+    assert list(first.rows("Orders")) == list(second.rows("Orders"))
+    assert list(first.rows("Orders")) != list(DatasetGenerator("tiny", seed=8).rows("Orders"))
+
+    inventory = list(first.rows("Inventory"))
+    assert len(inventory) == first.counts()["Inventory"]
+    assert len({(sku, loc) for sku, loc, _ in inventory}) == len(inventory)
+    routes = list(first.rows("Routes"))
+    assert len({(o, d) for o, d, _, _ in routes}) == len(routes) == first.counts()["Routes"]
+
+
+def test_benchmark_compare_flags_regressions():
+    """Test benchmark comparison classifies median changes against a threshold."""
+    stats = time_call(lambda: [1, 2, 3], repeat=3, warmup=0)
+    assert stats["rows"] == 3 and stats["min_ms"] <= stats["median_ms"]
+
+    baseline = {"results": {"a": {"median_ms": 10.0}, "b": {"median_ms": 10.0},
+                            "c": {"median_ms": 10.0}, "gone": {"median_ms": 1.0}}}
+    current = {"results": {"a": {"median_ms": 15.0}, "b": {"median_ms": 5.0},
+                           "c": {"median_ms": 10.5}, "new": {"median_ms": 1.0}}}
+    status = {e["name"]: e["status"] for e in compare(baseline, current, threshold=0.2)}
+    assert status == {"a": "regression", "b": "improvement", "c": "ok",
+                      "gone": "missing", "new": "new"}
+
+
+# ---------------------- Parallel fetch ---------------------- #
+def test_fetch_all_runs_calls_concurrently_with_page_tag():
+    """Test fetch_all overlaps calls, keeps the page tag and returns by name."""
+    def slow(value):
+        time.sleep(0.2)
+        return value, current_page()
+
+    start = time.perf_counter()
+    with page_context("parallel-page"):
+        data = fetch_all(a=lambda: slow(1), b=lambda: slow(2), c=lambda: slow(3))
+    assert time.perf_counter() - start < 0.5
+    assert data == {"a": (1, "parallel-page"), "b": (2, "parallel-page"),
+                    "c": (3, "parallel-page")}
+    assert submit(lambda: 5).result() == 5
+
+
+def test_fetch_all_queries_and_errors():
+    """Test real queries load together and the first failure is re-raised."""
+    data = fetch_all(report=generate_summary_report, products=get_all_products)
+    assert "Total Orders" in data["report"]
+    assert data["products"] == get_all_products()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        fetch_all(ok=get_all_products, bad=fail)
+
+
+# ---------------------- Load driver ---------------------- #
+def test_zipf_weights_and_percentile():
+    """Test SKU skew weights and nearest-rank percentiles."""
+    assert zipf_weights(3, 0) == [1.0, 2.0, 3.0]
+    weights = zipf_weights(3, 1.0)
+    assert weights[0] == 1.0 and weights[1] - weights[0] > weights[2] - weights[1]
+    samples = list(range(1, 101))
+    assert percentile(samples, 0.5) == 50 and percentile(samples, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def test_run_load_small_thread_workload():
+    """Test a short concurrent run reports throughput and keeps invariants."""
+    report = run_load(workers=2, duration=30, operations=10, check_metrics=False)
+    assert report["ok"]["place"] > 0
+    assert report["throughput_ops"] > 0
+    assert report["latency"]["place"]["p99_ms"] >= report["latency"]["place"]["p50_ms"]
+    assert all(report["latency"][op]["count"] == report["ok"][op] for op in report["ok"])
+    assert report["violations"] == []
+
+
+def test_simulation_backorders_replenishes_and_persists():
+    """Test a seeded simulation restocks a sold-out SKU and persists its orders."""
+    snapshot = Snapshot(
+        thresholds={"SKU001": 5},
+        stock={("SKU001", "Warehouse A"): 10, ("SKU001", "Warehouse B"): 0},
+        routes={
+            ("Warehouse A", "Retail Hub 1"): (Decimal("150.00"), Decimal("120.00")),
+            ("Warehouse A", "Warehouse B"): (Decimal("100.00"), Decimal("30.00")),
+        },
+    )
+    simulation = Simulation(snapshot, orders_per_day=24, max_quantity=3, seed=1)
+    stats = simulation.run(10)
+    assert stats == Simulation(snapshot, orders_per_day=24, max_quantity=3, seed=1).run(10) | {
+        "elapsed_s": stats["elapsed_s"], "events_per_sec": stats["events_per_sec"]
+    }
+    assert snapshot.stock[("SKU001", "Warehouse A")] == 10
+    assert stats["backordered"] > 0 and stats["replenishments"] > 0
+    assert stats["fulfilled"] + stats["open_backorders"] == stats["orders"]
+    assert stats["lead_time_hours"]["p95"] >= 4 + 120 / 60
+    assert len(stats["daily"]) == 10
+
+    before = generate_summary_report()["Total Orders"]
+    written = persist_run(simulation)
+    assert written["orders"] == stats["orders"]
+    assert generate_summary_report()["Total Orders"] == before + stats["orders"]
+
+
+# ---------------------- Schema migrations ---------------------- #
+def test_split_statements_skips_comments():
+    """Test migration scripts split into statements without comment lines."""
+    sql = "-- note; not a statement\nCREATE INDEX a ON T (x);\n\nDROP INDEX b ON T;\n"
+    assert split_statements(sql) == ["CREATE INDEX a ON T (x)", "DROP INDEX b ON T"]
+
+
+def test_migrate_is_idempotent():
+    """Test migrations apply once, are recorded, and re-running is a no-op."""
+    migrate()
+    assert migrate() == []
+    assert all(applied for _, applied in migration_status())
+    versions = [m.version for m in discover()]
+    assert versions == sorted(set(versions))
+
+
+def test_sqlite_translate_rewrites_mysql_dialect():
+    """Test MySQL-only syntax is rewritten for the embedded SQLite backend."""
+    assert translate(
+        "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)"
+    ) == (
+        "INSERT INTO Inventory (sku, location, quantity) VALUES (?, ?, ?) "
+        "ON CONFLICT DO UPDATE SET quantity = quantity + excluded.quantity"
+    )
+    assert translate("SELECT status FROM Orders WHERE order_id = %s FOR UPDATE") == (
+        "SELECT status FROM Orders WHERE order_id = ?"
+    )
+    assert translate("INSERT IGNORE INTO Users (user_id) VALUES (%s)").startswith(
+        "INSERT OR IGNORE INTO"
+    )
+    assert translate("SET SESSION unique_checks = 0") is None
+    assert "FROM (SELECT ? AS sku) AS d WHERE" in translate(
+        "UPDATE Inventory i JOIN (SELECT %s AS sku) d ON i.sku = d.sku "
+        "SET i.quantity = i.quantity - 1"
+    )
+
+
+def test_sqlite_file_backend_bootstraps_schema(tmp_path):
+    """Test a file-backed SQLite database gets the schema, migrations and WAL."""
+    conn = sqlite_connect(str(tmp_path / "scms.db"))
+    cursor = conn.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode")
+        assert cursor.fetchone()[0] == "wal"
+        cursor.execute("SELECT cost FROM Routes WHERE origin = %s AND destination = %s",
+                       ("warehouse a", "Retail Hub 1"))
+        assert cursor.fetchone()[0] == Decimal("150.00")
+        cursor.execute("SELECT COUNT(*) FROM SchemaMigrations")
+        assert cursor.fetchone()[0] == len(discover())
+        with pytest.raises(mysql.connector.IntegrityError) as error:
+            cursor.execute(
+                "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s)",
+                ("SKU001", "Warehouse A", 1),
+            )
+        assert error.value.errno == 1062
+    finally:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+
+
 # ---------------------- F-009: Reporting ---------------------- #
 def test_summary_report():
     """Test that the summary report returns all expected fields."""
@@ -157,6 +824,57 @@ def test_summary_report():
     assert "Total Logistics Cost" in report
 
 
+def test_summary_metrics_follow_writes_and_reconcile():
+    """Test metrics stay consistent through mutators and drift is flagged."""
+    reconcile_summary_metrics(fix=True)
+    before = generate_summary_report()
+
+    place_order("SKU001", 1, "MetricsUser", "Retail Hub 1")
+    order_id = get_orders("MetricsUser", role="User")[0][0]
+    update_order_status(order_id, "Processed")
+    move_product("SKU003", "Warehouse A", "Warehouse B", 1, 10.0)
+
+    after = generate_summary_report()
+    assert after["Total Orders"] == before["Total Orders"] + 1
+    assert after["Processed Orders"] == before["Processed Orders"] + 1
+    assert after["Total Logistics Cost"] == before["Total Logistics Cost"] + Decimal("10.00")
+    assert reconcile_summary_metrics() == {}
+
+    delete_order(order_id)
+    assert generate_summary_report()["Total Orders"] == before["Total Orders"]
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Orders WHERE customer_name = 'MetricsUser'")
+    cursor.execute(
+        "INSERT INTO Orders (sku, quantity, customer_name, customer_location, status) "
+        "VALUES ('SKU001', 1, 'MetricsUser', 'Retail Hub 1', 'Pending')"
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+    invalidate_tables("Orders")
+
+    drift = reconcile_summary_metrics(fix=True)
+    assert drift["Total Orders"] == (before["Total Orders"], before["Total Orders"] + 1)
+    assert reconcile_summary_metrics() == {}
+
+
+def test_session_metrics_are_applied_once_right_before_commit():
+    """Test that a session's metric changes are merged and written last, at commit."""
+    reconcile_summary_metrics(fix=True)
+    before = generate_summary_report()
+    with transaction() as session:
+        place_order("SKU001", 1, "DeferredUser", "Retail Hub 1", session=session)
+        place_order("SKU001", 2, "DeferredUser", "Retail Hub 1", session=session)
+        update_inventory("SKU003", "Warehouse B", 0, session=session)
+        assert session.deferred["metrics"]["deltas"] == {"total_orders": 2}
+        assert session.deferred["metrics"]["skus"] == {"SKU003"}
+        assert read_metrics(session.cursor)["Total Orders"] == before["Total Orders"]
+    assert generate_summary_report()["Total Orders"] == before["Total Orders"] + 2
+    assert reconcile_summary_metrics() == {}
+
+
 # ---------------------- F-010: Simulation Reset ---------------------- #
 @pytest.mark.timeout(10)
 def test_reset_simulation():
@@ -199,6 +917,57 @@ def test_logging_functions():
     assert any("Test log entry" in l[1] for l in logs)
 
 
+def test_log_writer_batches_and_flushes():
+    """Test that the buffered log writer persists queued rows on flush."""
+    writer = LogWriter(batch_size=50, flush_interval=60)
+    for i in range(5):
+        writer.write(1, f"Buffered log entry {i}")
+    assert writer.flush(timeout=10)
+    assert writer.pending() == 0
+    actions = [l[1] for l in get_logs()]
+    assert all(f"Buffered log entry {i}" in actions for i in range(5))
+    writer.close()
+
+
+def test_log_writer_dead_letters_rows_after_capped_retries():
+    """Test that a batch that keeps failing is dead-lettered instead of retried forever."""
+    def broken_connection():
+        raise ConnectionError("database unavailable")
+
+    dead = []
+    writer = LogWriter(connect_fn=broken_connection, flush_interval=0.01, max_retries=2,
+                       dead_letter=dead.extend)
+    writer.write(1, "Undeliverable log entry")
+    assert writer.flush(timeout=10)
+    assert dead == [(1, "Undeliverable log entry")]
+    assert writer.dead_lettered == 1 and writer.pending() == 0
+    writer.close()
+
+
+def test_log_writer_flush_times_out_on_a_full_queue():
+    """Test that flush honours its timeout while the bounded queue is full."""
+    inserting, release = threading.Event(), threading.Event()
+
+    def stalled_connection():
+        inserting.set()
+        release.wait(10)
+        raise ConnectionError("database unavailable")
+
+    dead = []
+    writer = LogWriter(connect_fn=stalled_connection, max_queue=1, batch_size=1,
+                       flush_interval=60, max_retries=0, dead_letter=dead.extend)
+    writer.write(1, "Stalled log entry")
+    assert inserting.wait(10)
+    writer.write(1, "Queued log entry")  # fills the queue while the worker is stuck
+
+    started = time.monotonic()
+    assert writer.flush(timeout=0.2) is False
+    assert time.monotonic() - started < 5
+    release.set()
+    assert writer.close(timeout=10)
+    assert len(dead) == 2
+
+
 def test_warehouse_location_functions():
     """Test warehouse and origin-related utility functions."""
     sku = "SKU001"
@@ -257,6 +1026,200 @@ def test_get_inventory_for_sku_and_logistics_records():
     assert isinstance(records, list)
 
 
+def test_transaction_commits_order_fulfillment_atomically():
+    """Test that a shared session moves stock, logs and updates status in one commit."""
+    sku = "SKU001"
+    origin = "Warehouse A"
+    destination = "Retail Hub 2"
+    place_order(sku, 1, "TxnUser", destination)
+    order_id = get_orders("TxnUser", "User")[0][0]
+    before = dict(get_inventory_for_sku(sku))
+
+    with transaction() as session:
+        move_order_to_customer(order_id, sku, 1, origin, destination, session=session)
+        update_order_status(order_id, "Processed", session=session)
+        write_log(1, f"Txn processed order #{order_id}", session=session)
+
+    assert dict(get_inventory_for_sku(sku))[origin] == before[origin] - 1
+    assert get_orders("TxnUser", "User")[0][5] == "Processed"
+    assert any(f"Txn processed order #{order_id}" in l[1] for l in get_logs())
+
+
+def test_transaction_rolls_back_on_error():
+    """Test that a failing step undoes every earlier step of the session."""
+    place_order("SKU001", 1, "RollbackUser", "Retail Hub 1")
+    order_id = get_orders("RollbackUser", "User")[0][0]
+
+    with pytest.raises(ValueError):
+        with transaction() as session:
+            update_order_status(order_id, "Processed", session=session)
+            move_product("SKU001", "Warehouse A", "Retail Hub 1", 99999, 1.0, session=session)
+
+    assert get_orders("RollbackUser", "User")[0][5] == "Pending"
+
+
+def test_fulfill_pending_orders_batch():
+    """Test batch fulfillment picks the cheapest stocked origin and skips the rest."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE Orders SET status = 'Processed' WHERE status = 'Pending'")
+    cursor.execute(
+        "DELETE FROM Inventory WHERE sku = 'SKU002' AND location IN ('Warehouse A', 'Warehouse B')"
+    )
+    cursor.execute(
+        "INSERT INTO Inventory (sku, location, quantity) VALUES "
+        "('SKU002', 'Warehouse A', 10), ('SKU002', 'Warehouse B', 3)"
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+    invalidate_tables("Orders", "Inventory")
+
+    place_order("SKU002", 3, "BatchUser", "Retail Hub 1")   # B is cheaper (70 vs 150)
+    place_order("SKU002", 2, "BatchUser", "Retail Hub 1")   # B exhausted -> A
+    place_order("SKU002", 50, "BatchUser", "Retail Hub 1")  # not enough anywhere
+
+    report = fulfill_pending_orders(chunk_size=2)
+    assert [r["status"] for r in report] == ["Processed", "Processed", "Skipped"]
+    assert report[0]["origin"] == "Warehouse B"
+    assert report[1]["origin"] == "Warehouse A"
+    assert report[0]["cost"] == 70 * 3
+
+    stock = dict(get_inventory_for_sku("SKU002"))
+    assert stock["Warehouse A"] == 8
+    assert "Warehouse B" not in stock
+    statuses = [o[5] for o in get_orders("BatchUser", "User")]
+    assert sorted(statuses) == ["Pending", "Processed", "Processed"]
+
+
+def test_get_fulfillment_plan_lists_stocked_origins():
+    """Test the bulk plan lists origins with enough stock and the cheapest suggestion."""
+    # A stocked origin with the cheapest route, so the suggestion never depends
+    # on what earlier tests left of the seeded stock.
+    add_inventory("SKU003", "Warehouse Plan", 50)
+    add_route("Warehouse Plan", "Retail Hub 3", 1.00, 5.0)
+    place_order("SKU003", 1, "PlanUser", "Retail Hub 3")
+    try:
+        plan = [p for p in get_fulfillment_plan() if p["customer"] == "PlanUser"]
+        assert plan
+        entry = plan[0]
+        assert "Warehouse Plan" in [o["location"] for o in entry["origins"]]
+        assert all(o["available"] >= entry["quantity"] for o in entry["origins"])
+        assert not any(o["location"].startswith("Retail Hub") for o in entry["origins"])
+        routed = [o["cost"] for o in entry["origins"] if o["cost"] is not None]
+        assert entry["suggestion"] == {"origin": "Warehouse Plan", "cost": min(routed)}
+        assert entry["suggestion"]["cost"] == 1
+        delete_order(entry["order_id"])
+    finally:
+        delete_route("Warehouse Plan", "Retail Hub 3")
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM Inventory WHERE location = 'Warehouse Plan'")
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+
+def test_solve_transportation_prefers_global_optimum():
+    """Test the solver beats per-order greedy choices and respects supply."""
+    supply = {"W1": 5, "W2": 5}
+    demand = {"H1": 5, "H2": 5}
+    costs = {("W1", "H1"): 1, ("W1", "H2"): 2, ("W2", "H2"): 10}
+    flows = solve_transportation(supply, demand, costs)
+    # Greedy would send H2's order to its cheapest source W1 and strand H1.
+    assert flows == {("W1", "H1"): 5, ("W2", "H2"): 5}
+
+
+def test_build_plan_drops_orders_the_flow_cannot_complete():
+    """Test units stranded on a short order are re-solved to an order they complete."""
+    orders = [(1, "S", 6, "H1"), (2, "S", 4, "H2")]
+    plan = build_plan(orders, [("S", "W1", 4)], {("W1", "H1"): 1, ("W1", "H2"): 10})
+    assert [(e["order_id"], e["status"]) for e in plan] == [(1, "Unfilled"), (2, "Allocated")]
+    assert plan[1]["shipments"][0]["quantity"] == 4 and plan[1]["cost"] == 40
+
+
+def test_build_plan_drops_thousands_of_short_orders_quickly():
+    """Test that unfillable orders are dropped together instead of one re-solve each."""
+    hubs = ("H1", "H2", "H3")
+    routes = {(w, h): 1 + i for i, h in enumerate(hubs) for w in ("W1", "W2")}
+    orders = [(i, "S", 3, hubs[i % 3]) for i in range(5000)]
+    orders += [(5000 + i, f"T{i % 50}", 2, hubs[i % 3]) for i in range(3000)]
+    stock = [("S", "W1", 500), ("S", "W2", 501)]
+    stock += [(f"T{i}", "W1", 1) for i in range(50)]
+
+    started = time.perf_counter()
+    plan = build_plan(orders, stock, routes)
+    assert time.perf_counter() - started < 1.0
+    allocated = [e for e in plan if e["status"] == "Allocated"]
+    assert sum(e["quantity"] for e in allocated) <= 1001 and len(allocated) >= 330
+    assert all(e["sku"] == "S" for e in allocated)
+    assert len(plan) == len(orders)
+
+
+def test_allocate_pending_orders_splits_and_applies():
+    """Test that an order no single warehouse can cover is split and applied."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE Orders SET status = 'Processed' WHERE status = 'Pending'")
+    cursor.execute("DELETE FROM Inventory WHERE sku = 'SKU003' AND location LIKE 'Warehouse%'")
+    cursor.execute(
+        "INSERT INTO Inventory (sku, location, quantity) VALUES "
+        "('SKU003', 'Warehouse A', 4), ('SKU003', 'Warehouse B', 4)"
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+    invalidate_tables("Orders", "Inventory")
+
+    place_order("SKU003", 6, "SplitUser", "Retail Hub 3")
+    dry_run = allocate_pending_orders()
+    assert dry_run[0]["status"] == "Allocated"
+    assert {s["origin"]: s["quantity"] for s in dry_run[0]["shipments"]} == {
+        "Warehouse A": 4, "Warehouse B": 2,
+    }
+    assert get_orders("SplitUser", "User")[0][5] == "Pending"
+
+    applied = allocate_pending_orders(apply=True)
+    assert applied[0]["cost"] == 90 * 4 + 175 * 2
+    assert get_orders("SplitUser", "User")[0][5] == "Processed"
+    stock = dict(get_inventory_for_sku("SKU003"))
+    assert "Warehouse A" not in stock and stock["Warehouse B"] == 2
+
+
+def test_plan_replenishment_transfers_surplus_and_suggests_reorders():
+    """Test low warehouse rows are topped up from surplus and the rest reordered."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "DELETE FROM Inventory WHERE sku IN ('SKU002', 'SKU003') AND location LIKE 'Warehouse%'"
+    )
+    cursor.execute(
+        "INSERT INTO Inventory (sku, location, quantity) VALUES "
+        "('SKU002', 'Warehouse A', 2), ('SKU002', 'Warehouse B', 15), "
+        "('SKU003', 'Warehouse A', 5), ('SKU003', 'Warehouse B', 20)"
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+    invalidate_tables("Inventory")
+
+    transfers, reorders = plan_replenishment()
+    planned = {(t["sku"], t["origin"], t["destination"]): t["quantity"] for t in transfers}
+    # SKU002 (threshold 10) can spare 5 of the 8 missing; SKU003 (threshold 8) covers all 3.
+    assert planned[("SKU002", "Warehouse B", "Warehouse A")] == 5
+    assert planned[("SKU003", "Warehouse B", "Warehouse A")] == 3
+    assert [(r["sku"], r["location"], r["quantity"]) for r in reorders
+            if r["sku"] in ("SKU002", "SKU003")] == [("SKU002", "Warehouse A", 3)]
+
+    plan_replenishment(apply=True)
+    stock = dict(get_inventory_for_sku("SKU003"))
+    assert stock["Warehouse A"] == 8 and stock["Warehouse B"] == 17
+    stock = dict(get_inventory_for_sku("SKU002"))
+    assert stock["Warehouse A"] == 7 and stock["Warehouse B"] == 10
+    drift = reconcile_summary_metrics()
+    assert "Low Stock Items" not in drift and "Total Logistics Cost" not in drift
+
+
 def test_move_order_to_customer_no_route():
     """Test move_order_to_customer raises ValueError when no route exists."""
     with pytest.raises(ValueError):